@@ -0,0 +1,123 @@
+"""incremental-aggregate-counts
+
+Revision ID: 8a18aa2f4611
+Revises: f6f1a8498ebb
+Create Date: 2021-05-24 16:40:12.512847
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from src.tasks.aggregate_counts import AGGREGATE_USER, AGGREGATE_TRACK, AGGREGATE_PLAYLIST, \
+    get_aggregate_query
+
+
+# revision identifiers, used by Alembic.
+revision = '8a18aa2f4611'
+down_revision = 'f6f1a8498ebb'
+branch_labels = None
+depends_on = None
+
+# Search views that read from the aggregates, and are recreated after the aggregates are replaced
+dependent_views = ['user_lexeme_dict', 'track_lexeme_dict', 'playlist_lexeme_dict', 'album_lexeme_dict']
+
+
+def get_dependent_view_definitions(connection):
+    """Returns the statements that recreate the dependent views and their indexes as they are now"""
+    views = connection.execute(
+        sa.text("SELECT matviewname, definition FROM pg_matviews WHERE matviewname = ANY(:names)"),
+        names=dependent_views
+    ).fetchall()
+    indexes = connection.execute(
+        sa.text("SELECT indexdef FROM pg_indexes WHERE tablename = ANY(:names)"),
+        names=dependent_views
+    ).fetchall()
+    return [f"CREATE MATERIALIZED VIEW {name} AS {definition}" for name, definition in views] + \
+        [indexdef for (indexdef,) in indexes]
+
+
+def upgrade():
+    connection = op.get_bind()
+    dependent_view_definitions = get_dependent_view_definitions(connection)
+
+    # Replace the aggregate materialized views with tables that the indexer updates,
+    # starting from the views' up to date counts
+    connection.execute('''
+      REFRESH MATERIALIZED VIEW aggregate_user;
+      REFRESH MATERIALIZED VIEW aggregate_track;
+      REFRESH MATERIALIZED VIEW aggregate_playlist;
+
+      ALTER MATERIALIZED VIEW aggregate_user RENAME TO aggregate_user_matview;
+      ALTER MATERIALIZED VIEW aggregate_track RENAME TO aggregate_track_matview;
+      ALTER MATERIALIZED VIEW aggregate_playlist RENAME TO aggregate_playlist_matview;
+
+      CREATE TABLE aggregate_user (
+        user_id integer NOT NULL PRIMARY KEY,
+        track_count integer NOT NULL,
+        playlist_count integer NOT NULL,
+        album_count integer NOT NULL,
+        follower_count integer NOT NULL,
+        following_count integer NOT NULL,
+        repost_count integer NOT NULL,
+        track_save_count integer NOT NULL
+      );
+
+      INSERT INTO aggregate_user (
+        user_id, track_count, playlist_count, album_count,
+        follower_count, following_count, repost_count, track_save_count
+      )
+      SELECT
+        user_id, track_count, playlist_count, album_count,
+        follower_count, following_count, repost_count, track_save_count
+      FROM aggregate_user_matview;
+
+      CREATE TABLE aggregate_track (
+        track_id integer NOT NULL PRIMARY KEY,
+        repost_count integer NOT NULL,
+        save_count integer NOT NULL
+      );
+
+      INSERT INTO aggregate_track (track_id, repost_count, save_count)
+      SELECT track_id, repost_count, save_count
+      FROM aggregate_track_matview;
+
+      CREATE TABLE aggregate_playlist (
+        playlist_id integer NOT NULL PRIMARY KEY,
+        is_album boolean NOT NULL,
+        repost_count integer NOT NULL,
+        save_count integer NOT NULL
+      );
+
+      INSERT INTO aggregate_playlist (playlist_id, is_album, repost_count, save_count)
+      SELECT playlist_id, is_album, repost_count, save_count
+      FROM aggregate_playlist_matview;
+
+      DROP MATERIALIZED VIEW aggregate_user_matview CASCADE;
+      DROP MATERIALIZED VIEW aggregate_track_matview CASCADE;
+      DROP MATERIALIZED VIEW aggregate_playlist_matview CASCADE;
+    ''')
+
+    for statement in dependent_view_definitions:
+        connection.execute(statement)
+
+
+def downgrade():
+    connection = op.get_bind()
+    dependent_view_definitions = get_dependent_view_definitions(connection)
+
+    connection.execute(f'''
+      DROP TABLE IF EXISTS aggregate_user CASCADE;
+      DROP TABLE IF EXISTS aggregate_track CASCADE;
+      DROP TABLE IF EXISTS aggregate_playlist CASCADE;
+
+      CREATE MATERIALIZED VIEW aggregate_user AS {get_aggregate_query(AGGREGATE_USER)};
+      CREATE UNIQUE INDEX aggregate_user_idx ON aggregate_user (user_id);
+
+      CREATE MATERIALIZED VIEW aggregate_track AS {get_aggregate_query(AGGREGATE_TRACK)};
+      CREATE UNIQUE INDEX aggregate_track_idx ON aggregate_track (track_id);
+
+      CREATE MATERIALIZED VIEW aggregate_playlist AS {get_aggregate_query(AGGREGATE_PLAYLIST)};
+      CREATE UNIQUE INDEX aggregate_playlist_idx ON aggregate_playlist (playlist_id);
+    ''')
+
+    for statement in dependent_view_definitions:
+        connection.execute(statement)
@@ -0,0 +1,168 @@
+"""incremental-search-dicts
+
+Revision ID: c0de9d1a6697
+Revises: 8a18aa2f4611
+Create Date: 2021-05-26 11:02:37.184520
+
+"""
+from alembic import op
+from src.tasks.search_dicts import search_dicts, get_search_dict_query
+
+
+# revision identifiers, used by Alembic.
+revision = 'c0de9d1a6697'
+down_revision = '8a18aa2f4611'
+branch_labels = None
+depends_on = None
+
+
+def fill_search_dicts(connection):
+    for search_dict in search_dicts:
+        columns = ", ".join(search_dict["columns"])
+        connection.execute(
+            f"""
+            INSERT INTO {search_dict["table"]} ({columns})
+            SELECT {columns} FROM ({get_search_dict_query(search_dict)}) AS search_dict_rows
+            """
+        )
+
+
+def upgrade():
+    connection = op.get_bind()
+    # Replace the search materialized views with tables that are refreshed per user, track and playlist
+    connection.execute('''
+      DROP MATERIALIZED VIEW IF EXISTS user_lexeme_dict;
+      DROP MATERIALIZED VIEW IF EXISTS track_lexeme_dict;
+      DROP MATERIALIZED VIEW IF EXISTS playlist_lexeme_dict;
+      DROP MATERIALIZED VIEW IF EXISTS album_lexeme_dict;
+      DROP MATERIALIZED VIEW IF EXISTS tag_track_user;
+
+      CREATE TABLE user_lexeme_dict (
+        user_id integer NOT NULL,
+        user_name text,
+        handle text,
+        follower_count integer,
+        word text
+      );
+
+      CREATE TABLE track_lexeme_dict (
+        track_id integer NOT NULL,
+        owner_id integer NOT NULL,
+        track_title text,
+        handle text,
+        user_name text,
+        repost_count integer,
+        word text
+      );
+
+      CREATE TABLE playlist_lexeme_dict (
+        playlist_id integer NOT NULL,
+        playlist_name text,
+        owner_id integer NOT NULL,
+        handle text,
+        user_name text,
+        repost_count integer,
+        word text
+      );
+
+      CREATE TABLE album_lexeme_dict (
+        playlist_id integer NOT NULL,
+        playlist_name text,
+        owner_id integer NOT NULL,
+        handle text,
+        user_name text,
+        repost_count integer,
+        word text
+      );
+
+      CREATE TABLE tag_track_user (
+        tag text NOT NULL,
+        track_id integer NOT NULL,
+        owner_id integer NOT NULL
+      );
+
+      -- Finds the users whose search words depend on a user's handle
+      CREATE INDEX IF NOT EXISTS users_lower_name_idx ON users (lower(name)) WHERE is_current IS TRUE;
+
+      -- The impersonator check compares names with handle_lc, which is only set for users indexed since it was added
+      UPDATE users SET handle_lc = lower(handle)
+      WHERE is_current IS TRUE AND handle_lc IS NULL AND handle IS NOT NULL;
+    ''')
+
+    fill_search_dicts(connection)
+
+    connection.execute('''
+      CREATE INDEX user_words_idx ON user_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX user_handles_idx ON user_lexeme_dict(handle);
+      CREATE INDEX user_lexeme_dict_user_id_idx ON user_lexeme_dict(user_id);
+
+      CREATE INDEX track_words_idx ON track_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX track_user_name_idx ON track_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX tracks_user_handle_idx ON track_lexeme_dict(handle);
+      CREATE INDEX track_lexeme_dict_track_id_idx ON track_lexeme_dict(track_id);
+      CREATE INDEX track_lexeme_dict_owner_id_idx ON track_lexeme_dict(owner_id);
+
+      CREATE INDEX playlist_words_idx ON playlist_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX playlist_user_name_idx ON playlist_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX playlist_user_handle_idx ON playlist_lexeme_dict(handle);
+      CREATE INDEX playlist_lexeme_dict_playlist_id_idx ON playlist_lexeme_dict(playlist_id);
+      CREATE INDEX playlist_lexeme_dict_owner_id_idx ON playlist_lexeme_dict(owner_id);
+
+      CREATE INDEX album_words_idx ON album_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX album_user_name_idx ON album_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX album_user_handle_idx ON album_lexeme_dict(handle);
+      CREATE INDEX album_lexeme_dict_playlist_id_idx ON album_lexeme_dict(playlist_id);
+      CREATE INDEX album_lexeme_dict_owner_id_idx ON album_lexeme_dict(owner_id);
+
+      CREATE INDEX tag_track_user_tag_idx ON tag_track_user (tag);
+      CREATE UNIQUE INDEX tag_track_user_idx ON tag_track_user (tag, track_id, owner_id);
+      CREATE INDEX tag_track_user_track_id_idx ON tag_track_user (track_id);
+    ''')
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute('''
+      DROP TABLE IF EXISTS user_lexeme_dict;
+      DROP TABLE IF EXISTS track_lexeme_dict;
+      DROP TABLE IF EXISTS playlist_lexeme_dict;
+      DROP TABLE IF EXISTS album_lexeme_dict;
+      DROP TABLE IF EXISTS tag_track_user;
+      DROP INDEX IF EXISTS users_lower_name_idx;
+    ''')
+
+    for search_dict in search_dicts:
+        table = search_dict["table"]
+        if table == "tag_track_user":
+            connection.execute(f"CREATE MATERIALIZED VIEW {table} AS {get_search_dict_query(search_dict)}")
+        else:
+            connection.execute(
+                f"""
+                CREATE MATERIALIZED VIEW {table} AS
+                SELECT row_number() OVER (PARTITION BY true), * FROM ({get_search_dict_query(search_dict)}) AS words
+                """
+            )
+
+    connection.execute('''
+      CREATE INDEX user_words_idx ON user_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX user_handles_idx ON user_lexeme_dict(handle);
+      CREATE UNIQUE INDEX user_row_number_idx ON user_lexeme_dict(row_number);
+
+      CREATE INDEX track_words_idx ON track_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX track_user_name_idx ON track_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX tracks_user_handle_idx ON track_lexeme_dict(handle);
+      CREATE UNIQUE INDEX track_row_number_idx ON track_lexeme_dict(row_number);
+
+      CREATE INDEX playlist_words_idx ON playlist_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX playlist_user_name_idx ON playlist_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX playlist_user_handle_idx ON playlist_lexeme_dict(handle);
+      CREATE UNIQUE INDEX playlist_row_number_idx ON playlist_lexeme_dict(row_number);
+
+      CREATE INDEX album_words_idx ON album_lexeme_dict USING gin(word gin_trgm_ops);
+      CREATE INDEX album_user_name_idx ON album_lexeme_dict USING gin(user_name gin_trgm_ops);
+      CREATE INDEX album_user_handle_idx ON album_lexeme_dict(handle);
+      CREATE UNIQUE INDEX album_row_number_idx ON album_lexeme_dict(row_number);
+
+      CREATE INDEX tag_track_user_tag_idx ON tag_track_user (tag);
+      CREATE UNIQUE INDEX tag_track_user_idx ON tag_track_user (tag, track_id, owner_id);
+    ''')
@@ -0,0 +1,65 @@
+"""incremental-play-counts
+
+Revision ID: f6f1a8498ebb
+Revises: 6cf96b71cf3d
+Create Date: 2021-05-20 18:12:41.392651
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6f1a8498ebb'
+down_revision = '6cf96b71cf3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    # Replace the aggregate_plays materialized view with tables that the play indexers update
+    connection.execute('''
+      DROP MATERIALIZED VIEW IF EXISTS aggregate_plays;
+
+      CREATE TABLE aggregate_plays (
+        play_item_id integer NOT NULL PRIMARY KEY,
+        count integer NOT NULL
+      );
+
+      INSERT INTO aggregate_plays (play_item_id, count)
+      SELECT plays.play_item_id, count(*)
+      FROM plays
+      GROUP BY plays.play_item_id;
+
+      CREATE TABLE hourly_play_counts (
+        play_item_id integer NOT NULL,
+        hour_timestamp timestamp NOT NULL,
+        play_count integer NOT NULL,
+        PRIMARY KEY (play_item_id, hour_timestamp)
+      );
+
+      INSERT INTO hourly_play_counts (play_item_id, hour_timestamp, play_count)
+      SELECT plays.play_item_id, date_trunc('hour', plays.created_at), count(*)
+      FROM plays
+      GROUP BY plays.play_item_id, date_trunc('hour', plays.created_at);
+
+      CREATE INDEX ix_hourly_play_counts_hour_timestamp ON hourly_play_counts (hour_timestamp);
+    ''')
+
+
+def downgrade():
+    connection = op.get_bind()
+    connection.execute('''
+      DROP TABLE IF EXISTS hourly_play_counts;
+      DROP TABLE IF EXISTS aggregate_plays;
+
+      CREATE MATERIALIZED VIEW aggregate_plays as
+      SELECT
+        plays.play_item_id as play_item_id,
+        count(*) as count
+      FROM
+          plays
+      GROUP BY plays.play_item_id;
+
+      CREATE UNIQUE INDEX play_item_id_idx ON aggregate_plays (play_item_id);
+    ''')
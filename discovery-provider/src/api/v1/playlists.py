@@ -11,6 +11,7 @@ from src.api.v1.helpers import abort_not_found, decode_with_abort, extend_playli
 from .models.tracks import track
 from src.queries.search_queries import SearchKind, search
 from src.utils.redis_cache import cache, extract_key, use_redis_cache
+from src.queries.current_user_overlay import current_user_personalization
 from src.utils.redis_metrics import record_metrics
 from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory, DEFAULT_TRENDING_VERSIONS
 from src.trending_strategies.trending_type_and_version import TrendingType, TrendingVersion
@@ -214,7 +215,7 @@ class FullTrackFavorites(Resource):
         }
     )
     @full_ns.marshal_with(playlist_favorites_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=5, personalize=current_user_personalization)
     def get(self, playlist_id):
         args = playlist_favorites_route_parser.parse_args()
         decoded_id = decode_with_abort(playlist_id, full_ns)
@@ -254,7 +255,7 @@ class FullPlaylistReposts(Resource):
         }
     )
     @full_ns.marshal_with(playlist_reposts_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=5, personalize=current_user_personalization)
     def get(self, playlist_id):
         args = playlist_reposts_route_parser.parse_args()
         decoded_id = decode_with_abort(playlist_id, full_ns)
@@ -12,6 +12,7 @@ from src.api.v1.helpers import abort_not_found, decode_with_abort,  \
 from .models.tracks import track, track_full, stem_full, remixes_response as remixes_response_model
 from src.queries.search_queries import SearchKind, search
 from src.utils.redis_cache import cache, extract_key, use_redis_cache, get_trending_cache_key
+from src.queries.current_user_overlay import current_user_personalization
 from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory, DEFAULT_TRENDING_VERSIONS
 from src.trending_strategies.trending_type_and_version import TrendingType, TrendingVersion
 from flask.globals import request
@@ -110,7 +111,7 @@ full_track_parser.add_argument('user_id')
 class FullTrack(Resource):
     @record_metrics
     @full_ns.marshal_with(full_track_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=5, personalize=current_user_personalization)
     def get(self, track_id):
         args = full_track_parser.parse_args()
         decoded_id = decode_with_abort(track_id, full_ns)
@@ -434,7 +435,7 @@ class FullTrackFavorites(Resource):
         }
     )
     @full_ns.marshal_with(track_favorites_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=5, personalize=current_user_personalization)
     def get(self, track_id):
         args = track_favorites_route_parser.parse_args()
         decoded_id = decode_with_abort(track_id, full_ns)
@@ -477,7 +478,7 @@ class FullTrackReposts(Resource):
         }
     )
     @full_ns.marshal_with(track_reposts_response)
-    @cache(ttl_sec=5)
+    @cache(ttl_sec=5, personalize=current_user_personalization)
     def get(self, track_id):
         args = track_reposts_route_parser.parse_args()
         decoded_id = decode_with_abort(track_id, full_ns)
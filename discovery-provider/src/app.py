@@ -26,6 +26,10 @@ from src.utils.multi_provider import MultiProvider
 from src.utils.session_manager import SessionManager
 from src.utils.config import config_files, shared_config, ConfigIni
 from src.utils.ipfs_lib import IPFSClient
+from src.utils.metadata_cache import MetadataCache
+from src.utils.redis_constants import next_update_task_id_redis_key, indexed_block_hashes_redis_key
+from src.utils.eth_rpc_batch import BatchReceiptFetcher
+from src.utils.event_decoder import EventDecoder
 from src.tasks import celery_app
 from src.utils.redis_metrics import METRICS_INTERVAL, SYNCHRONIZE_METRICS_INTERVAL
 
@@ -313,8 +317,8 @@ def configure_celery(flask_app, celery, test_config=None):
                 database_url = test_config["db"]["url"]
 
     ipld_interval = int(shared_config["discprov"]["blacklist_block_indexing_interval"])
-    # default is 5 seconds
-    indexing_interval_sec = int(shared_config["discprov"]["block_processing_interval_sec"])
+    # update_discovery_provider reschedules itself, beat only restarts it if the chain of runs lapses
+    indexing_watchdog_interval_sec = int(shared_config["discprov"]["indexing_watchdog_interval_sec"])
 
     # Update celery configuration
     celery.conf.update(
@@ -329,7 +333,7 @@ def configure_celery(flask_app, celery, test_config=None):
         beat_schedule={
             "update_discovery_provider": {
                 "task": "update_discovery_provider",
-                "schedule": timedelta(seconds=indexing_interval_sec),
+                "schedule": timedelta(seconds=indexing_watchdog_interval_sec),
             },
             "update_ipld_blacklist": {
                 "task": "update_ipld_blacklist",
@@ -353,7 +357,7 @@ def configure_celery(flask_app, celery, test_config=None):
             },
             "update_materialized_views": {
                 "task": "update_materialized_views",
-                "schedule": timedelta(seconds=300)
+                "schedule": timedelta(seconds=5)
             },
             "update_network_peers": {
                 "task": "update_network_peers",
@@ -379,17 +383,9 @@ def configure_celery(flask_app, celery, test_config=None):
                 "task": "index_solana_plays",
                 "schedule": timedelta(seconds=5)
             },
-            "update_aggregate_user": {
-                "task": "update_aggregate_user",
-                "schedule": timedelta(seconds=30)
-            },
-            "update_aggregate_track": {
-                "task": "update_aggregate_track",
-                "schedule": timedelta(seconds=30)
-            },
-            "update_aggregate_playlist": {
-                "task": "update_aggregate_playlist",
-                "schedule": timedelta(seconds=30)
+            "reconcile_aggregates": {
+                "task": "reconcile_aggregates",
+                "schedule": timedelta(seconds=60)
             }
         },
         task_serializer="json",
@@ -402,9 +398,24 @@ def configure_celery(flask_app, celery, test_config=None):
     logger.info('Database instance initialized!')
     # Initialize IPFS client for celery task context
     ipfs_client = IPFSClient(
-        shared_config["ipfs"]["host"], shared_config["ipfs"]["port"]
+        shared_config["ipfs"]["host"],
+        shared_config["ipfs"]["port"],
+        metadata_cache=MetadataCache(
+            shared_config["ipfs"]["metadata_cache_path"],
+            lru_size=int(shared_config["ipfs"]["metadata_cache_lru_size"]),
+            max_disk_bytes=int(shared_config["ipfs"]["metadata_cache_max_bytes"])
+        )
     )
 
+    # Initialize batched receipt fetcher for the data chain web3 provider
+    receipt_fetcher = BatchReceiptFetcher(
+        web3endpoint,
+        max_batch_size=int(shared_config["discprov"]["tx_receipt_batch_size"])
+    )
+
+    # Initialize topic indexed event decoder from the data contract ABIs
+    event_decoder = EventDecoder(web3, abi_values)
+
     # Initialize Redis connection
     redis_inst = redis.Redis.from_url(url=redis_url)
     # Clear existing locks used in tasks if present
@@ -417,6 +428,12 @@ def configure_celery(flask_app, celery, test_config=None):
     redis_inst.delete("update_discovery_lock")
     redis_inst.delete("aggregate_metrics_lock")
     redis_inst.delete("synchronize_metrics_lock")
+    redis_inst.delete("reconcile_aggregates_lock")
+    # Let the first scheduled indexing run start a new chain of runs
+    redis_inst.delete(next_update_task_id_redis_key)
+    # The cached block hashes may not match the db, e.g. after a restore, so the cache is
+    # rebuilt from the blocks indexed after startup
+    redis_inst.delete(indexed_block_hashes_redis_key)
     logger.info('Redis instance initialized!')
 
     # Initialize custom task context with database object
@@ -430,6 +447,8 @@ def configure_celery(flask_app, celery, test_config=None):
             self._redis = redis_inst
             self._eth_web3_provider = eth_web3
             self._solana_client = solana_client
+            self._receipt_fetcher = receipt_fetcher
+            self._event_decoder = event_decoder
 
         @property
         def abi_values(self):
@@ -463,6 +482,14 @@ def configure_celery(flask_app, celery, test_config=None):
         def solana_client(self):
             return self._solana_client
 
+        @property
+        def receipt_fetcher(self):
+            return self._receipt_fetcher
+
+        @property
+        def event_decoder(self):
+            return self._event_decoder
+
     celery.autodiscover_tasks(["src.tasks"], "index", True)
 
     # Subclassing celery task with discovery provider context
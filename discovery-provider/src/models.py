@@ -466,6 +466,7 @@ signature={self.signature}\
 updated_at={self.updated_at}\
 created_at={self.created_at}>"
 
+# Running total of plays per track, maintained with the plays by update_play_counts
 class AggregatePlays(Base):
     __tablename__ = "aggregate_plays"
 
@@ -479,6 +480,22 @@ class AggregatePlays(Base):
 play_item_id={self.play_item_id},\
 count={self.count}>"
 
+# Plays per track per hour, maintained with the plays by update_play_counts
+class HourlyPlayCounts(Base):
+    __tablename__ = "hourly_play_counts"
+
+    play_item_id = Column(Integer, primary_key=True, nullable=False)
+    hour_timestamp = Column(DateTime, primary_key=True, nullable=False) # zeroed out to the hour
+    play_count = Column(Integer, nullable=False)
+
+    Index('ix_hourly_play_counts_hour_timestamp', 'hour_timestamp', unique=False)
+
+    def __repr__(self):
+        return f"<HourlyPlayCounts(\
+play_item_id={self.play_item_id},\
+hour_timestamp={self.hour_timestamp},\
+play_count={self.play_count}>"
+
 class RouteMetrics(Base):
     __tablename__ = "route_metrics"
 
@@ -720,6 +737,7 @@ class AppMetricsAllTime(Base):
 name={self.name},\
 count={self.count}>"
 
+# Track tags, kept up to date by the indexer with src.tasks.search_dicts
 class TagTrackUserMatview(Base):
     __tablename__ = "tag_track_user"
 
@@ -803,6 +821,7 @@ id={self.id},\
 user_id={self.user_id},\
 wallet={self.wallet})>"
 
+# Counts per user, maintained by the indexer with src.tasks.aggregate_counts
 class AggregateUser(Base):
     __tablename__ = "aggregate_user"
 
@@ -828,6 +847,7 @@ following_count={self.following_count},\
 repost_count={self.repost_count},\
 track_save_count={self.track_save_count}>"
 
+# Counts per track, maintained by the indexer with src.tasks.aggregate_counts
 class AggregateTrack(Base):
     __tablename__ = "aggregate_track"
 
@@ -843,6 +863,7 @@ track_id={self.track_id},\
 repost_count={self.repost_count},\
 save_count={self.save_count}>"
 
+# Counts per playlist, maintained by the indexer with src.tasks.aggregate_counts
 class AggregatePlaylist(Base):
     __tablename__ = "aggregate_playlist"
 
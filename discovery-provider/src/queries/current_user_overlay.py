@@ -0,0 +1,148 @@
+"""
+Splits API responses into a user independent payload that can be cached once for all users,
+and the current user specific fields that are overlaid onto it per request
+"""
+
+import copy
+import logging
+
+from src.models import RepostType, SaveType
+from src.queries import response_name_constants
+from src.queries.query_helpers import get_current_user_follow_metadata, get_current_user_track_metadata, \
+    get_current_user_playlist_metadata
+from src.queries.get_balances import enqueue_balance_refresh
+from src.api.v1.helpers import extend_repost, extend_favorite, decode_string_id
+from src.utils import redis_connection
+from src.utils.db_session import get_db_read_replica
+
+logger = logging.getLogger(__name__)
+
+# Followee reposts and saves are replaced wholesale, so they are not walked into
+followee_fields = {
+    response_name_constants.followee_reposts, response_name_constants.followee_saves, "followee_favorites"
+}
+
+
+def is_track(entity):
+    return "track_id" in entity and response_name_constants.has_current_user_reposted in entity
+
+
+def is_playlist(entity):
+    return "playlist_id" in entity and response_name_constants.has_current_user_reposted in entity
+
+
+def is_user(entity):
+    return "user_id" in entity and response_name_constants.does_current_user_follow in entity
+
+
+def find_entities(payload, tracks, playlists, users):
+    """Collects the tracks, playlists, and users with current user specific fields nested in payload"""
+    if isinstance(payload, list):
+        for item in payload:
+            find_entities(item, tracks, playlists, users)
+        return
+    if not isinstance(payload, dict):
+        return
+    if is_track(payload):
+        tracks.append(payload)
+    elif is_playlist(payload):
+        playlists.append(payload)
+    elif is_user(payload):
+        users.append(payload)
+    for key, value in payload.items():
+        if key not in followee_fields:
+            find_entities(value, tracks, playlists, users)
+
+
+def set_item_fields(item, has_reposted, has_saved, followee_reposts, followee_saves):
+    # Extended api entities carry an encoded "id" and encoded followee reposts and favorites
+    if "id" in item:
+        followee_reposts = list(map(extend_repost, followee_reposts))
+        followee_saves = list(map(extend_favorite, followee_saves))
+        item["followee_favorites"] = followee_saves
+    item[response_name_constants.followee_reposts] = followee_reposts
+    item[response_name_constants.followee_saves] = followee_saves
+    item[response_name_constants.has_current_user_reposted] = has_reposted
+    item[response_name_constants.has_current_user_saved] = has_saved
+
+
+def set_user_fields(user, does_follow, followee_follow_count):
+    user[response_name_constants.does_current_user_follow] = does_follow
+    user[response_name_constants.current_user_followee_follow_count] = followee_follow_count
+
+
+def strip_current_user_fields(payload):
+    """Returns a copy of payload with every current user specific field set to its logged out value"""
+    payload = copy.deepcopy(payload)
+    tracks, playlists, users = [], [], []
+    find_entities(payload, tracks, playlists, users)
+    for item in tracks + playlists:
+        set_item_fields(item, False, False, [], [])
+    for user in users:
+        set_user_fields(user, False, 0)
+    return payload
+
+
+def overlay_current_user_fields(payload, current_user_id):
+    """Sets the current user specific fields of the entities in a stripped payload, in place
+
+    Returns the payload, with the fields computed by a query per entity type for only the entities present.
+    """
+    tracks, playlists, users = [], [], []
+    find_entities(payload, tracks, playlists, users)
+    # Matches populate_user_metadata, which refreshes the balance of every requesting user
+    enqueue_balance_refresh(redis_connection.get_redis(), [current_user_id])
+    if not tracks and not playlists and not users:
+        return payload
+
+    db = get_db_read_replica()
+    with db.scoped_session() as session:
+        if tracks:
+            track_ids = list({track["track_id"] for track in tracks})
+            reposted, saved, followee_reposts, followee_saves = \
+                get_current_user_track_metadata(session, track_ids, current_user_id)
+            for track in tracks:
+                track_id = track["track_id"]
+                set_item_fields(
+                    track, reposted.get(track_id, False), saved.get(track_id, False),
+                    copy.deepcopy(followee_reposts.get(track_id, [])), copy.deepcopy(followee_saves.get(track_id, []))
+                )
+
+        if playlists:
+            playlist_ids = list({playlist["playlist_id"] for playlist in playlists})
+            reposted, saved, followee_reposts, followee_saves = get_current_user_playlist_metadata(
+                session, playlist_ids, [RepostType.playlist, RepostType.album],
+                [SaveType.playlist, SaveType.album], current_user_id
+            )
+            for playlist in playlists:
+                playlist_id = playlist["playlist_id"]
+                set_item_fields(
+                    playlist, reposted.get(playlist_id, False), saved.get(playlist_id, False),
+                    copy.deepcopy(followee_reposts.get(playlist_id, [])),
+                    copy.deepcopy(followee_saves.get(playlist_id, []))
+                )
+
+        if users:
+            user_ids = list({user["user_id"] for user in users})
+            followed, followee_follow_counts = get_current_user_follow_metadata(session, user_ids, current_user_id)
+            for user in users:
+                user_id = user["user_id"]
+                set_user_fields(user, followed.get(user_id, False), followee_follow_counts.get(user_id, 0))
+
+    return payload
+
+
+class CurrentUserPersonalization:
+    """Passed as `personalize` to the route cache so that logged in requests share the logged out cache entry"""
+
+    def get_user_id(self, encoded_user_id):
+        return decode_string_id(encoded_user_id) if encoded_user_id else None
+
+    def strip(self, payload):
+        return strip_current_user_fields(payload)
+
+    def overlay(self, payload, user_id):
+        return overlay_current_user_fields(payload, user_id)
+
+
+current_user_personalization = CurrentUserPersonalization()
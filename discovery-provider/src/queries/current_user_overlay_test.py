@@ -0,0 +1,52 @@
+from src.queries.current_user_overlay import strip_current_user_fields
+
+
+def test_strip_current_user_fields():
+    """Test that current user fields are reset on nested tracks, playlists and users without mutating the input"""
+    user = {
+        "user_id": 2,
+        "id": "ML51L",
+        "does_current_user_follow": True,
+        "current_user_followee_follow_count": 3
+    }
+    track = {
+        "track_id": 1,
+        "id": "7eP5n",
+        "user": user,
+        "has_current_user_reposted": True,
+        "has_current_user_saved": True,
+        "followee_reposts": [{"user_id": "ML51L", "repost_item_id": "7eP5n"}],
+        "followee_saves": [{"user_id": "ML51L", "save_item_id": 1}],
+        "followee_favorites": [{"user_id": "ML51L", "save_item_id": 1}]
+    }
+    playlist = {
+        "playlist_id": 3,
+        "has_current_user_reposted": False,
+        "has_current_user_saved": True,
+        "followee_reposts": [],
+        "followee_saves": [{"user_id": 2, "save_item_id": 3}],
+        "tracks": [track]
+    }
+    payload = {"data": [playlist]}
+
+    stripped = strip_current_user_fields(payload)
+
+    stripped_playlist = stripped["data"][0]
+    assert stripped_playlist["has_current_user_saved"] is False
+    assert stripped_playlist["followee_saves"] == []
+    assert "followee_favorites" not in stripped_playlist
+
+    stripped_track = stripped_playlist["tracks"][0]
+    assert stripped_track["has_current_user_reposted"] is False
+    assert stripped_track["has_current_user_saved"] is False
+    assert stripped_track["followee_reposts"] == []
+    assert stripped_track["followee_saves"] == []
+    assert stripped_track["followee_favorites"] == []
+
+    assert stripped_track["user"]["does_current_user_follow"] is False
+    assert stripped_track["user"]["current_user_followee_follow_count"] == 0
+
+    # The input payload is unchanged
+    assert track["has_current_user_reposted"] is True
+    assert user["does_current_user_follow"] is True
+    assert playlist["followee_saves"] == [{"user_id": 2, "save_item_id": 3}]
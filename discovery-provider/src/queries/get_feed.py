@@ -2,13 +2,14 @@ import datetime
 from sqlalchemy import func, desc, or_, and_
 
 from src import api_helpers
-from src.models import Track, Repost, RepostType, Follow, Playlist, SaveType
+from src.models import Track, Repost, RepostType, Playlist, SaveType
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 from src.queries import response_name_constants
 from src.queries.get_unpopulated_tracks import get_unpopulated_tracks
 from src.queries.query_helpers import get_current_user_id, populate_track_metadata, \
-    populate_playlist_metadata, get_pagination_vars, paginate_query, get_users_by_id, get_users_ids
+    populate_playlist_metadata, get_pagination_vars, paginate_query, get_users_by_id, get_users_ids, \
+    get_followee_user_ids, in_array
 
 
 trackDedupeMaxMinutes = 10
@@ -26,16 +27,7 @@ def get_feed(args):
     current_user_id = get_current_user_id()
     with db.scoped_session() as session:
         # Generate list of users followed by current user, i.e. 'followees'
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False
-            )
-            .all()
-        )
-        followee_user_ids = [f[0] for f in followee_user_ids]
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
         # Fetch followee creations if requested
         if feed_filter in ["original", "all"]:
@@ -47,7 +39,7 @@ def get_feed(args):
                         Playlist.is_current == True,
                         Playlist.is_delete == False,
                         Playlist.is_private == False,
-                        Playlist.playlist_owner_id.in_(followee_user_ids)
+                        in_array(Playlist.playlist_owner_id, followee_user_ids)
                     )
                     .order_by(desc(Playlist.created_at))
                 )
@@ -94,7 +86,7 @@ def get_feed(args):
                     Track.is_delete == False,
                     Track.is_unlisted == False,
                     Track.stem_of == None,
-                    Track.owner_id.in_(followee_user_ids),
+                    in_array(Track.owner_id, followee_user_ids),
                     Track.track_id.notin_(tracks_to_dedupe)
                 )
                 .order_by(desc(Track.created_at))
@@ -115,7 +107,7 @@ def get_feed(args):
                 .filter(
                     Repost.is_current == True,
                     Repost.is_delete == False,
-                    Repost.user_id.in_(followee_user_ids)
+                    in_array(Repost.user_id, followee_user_ids)
                 )
             )
             # exclude items also created by followees to guarantee order determinism, in case of "all" filter
@@ -49,17 +49,16 @@ def get_playlist_tracks(session, args):
                 track_id = track_id_dict['track']
                 track_ids_set.add(track_id)
 
-        playlist_tracks = (
+        playlist_tracks_query = (
             session
             .query(Track)
             .filter(
                 Track.is_current == True,
                 Track.track_id.in_(list(track_ids_set))
             )
-            .all()
         )
 
-        tracks = helpers.query_result_to_list(playlist_tracks)
+        tracks = helpers.model_query_to_list(playlist_tracks_query, Track)
 
         if args.get("populate_tracks"):
             current_user_id = args.get("current_user_id")
@@ -70,8 +70,7 @@ def get_playlists(args):
                 )
 
             playlist_query = playlist_query.order_by(desc(Playlist.created_at))
-            playlists = paginate_query(playlist_query).all()
-            playlists = helpers.query_result_to_list(playlists)
+            playlists = helpers.model_query_to_list(paginate_query(playlist_query), Playlist)
 
             # if we passed in a current_user_id, filter out all privte playlists where
             # the owner_id doesn't match the current_user_id
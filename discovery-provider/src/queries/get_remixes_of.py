@@ -117,8 +117,7 @@ def get_remixes_of(args):
             )
 
             (tracks, count) = add_query_pagination(base_query, limit, offset, True, True)
-            tracks = tracks.all()
-            tracks = helpers.query_result_to_list(tracks)
+            tracks = helpers.model_query_to_list(tracks, Track)
             track_ids = list(map(lambda track: track["track_id"], tracks))
             return (tracks, track_ids, count)
 
@@ -1,12 +1,12 @@
 from sqlalchemy import func, desc
 
 from src import exceptions
-from src.models import Track, Follow, Save
+from src.models import Track, Save
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 from src.queries import response_name_constants
 from src.queries.query_helpers import get_current_user_id, \
-    populate_track_metadata, get_users_by_id, get_users_ids
+    populate_track_metadata, get_users_by_id, get_users_ids, get_followee_user_ids, in_array
 
 
 def get_top_followee_saves(saveType, args):
@@ -20,16 +20,8 @@ def get_top_followee_saves(saveType, args):
     current_user_id = get_current_user_id()
     db = get_db_read_replica()
     with db.scoped_session() as session:
-        # Construct a subquery of all followees
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False
-            )
-        )
-        followee_user_ids_subquery = followee_user_ids.subquery()
+        # Get all followees
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
         # Construct a subquery of all saves from followees aggregated by id
         save_count = (
@@ -38,14 +30,11 @@ def get_top_followee_saves(saveType, args):
                 func.count(Save.save_item_id).label(
                     response_name_constants.save_count)
             )
-            .join(
-                followee_user_ids_subquery,
-                Save.user_id == followee_user_ids_subquery.c.followee_user_id
-            )
             .filter(
                 Save.is_current == True,
                 Save.is_delete == False,
                 Save.save_type == saveType,
+                in_array(Save.user_id, followee_user_ids),
             )
             .group_by(
                 Save.save_item_id
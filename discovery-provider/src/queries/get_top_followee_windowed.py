@@ -1,12 +1,12 @@
 from sqlalchemy import desc, text
 
 from src import exceptions
-from src.models import Track, Follow
+from src.models import Track
 from src.utils import helpers
 from src.utils.db_session import get_db_read_replica
 from src.queries.query_helpers import get_current_user_id, \
     populate_track_metadata, get_users_by_id, get_users_ids, \
-    create_save_repost_count_subquery
+    create_save_repost_count_subquery, get_followee_user_ids, in_array
 
 
 def get_top_followee_windowed(type, window, args):
@@ -29,25 +29,13 @@ def get_top_followee_windowed(type, window, args):
         # Construct a subquery to get the summed save + repost count for the `type`
         count_subquery = create_save_repost_count_subquery(session, type)
 
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False
-            )
-        )
-        followee_user_ids_subquery = followee_user_ids.subquery()
+        followee_user_ids = get_followee_user_ids(session, current_user_id)
 
         # Queries for tracks joined against followed users and counts
         tracks_query = (
             session.query(
                 Track,
             )
-            .join(
-                followee_user_ids_subquery,
-                Track.owner_id == followee_user_ids_subquery.c.followee_user_id
-            )
             .join(
                 count_subquery,
                 Track.track_id == count_subquery.c['id']
@@ -57,6 +45,7 @@ def get_top_followee_windowed(type, window, args):
                 Track.is_delete == False,
                 Track.is_unlisted == False,
                 Track.stem_of == None,
+                in_array(Track.owner_id, followee_user_ids),
                 # Query only tracks created `window` time ago (week, month, etc.)
                 Track.created_at >= text(
                     "NOW() - interval '1 {}'".format(window)),
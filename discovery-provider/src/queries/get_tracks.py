@@ -71,7 +71,7 @@ def _get_tracks(session, args):
             base_query = parse_sort_param(base_query, Track, whitelist_params)
 
     query_results = add_query_pagination(base_query, args["limit"], args["offset"])
-    tracks = helpers.query_result_to_list(query_results.all())
+    tracks = helpers.model_query_to_list(query_results, Track)
 
     return tracks
 
@@ -69,8 +69,7 @@ def get_tracks_including_unlisted(args):
 
             # Perform the query
             # TODO: pagination is broken with unlisted tracks
-            query_results = paginate_query(base_query).all()
-            tracks = helpers.query_result_to_list(query_results)
+            tracks = helpers.model_query_to_list(paginate_query(base_query), Track)
 
             # Mapping of track_id -> track object from request;
             # used to check route_id when iterating through identifiers
@@ -4,6 +4,7 @@ from src.queries.get_trending_tracks import get_trending_tracks, TRENDING_LIMIT,
 from src.api.v1.helpers import extend_track, format_offset, format_limit, \
     to_dict, decode_string_id
 from src.utils.redis_cache import use_redis_cache, get_trending_cache_key
+from src.queries.current_user_overlay import overlay_current_user_fields
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +32,18 @@ def get_trending(args, strategy):
 def get_full_trending(request, args, strategy):
     offset = format_offset(args)
     limit = format_limit(args, TRENDING_LIMIT)
-    key = get_trending_cache_key(to_dict(request.args), request.path)
-
-    # Attempt to use the cached tracks list
-    if args['user_id'] is not None:
-        full_trending = get_trending(args, strategy)
-    else:
-        full_trending = use_redis_cache(
-            key, TRENDING_TTL_SEC, lambda: get_trending(args, strategy))
+    request_items = to_dict(request.args)
+    request_items.pop('user_id', None)
+    key = get_trending_cache_key(request_items, request.path)
+
+    # Logged in requests use the cached logged out tracks list,
+    # and only overlay the current user's fields on the requested page
+    logged_out_args = dict(args, user_id=None)
+    full_trending = use_redis_cache(
+        key, TRENDING_TTL_SEC, lambda: get_trending(logged_out_args, strategy))
     trending_tracks = full_trending[offset: limit + offset]
+
+    current_user_id = decode_string_id(args['user_id']) if args['user_id'] is not None else None
+    if current_user_id:
+        overlay_current_user_fields(trending_tracks, current_user_id)
     return trending_tracks
@@ -13,6 +13,7 @@ from src.queries.query_helpers import get_repost_counts, get_karma, get_save_cou
 from src.queries import response_name_constants
 from src.queries.get_unpopulated_playlists import get_unpopulated_playlists
 from src.utils.redis_cache import use_redis_cache, get_trending_cache_key
+from src.queries.current_user_overlay import overlay_current_user_fields
 from src.trending_strategies.trending_strategy_factory import DEFAULT_TRENDING_VERSIONS
 from src.queries.get_playlist_tracks import get_playlist_tracks
 from src.api.v1.helpers import extend_playlist, extend_track, format_offset, format_limit, \
@@ -169,14 +170,13 @@ def make_get_unpopulated_playlists(session, time_range, strategy):
     """Gets scorable data, scores and sorts, then returns full unpopulated playlists.
        Returns a function, because this is used in a Redis cache hook"""
     def wrapped():
-        playlist_scoring_data = get_scorable_playlist_data(session, time_range, strategy)
+        playlist_scoring_data = list(get_scorable_playlist_data(session, time_range, strategy))
 
-        # score the playlists
-        scored_playlists = [strategy.get_track_score(time_range, playlist) for playlist in playlist_scoring_data]
-        sorted_playlists = sorted(scored_playlists, key=lambda k: k['score'], reverse=True)
+        # score and sort the playlists
+        _, top_indices = strategy.rank_tracks(time_range, playlist_scoring_data)
 
         # Get the unpopulated playlist metadata
-        playlist_ids = [playlist["playlist_id"] for playlist in sorted_playlists]
+        playlist_ids = [playlist_scoring_data[index]["playlist_id"] for index in top_indices]
         playlists = get_unpopulated_playlists(session, playlist_ids)
 
         playlist_tracks_map = get_playlist_tracks(session, {"playlists": playlists})
@@ -282,31 +282,20 @@ def get_full_trending_playlists(request, args, strategy):
     current_user_id, time = args.get("user_id"), args.get("time", "week")
     time = "week" if time not in ["week", "month", "year"] else time
 
-    # If we have a user_id, we call into `get_trending_playlist`
-    # which fetches the cached unpopulated tracks and then
-    # populates metadata. Otherwise, just
-    # retrieve the last cached value.
-    #
-    # If current_user_id,
-    # apply limit + offset inside the cached calculation.
-    # Otherwise, apply it here.
-    if current_user_id:
-        args = {
-            'time': time,
-            'with_tracks': True,
-            'limit': limit,
-            'offset': offset
-        }
-        decoded = decode_string_id(current_user_id)
-        args["current_user_id"] = decoded
-        playlists = get_trending_playlists(args, strategy)
-    else:
-        args = {
-            'time': time,
-            'with_tracks': True,
-        }
-        key = get_trending_cache_key(to_dict(request.args), request.path)
-        playlists = use_redis_cache(key, TRENDING_TTL_SEC, lambda: get_trending_playlists(args, strategy))
-        playlists = playlists[offset: limit + offset]
+    # Logged in requests use the cached logged out playlists list,
+    # and only overlay the current user's fields on the requested page
+    args = {
+        'time': time,
+        'with_tracks': True,
+    }
+    request_items = to_dict(request.args)
+    request_items.pop('user_id', None)
+    key = get_trending_cache_key(request_items, request.path)
+    playlists = use_redis_cache(key, TRENDING_TTL_SEC, lambda: get_trending_playlists(args, strategy))
+    playlists = playlists[offset: limit + offset]
+
+    decoded = decode_string_id(current_user_id) if current_user_id else None
+    if decoded:
+        overlay_current_user_fields(playlists, decoded)
 
     return playlists
@@ -3,7 +3,7 @@ from src.utils.db_session import get_db_read_replica
 from src.queries.get_unpopulated_tracks import get_unpopulated_tracks
 from src.queries.query_helpers import populate_track_metadata, \
     get_users_ids, get_users_by_id
-from src.tasks.generate_trending import generate_trending
+from src.tasks.generate_trending import generate_trending, get_trending_from_features
 from src.utils.redis_cache import use_redis_cache
 from src.trending_strategies.trending_strategy_factory import DEFAULT_TRENDING_VERSIONS
 
@@ -15,13 +15,18 @@ def make_trending_cache_key(time_range, genre, version=DEFAULT_TRENDING_VERSIONS
     version_name = f":{version.name}" if version != DEFAULT_TRENDING_VERSIONS[TrendingType.TRACKS] else ''
     return f"generated-trending{version_name}:{time_range}:{(genre.lower() if genre else '')}"
 
-def generate_unpopulated_trending(session, genre, time_range, strategy, limit=TRENDING_LIMIT):
-    trending_tracks = generate_trending(session, time_range, genre, limit, 0, strategy)
+def generate_unpopulated_trending(session, genre, time_range, strategy, limit=TRENDING_LIMIT, trending_features=None):
+    """Generates trending, derived from the time range's features in trending_features if given,
+       as returned by generate_trending_features with at least `limit` tracks per genre."""
+    if trending_features is None:
+        trending_tracks = generate_trending(session, time_range, genre, limit, 0, strategy)
+    else:
+        trending_tracks = get_trending_from_features(trending_features[time_range], genre, limit, strategy)
 
-    track_scores = [strategy.get_track_score(time_range, track) for track in trending_tracks['listen_counts']]
-    sorted_track_scores = sorted(track_scores, key=lambda k: k['score'], reverse=True)
+    listen_counts = trending_tracks['listen_counts']
+    _, top_indices = strategy.rank_tracks(time_range, listen_counts)
 
-    track_ids = [track['track_id'] for track in sorted_track_scores]
+    track_ids = [listen_counts[index]['track_id'] for index in top_indices]
 
     tracks = get_unpopulated_tracks(session, track_ids)
     return (tracks, track_ids)
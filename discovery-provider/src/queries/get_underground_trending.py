@@ -180,12 +180,10 @@ def make_get_unpopulated_tracks(session, redis_instance, strategy):
     def wrapped():
         # Score and sort
         track_scoring_data = get_scorable_track_data(session, redis_instance, strategy)
-        scored_tracks = [strategy.get_track_score('week', track) for track in track_scoring_data]
-        sorted_tracks = sorted(scored_tracks, key=lambda k: k['score'], reverse=True)
-        sorted_tracks = sorted_tracks[:UNDERGROUND_TRENDING_LENGTH]
+        _, top_indices = strategy.rank_tracks('week', track_scoring_data, UNDERGROUND_TRENDING_LENGTH)
 
         # Get unpopulated metadata
-        track_ids = [track["track_id"] for track in sorted_tracks]
+        track_ids = [track_scoring_data[index]["track_id"] for index in top_indices]
         tracks = get_unpopulated_tracks(session, track_ids)
         return (tracks, track_ids)
 
@@ -1,10 +1,8 @@
 import logging # pylint: disable=C0302
-import pickle
 
-from src.utils import redis_connection
 from src.models import Playlist
 from src.utils import helpers
-from src.utils.redis_cache import get_playlist_id_cache_key
+from src.utils.redis_cache import get_playlist_id_cache_key, get_cached_entities, set_cached_entities
 
 logger = logging.getLogger(__name__)
 
@@ -12,30 +10,16 @@ logger = logging.getLogger(__name__)
 ttl_sec = 5*60
 
 def get_cached_playlists(playlist_ids):
-    redis_playlist_id_keys = map(get_playlist_id_cache_key, playlist_ids)
-    redis = redis_connection.get_redis()
-    cached_values = redis.mget(redis_playlist_id_keys)
-
-    playlists = []
-    for val in cached_values:
-        if val is not None:
-            try:
-                playlist = pickle.loads(val)
-                playlists.append(playlist)
-            except Exception as e:
-                logger.warning(f"Unable to deserialize cached playlist: {e}")
-                playlists.append(None)
-        else:
-            playlists.append(None)
-    return playlists
+    redis_playlist_id_keys = list(map(get_playlist_id_cache_key, playlist_ids))
+    return get_cached_entities(redis_playlist_id_keys, "playlist")
 
 
 def set_playlists_in_cache(playlists):
-    redis = redis_connection.get_redis()
-    for playlist in playlists:
-        key = get_playlist_id_cache_key(playlist['playlist_id'])
-        serialized = pickle.dumps(playlist)
-        redis.set(key, serialized, ttl_sec)
+    set_cached_entities(
+        [(get_playlist_id_cache_key(playlist['playlist_id']), playlist) for playlist in playlists],
+        ttl_sec,
+        "playlist"
+    )
 
 
 def get_unpopulated_playlists(session, playlist_ids, filter_deleted=False):
@@ -76,8 +60,7 @@ def get_unpopulated_playlists(session, playlist_ids, filter_deleted=False):
     if filter_deleted:
         playlists_query = playlists_query.filter(Playlist.is_delete == False)
 
-    playlists = playlists_query.all()
-    playlists = helpers.query_result_to_list(playlists)
+    playlists = helpers.model_query_to_list(playlists_query, Playlist)
     queried_playlists = {playlist['playlist_id']: playlist for playlist in playlists}
 
     # cache playlists for future use
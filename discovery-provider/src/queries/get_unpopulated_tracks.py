@@ -1,10 +1,8 @@
 import logging # pylint: disable=C0302
-import pickle
 
-from src.utils import redis_connection
 from src.models import Track
 from src.utils import helpers
-from src.utils.redis_cache import get_track_id_cache_key
+from src.utils.redis_cache import get_track_id_cache_key, get_cached_entities, set_cached_entities
 
 logger = logging.getLogger(__name__)
 
@@ -12,30 +10,16 @@ logger = logging.getLogger(__name__)
 ttl_sec = 5*60
 
 def get_cached_tracks(track_ids):
-    redis_track_id_keys = map(get_track_id_cache_key, track_ids)
-    redis = redis_connection.get_redis()
-    cached_values = redis.mget(redis_track_id_keys)
-
-    tracks = []
-    for val in cached_values:
-        if val is not None:
-            try:
-                track = pickle.loads(val)
-                tracks.append(track)
-            except Exception as e:
-                logger.warning(f"Unable to deserialize cached track: {e} {val}")
-                tracks.append(None)
-        else:
-            tracks.append(None)
-    return tracks
+    redis_track_id_keys = list(map(get_track_id_cache_key, track_ids))
+    return get_cached_entities(redis_track_id_keys, "track")
 
 
 def set_tracks_in_cache(tracks):
-    redis = redis_connection.get_redis()
-    for track in tracks:
-        key = get_track_id_cache_key(track['track_id'])
-        serialized = pickle.dumps(track)
-        redis.set(key, serialized, ttl_sec)
+    set_cached_entities(
+        [(get_track_id_cache_key(track['track_id']), track) for track in tracks],
+        ttl_sec,
+        "track"
+    )
 
 
 def get_unpopulated_tracks(session, track_ids, filter_deleted=False, filter_unlisted=True):
@@ -82,8 +66,7 @@ def get_unpopulated_tracks(session, track_ids, filter_deleted=False, filter_unli
     if filter_deleted:
         tracks_query = tracks_query.filter(Track.is_delete == False)
 
-    tracks = tracks_query.all()
-    tracks = helpers.query_result_to_list(tracks)
+    tracks = helpers.model_query_to_list(tracks_query, Track)
     queried_tracks = {track['track_id']: track for track in tracks}
 
     # cache tracks for future use
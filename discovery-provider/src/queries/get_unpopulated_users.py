@@ -1,10 +1,8 @@
 import logging # pylint: disable=C0302
-import pickle
 
-from src.utils import redis_connection
 from src.models import User
 from src.utils import helpers
-from src.utils.redis_cache import get_user_id_cache_key
+from src.utils.redis_cache import get_user_id_cache_key, get_cached_entities, set_cached_entities
 
 logger = logging.getLogger(__name__)
 
@@ -12,30 +10,16 @@ logger = logging.getLogger(__name__)
 ttl_sec = 5*60
 
 def get_cached_users(user_ids):
-    redis_user_id_keys = map(get_user_id_cache_key, user_ids)
-    redis = redis_connection.get_redis()
-    cached_values = redis.mget(redis_user_id_keys)
-
-    users = []
-    for val in cached_values:
-        if val is not None:
-            try:
-                user = pickle.loads(val)
-                users.append(user)
-            except Exception as e:
-                logger.warning(f"Unable to deserialize cached user: {e}")
-                users.append(None)
-        else:
-            users.append(None)
-    return users
+    redis_user_id_keys = list(map(get_user_id_cache_key, user_ids))
+    return get_cached_entities(redis_user_id_keys, "user")
 
 
 def set_users_in_cache(users):
-    redis = redis_connection.get_redis()
-    for user in users:
-        key = get_user_id_cache_key(user['user_id'])
-        serialized = pickle.dumps(user)
-        redis.set(key, serialized, ttl_sec)
+    set_cached_entities(
+        [(get_user_id_cache_key(user['user_id']), user) for user in users],
+        ttl_sec,
+        "user"
+    )
 
 
 def get_unpopulated_users(session, user_ids):
@@ -63,14 +47,13 @@ def get_unpopulated_users(session, user_ids):
     user_ids_to_fetch = filter(
         lambda user_id: user_id not in cached_users, user_ids)
 
-    users = (
+    users_query = (
         session
         .query(User)
         .filter(User.is_current == True, User.wallet != None, User.handle != None)
         .filter(User.user_id.in_(user_ids_to_fetch))
-        .all()
     )
-    users = helpers.query_result_to_list(users)
+    users = helpers.model_query_to_list(users_query, User)
     queried_users = {user['user_id']: user for user in users}
 
     set_users_in_cache(users)
@@ -64,8 +64,7 @@ def get_users(args):
                 base_query = base_query.filter(
                     User.blocknumber >= args.get("min_block_number")
                 )
-            users = paginate_query(base_query).all()
-            users = helpers.query_result_to_list(users)
+            users = helpers.model_query_to_list(paginate_query(base_query), User)
 
             user_ids = list(map(lambda user: user["user_id"], users))
 
@@ -1,6 +1,7 @@
 # pylint: disable=too-many-lines
 import logging
-from sqlalchemy import func, desc, text, Integer, and_, bindparam
+from sqlalchemy import func, desc, text, Integer, and_, bindparam, any_, literal
+from sqlalchemy.dialects import postgresql
 
 from flask import request
 
@@ -11,6 +12,8 @@ from src.models import User, Track, Repost, RepostType, Follow, \
     AggregateUser, AggregateTrack, AggregatePlaylist
 from src.utils import helpers, redis_connection
 from src.queries.get_unpopulated_users import get_unpopulated_users
+from src.utils.redis_cache import get_or_set_cached_followee_ids
+from src.utils.concurrent_queries import run_queries
 from src.queries.get_balances import get_balances, enqueue_balance_refresh
 
 logger = logging.getLogger(__name__)
@@ -95,6 +98,28 @@ def parse_sort_param(base_query, model, whitelist_sort_params):
     return base_query.order_by(*order_bys)
 
 
+def in_array(column, values):
+    """Filters column to values, which are passed as a single array parameter rather than one parameter each"""
+    return column == any_(literal(values, postgresql.ARRAY(Integer)))
+
+
+def get_followee_user_ids(session, user_id):
+    """Returns the sorted ids of the users that user_id follows, from the redis followee set cache"""
+    def fetch_followee_user_ids():
+        followee_user_ids = (
+            session.query(Follow.followee_user_id)
+            .filter(
+                Follow.follower_user_id == user_id,
+                Follow.is_current == True,
+                Follow.is_delete == False
+            )
+            .all()
+        )
+        return [followee_user_id for (followee_user_id,) in followee_user_ids]
+
+    return get_or_set_cached_followee_ids(redis, user_id, fetch_followee_user_ids)
+
+
 # given list of user ids and corresponding users, populates each user object with:
 #   track_count, playlist_count, album_count, follower_count, followee_count, repost_count
 #   if current_user_id available, populates does_current_user_follow, followee_follows
@@ -103,22 +128,50 @@ def populate_user_metadata(session, user_ids, users, current_user_id, with_track
     if current_user_id:
         enqueue_balance_refresh(redis, [current_user_id])
 
-    aggregate_user = (
-        session.query(
-            AggregateUser.user_id,
-            AggregateUser.track_count,
-            AggregateUser.playlist_count,
-            AggregateUser.album_count,
-            AggregateUser.follower_count,
-            AggregateUser.following_count,
-            AggregateUser.repost_count,
-            AggregateUser.track_save_count
+    def query_aggregate_user(session):
+        return (
+            session.query(
+                AggregateUser.user_id,
+                AggregateUser.track_count,
+                AggregateUser.playlist_count,
+                AggregateUser.album_count,
+                AggregateUser.follower_count,
+                AggregateUser.following_count,
+                AggregateUser.repost_count,
+                AggregateUser.track_save_count
+            )
+            .filter(
+                AggregateUser.user_id.in_(user_ids)
+            )
+            .all()
         )
-        .filter(
-            AggregateUser.user_id.in_(user_ids)
+
+    def query_track_blocknumbers(session):
+        return (
+            session.query(
+                Track.owner_id,
+                func.max(Track.blocknumber)
+            )
+            .filter(
+                Track.is_current == True,
+                Track.is_delete == False,
+                Track.owner_id.in_(user_ids)
+            )
+            .group_by(Track.owner_id)
+            .all()
         )
-        .all()
-    )
+
+    # The independent queries run concurrently, with the balances in this thread
+    is_verified_ids_set = {user["user_id"] for user in users if user["is_verified"]}
+    query_funcs = [
+        lambda session: get_balances(session, redis, user_ids, is_verified_ids_set),
+        query_aggregate_user,
+        query_track_blocknumbers
+    ]
+    if current_user_id:
+        query_funcs.append(lambda session: get_current_user_follow_metadata(session, user_ids, current_user_id))
+    query_results = run_queries(session, query_funcs)
+    balance_dict, aggregate_user, track_blocknumbers = query_results[:3]
 
     # build dict of user id --> track/playlist/album/follower/followee/repost/track save counts
     count_dict = {
@@ -143,69 +196,13 @@ def populate_user_metadata(session, user_ids, users, current_user_id, with_track
     }
 
     # build dict of user id --> track blocknumber
-    track_blocknumbers = (
-        session.query(
-            Track.owner_id,
-            func.max(Track.blocknumber)
-        )
-        .filter(
-            Track.is_current == True,
-            Track.is_delete == False,
-            Track.owner_id.in_(user_ids)
-        )
-        .group_by(Track.owner_id)
-        .all()
-    )
     track_blocknumber_dict = {user_id: track_blocknumber for (
         user_id, track_blocknumber) in track_blocknumbers}
 
     current_user_followed_user_ids = {}
     current_user_followee_follow_count_dict = {}
     if current_user_id:
-        # does current user follow any of requested user ids
-        current_user_followed_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.followee_user_id.in_(user_ids),
-                Follow.follower_user_id == current_user_id
-            )
-            .all()
-        )
-        current_user_followed_user_ids = {
-            r[0]: True for r in current_user_followed_user_ids}
-
-        # build dict of user id --> followee follow count
-        current_user_followees = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id == current_user_id
-            )
-            .subquery()
-        )
-
-        current_user_followee_follow_counts = (
-            session.query(
-                Follow.followee_user_id,
-                func.count(Follow.followee_user_id)
-            )
-            .filter(
-                Follow.is_current == True,
-                Follow.is_delete == False,
-                Follow.follower_user_id.in_(current_user_followees),
-                Follow.followee_user_id.in_(user_ids)
-            )
-            .group_by(Follow.followee_user_id)
-            .all()
-        )
-        current_user_followee_follow_count_dict = {user_id: followee_follow_count for (
-            user_id, followee_follow_count) in current_user_followee_follow_counts}
-
-    is_verified_ids_set = {user["user_id"] for user in users if user["is_verified"]}
-    balance_dict = get_balances(session, redis, user_ids, is_verified_ids_set)
+        current_user_followed_user_ids, current_user_followee_follow_count_dict = query_results[3]
 
     for user in users:
         user_id = user["user_id"]
@@ -238,6 +235,36 @@ def populate_user_metadata(session, user_ids, users, current_user_id, with_track
     return users
 
 
+# given list of user ids, returns the current user specific user fields as
+#   {user id: does current user follow}, {user id: followee follow count}
+def get_current_user_follow_metadata(session, user_ids, current_user_id):
+    current_user_followees = get_followee_user_ids(session, current_user_id)
+
+    # does current user follow any of requested user ids
+    current_user_followee_set = set(current_user_followees)
+    current_user_followed_user_ids = {
+        user_id: True for user_id in user_ids if user_id in current_user_followee_set}
+
+    # build dict of user id --> followee follow count
+    current_user_followee_follow_counts = (
+        session.query(
+            Follow.followee_user_id,
+            func.count(Follow.followee_user_id)
+        )
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            in_array(Follow.follower_user_id, current_user_followees),
+            Follow.followee_user_id.in_(user_ids)
+        )
+        .group_by(Follow.followee_user_id)
+        .all()
+    )
+    current_user_followee_follow_count_dict = {user_id: followee_follow_count for (
+        user_id, followee_follow_count) in current_user_followee_follow_counts}
+    return current_user_followed_user_ids, current_user_followee_follow_count_dict
+
+
 def get_track_play_count_dict(session, track_ids):
     if not track_ids:
         return {}
@@ -260,17 +287,29 @@ def get_track_play_count_dict(session, track_ids):
 #   if current_user_id available, populates followee_reposts, has_current_user_reposted, has_current_user_saved
 def populate_track_metadata(session, track_ids, tracks, current_user_id):
     # build dict of track id --> repost count
-    counts = (
-        session.query(
-            AggregateTrack.track_id,
-            AggregateTrack.repost_count,
-            AggregateTrack.save_count
-        )
-        .filter(
-            AggregateTrack.track_id.in_(track_ids),
+    def query_counts(session):
+        return (
+            session.query(
+                AggregateTrack.track_id,
+                AggregateTrack.repost_count,
+                AggregateTrack.save_count
+            )
+            .filter(
+                AggregateTrack.track_id.in_(track_ids),
+            )
+            .all()
         )
-        .all()
-    )
+
+    # The independent queries run concurrently, with the remix metadata in this thread
+    query_funcs = [
+        lambda session: get_track_remix_metadata(session, tracks, current_user_id),
+        query_counts,
+        lambda session: get_track_play_count_dict(session, track_ids)
+    ]
+    if current_user_id:
+        query_funcs.extend(get_current_user_track_queries(session, track_ids, current_user_id))
+    query_results = run_queries(session, query_funcs)
+    remixes, counts, play_count_dict = query_results[:3]
 
     count_dict = {
         track_id: {
@@ -283,17 +322,59 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
         ) in counts
     }
 
-    play_count_dict = get_track_play_count_dict(session, track_ids)
-
-    remixes = get_track_remix_metadata(session, tracks, current_user_id)
-
     user_reposted_track_dict = {}
     user_saved_track_dict = {}
     followee_track_repost_dict = {}
     followee_track_save_dict = {}
     if current_user_id:
-        # has current user reposted any of requested track ids
-        user_reposted = (
+        user_reposted_track_dict, user_saved_track_dict, followee_track_repost_dict, followee_track_save_dict = \
+            build_current_user_track_metadata(*query_results[3:])
+
+    for track in tracks:
+        track_id = track["track_id"]
+        track[response_name_constants.repost_count] = count_dict.get(
+            track_id, {}).get(response_name_constants.repost_count, 0)
+        track[response_name_constants.save_count] = count_dict.get(
+            track_id, {}).get(response_name_constants.save_count, 0)
+        track[response_name_constants.play_count] = play_count_dict.get(
+            track_id, 0)
+        # current user specific
+        track[response_name_constants.followee_reposts] = followee_track_repost_dict.get(
+            track_id, [])
+        track[response_name_constants.followee_saves] = followee_track_save_dict.get(
+            track_id, [])
+        track[response_name_constants.has_current_user_reposted] = user_reposted_track_dict.get(
+            track_id, False)
+        track[response_name_constants.has_current_user_saved] = user_saved_track_dict.get(
+            track['track_id'], False)
+
+        # Populate the remix_of tracks w/ the parent track's user and if that user saved/reposted the child
+        if response_name_constants.remix_of in track and \
+            type(track[response_name_constants.remix_of]) is dict and \
+                track["track_id"] in remixes:
+            remix_tracks = track[response_name_constants.remix_of].get(
+                "tracks")
+            if remix_tracks and type(remix_tracks) is list:
+                for remix_track in remix_tracks:
+                    parent_track_id = remix_track.get("parent_track_id")
+                    if parent_track_id in remixes[track["track_id"]]:
+                        remix_track.update(
+                            remixes[track["track_id"]][parent_track_id])
+        else:
+            track[response_name_constants.remix_of] = None
+
+    return tracks
+
+
+# given list of track ids, returns the queries for the current user specific track fields
+# as functions of a session, for build_current_user_track_metadata
+def get_current_user_track_queries(session, track_ids, current_user_id):
+    # Get current user's followees.
+    followees = get_followee_user_ids(session, current_user_id)
+
+    # has current user reposted any of requested track ids
+    def query_user_reposted(session):
+        return (
             session.query(
                 Repost.repost_item_id
             )
@@ -306,11 +387,10 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
             )
             .all()
         )
-        user_reposted_track_dict = {
-            repost[0]: True for repost in user_reposted}
 
-        # has current user saved any of requested track ids
-        user_saved_tracks_query = (
+    # has current user saved any of requested track ids
+    def query_user_saved(session):
+        return (
             session.query(Save.save_item_id)
             .filter(
                 Save.is_current == True,
@@ -321,91 +401,67 @@ def populate_track_metadata(session, track_ids, tracks, current_user_id):
             )
             .all()
         )
-        user_saved_track_dict = {
-            save[0]: True for save in user_saved_tracks_query}
 
-        # Get current user's followees.
-        followees = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False
-            )
-        )
-
-        # build dict of track id --> followee reposts
-        followee_track_reposts = (
+    def query_followee_reposts(session):
+        return helpers.query_result_to_list(
             session.query(Repost)
             .filter(
                 Repost.is_current == True,
                 Repost.is_delete == False,
                 Repost.repost_item_id.in_(track_ids),
                 Repost.repost_type == RepostType.track,
-                Repost.user_id.in_(followees)
+                in_array(Repost.user_id, followees)
             )
+            .all()
         )
-        followee_track_reposts = helpers.query_result_to_list(
-            followee_track_reposts)
-        for track_repost in followee_track_reposts:
-            if track_repost["repost_item_id"] not in followee_track_repost_dict:
-                followee_track_repost_dict[track_repost["repost_item_id"]] = []
-            followee_track_repost_dict[track_repost["repost_item_id"]].append(
-                track_repost)
-
-        # Build dict of track id --> followee saves.
-        followee_track_saves = (
+
+    def query_followee_saves(session):
+        return helpers.query_result_to_list(
             session.query(Save)
             .filter(
                 Save.is_current == True,
                 Save.is_delete == False,
                 Save.save_item_id.in_(track_ids),
                 Save.save_type == SaveType.track,
-                Save.user_id.in_(followees)
+                in_array(Save.user_id, followees)
             )
+            .all()
         )
-        followee_track_saves = helpers.query_result_to_list(
-            followee_track_saves)
-        for track_save in followee_track_saves:
-            if track_save["save_item_id"] not in followee_track_save_dict:
-                followee_track_save_dict[track_save["save_item_id"]] = []
-            followee_track_save_dict[track_save["save_item_id"]].append(
-                track_save)
 
-    for track in tracks:
-        track_id = track["track_id"]
-        track[response_name_constants.repost_count] = count_dict.get(
-            track_id, {}).get(response_name_constants.repost_count, 0)
-        track[response_name_constants.save_count] = count_dict.get(
-            track_id, {}).get(response_name_constants.save_count, 0)
-        track[response_name_constants.play_count] = play_count_dict.get(
-            track_id, 0)
-        # current user specific
-        track[response_name_constants.followee_reposts] = followee_track_repost_dict.get(
-            track_id, [])
-        track[response_name_constants.followee_saves] = followee_track_save_dict.get(
-            track_id, [])
-        track[response_name_constants.has_current_user_reposted] = user_reposted_track_dict.get(
-            track_id, False)
-        track[response_name_constants.has_current_user_saved] = user_saved_track_dict.get(
-            track['track_id'], False)
+    return [query_user_reposted, query_user_saved, query_followee_reposts, query_followee_saves]
 
-        # Populate the remix_of tracks w/ the parent track's user and if that user saved/reposted the child
-        if response_name_constants.remix_of in track and \
-            type(track[response_name_constants.remix_of]) is dict and \
-                track["track_id"] in remixes:
-            remix_tracks = track[response_name_constants.remix_of].get(
-                "tracks")
-            if remix_tracks and type(remix_tracks) is list:
-                for remix_track in remix_tracks:
-                    parent_track_id = remix_track.get("parent_track_id")
-                    if parent_track_id in remixes[track["track_id"]]:
-                        remix_track.update(
-                            remixes[track["track_id"]][parent_track_id])
-        else:
-            track[response_name_constants.remix_of] = None
 
-    return tracks
+# given the results of get_current_user_track_queries, returns the current user specific track fields as
+#   {track id: has reposted}, {track id: has saved}, {track id: followee reposts}, {track id: followee saves}
+def build_current_user_track_metadata(user_reposted, user_saved_tracks_query, followee_track_reposts,
+                                      followee_track_saves):
+    user_reposted_track_dict = {
+        repost[0]: True for repost in user_reposted}
+    user_saved_track_dict = {
+        save[0]: True for save in user_saved_tracks_query}
+
+    # build dict of track id --> followee reposts
+    followee_track_repost_dict = {}
+    for track_repost in followee_track_reposts:
+        if track_repost["repost_item_id"] not in followee_track_repost_dict:
+            followee_track_repost_dict[track_repost["repost_item_id"]] = []
+        followee_track_repost_dict[track_repost["repost_item_id"]].append(
+            track_repost)
+
+    # Build dict of track id --> followee saves.
+    followee_track_save_dict = {}
+    for track_save in followee_track_saves:
+        if track_save["save_item_id"] not in followee_track_save_dict:
+            followee_track_save_dict[track_save["save_item_id"]] = []
+        followee_track_save_dict[track_save["save_item_id"]].append(
+            track_save)
+    return user_reposted_track_dict, user_saved_track_dict, followee_track_repost_dict, followee_track_save_dict
+
+
+def get_current_user_track_metadata(session, track_ids, current_user_id):
+    return build_current_user_track_metadata(
+        *run_queries(session, get_current_user_track_queries(session, track_ids, current_user_id))
+    )
 
 
 def get_track_remix_metadata(session, tracks, current_user_id):
@@ -537,17 +593,33 @@ def get_track_remix_metadata(session, tracks, current_user_id):
 
 def populate_playlist_metadata(session, playlist_ids, playlists, repost_types, save_types, current_user_id):
     # build dict of playlist id --> repost & save count
-    counts = (
-        session.query(
-            AggregatePlaylist.playlist_id,
-            AggregatePlaylist.repost_count,
-            AggregatePlaylist.save_count
-        )
-        .filter(
-            AggregatePlaylist.playlist_id.in_(playlist_ids),
+    def query_counts(session):
+        return (
+            session.query(
+                AggregatePlaylist.playlist_id,
+                AggregatePlaylist.repost_count,
+                AggregatePlaylist.save_count
+            )
+            .filter(
+                AggregatePlaylist.playlist_id.in_(playlist_ids),
+            )
+            .all()
         )
-        .all()
-    )
+
+    track_ids = []
+    for playlist in playlists:
+        for track in playlist['playlist_contents']['track_ids']:
+            track_ids.append(track['track'])
+
+    query_funcs = [
+        query_counts,
+        lambda session: get_track_play_count_dict(session, track_ids)
+    ]
+    if current_user_id:
+        query_funcs.extend(get_current_user_playlist_queries(
+            session, playlist_ids, repost_types, save_types, current_user_id))
+    query_results = run_queries(session, query_funcs)
+    counts, play_count_dict = query_results[:2]
 
     count_dict = {
         playlist_id: {
@@ -565,8 +637,42 @@ def populate_playlist_metadata(session, playlist_ids, playlists, repost_types, s
     followee_playlist_repost_dict = {}
     followee_playlist_save_dict = {}
     if current_user_id:
-        # has current user reposted any of requested playlist ids
-        current_user_playlist_reposts = (
+        user_reposted_playlist_dict, user_saved_playlist_dict, followee_playlist_repost_dict, \
+            followee_playlist_save_dict = build_current_user_playlist_metadata(*query_results[2:])
+
+    for playlist in playlists:
+        playlist_id = playlist["playlist_id"]
+        playlist[response_name_constants.repost_count] = count_dict.get(
+            playlist_id, {}).get(response_name_constants.repost_count, 0)
+        playlist[response_name_constants.save_count] = count_dict.get(
+            playlist_id, {}).get(response_name_constants.save_count, 0)
+
+        total_play_count = 0
+        for track in playlist['playlist_contents']['track_ids']:
+            total_play_count += play_count_dict.get(track['track'], 0)
+        playlist[response_name_constants.total_play_count] = total_play_count
+
+        # current user specific
+        playlist[response_name_constants.followee_reposts] = followee_playlist_repost_dict.get(
+            playlist_id, [])
+        playlist[response_name_constants.followee_saves] = followee_playlist_save_dict.get(
+            playlist_id, [])
+        playlist[response_name_constants.has_current_user_reposted] = \
+            user_reposted_playlist_dict.get(playlist_id, False)
+        playlist[response_name_constants.has_current_user_saved] = user_saved_playlist_dict.get(
+            playlist_id, False)
+
+    return playlists
+
+# given list of playlist ids, returns the queries for the current user specific playlist fields
+# as functions of a session, for build_current_user_playlist_metadata
+def get_current_user_playlist_queries(session, playlist_ids, repost_types, save_types, current_user_id):
+    # Get current user's followees.
+    followee_user_ids = get_followee_user_ids(session, current_user_id)
+
+    # has current user reposted any of requested playlist ids
+    def query_user_reposted(session):
+        return (
             session.query(Repost.repost_item_id)
             .filter(
                 Repost.is_current == True,
@@ -577,11 +683,10 @@ def populate_playlist_metadata(session, playlist_ids, playlists, repost_types, s
             )
             .all()
         )
-        user_reposted_playlist_dict = {
-            r[0]: True for r in current_user_playlist_reposts}
 
-        # has current user saved any of requested playlist ids
-        user_saved_playlists_query = (
+    # has current user saved any of requested playlist ids
+    def query_user_saved(session):
+        return (
             session.query(Save.save_item_id)
             .filter(
                 Save.is_current == True,
@@ -592,90 +697,73 @@ def populate_playlist_metadata(session, playlist_ids, playlists, repost_types, s
             )
             .all()
         )
-        user_saved_playlist_dict = {
-            save[0]: True for save in user_saved_playlists_query}
-
-        # Get current user's followees.
-        followee_user_ids = (
-            session.query(Follow.followee_user_id)
-            .filter(
-                Follow.follower_user_id == current_user_id,
-                Follow.is_current == True,
-                Follow.is_delete == False
-            )
-            .all()
-        )
 
-        # Build dict of playlist id --> followee reposts.
-        followee_playlist_reposts = (
+    def query_followee_reposts(session):
+        return helpers.query_result_to_list(
             session.query(Repost)
             .filter(
                 Repost.is_current == True,
                 Repost.is_delete == False,
                 Repost.repost_item_id.in_(playlist_ids),
                 Repost.repost_type.in_(repost_types),
-                Repost.user_id.in_(followee_user_ids)
+                in_array(Repost.user_id, followee_user_ids)
             )
             .all()
         )
-        followee_playlist_reposts = helpers.query_result_to_list(
-            followee_playlist_reposts)
-        for playlist_repost in followee_playlist_reposts:
-            if playlist_repost["repost_item_id"] not in followee_playlist_repost_dict:
-                followee_playlist_repost_dict[playlist_repost["repost_item_id"]] = [
-                ]
-            followee_playlist_repost_dict[playlist_repost["repost_item_id"]].append(
-                playlist_repost)
-
-        # Build dict of playlist id --> followee saves.
-        followee_playlist_saves = (
+
+    def query_followee_saves(session):
+        return helpers.query_result_to_list(
             session.query(Save)
             .filter(
                 Save.is_current == True,
                 Save.is_delete == False,
                 Save.save_item_id.in_(playlist_ids),
                 Save.save_type.in_(save_types),
-                Save.user_id.in_(followee_user_ids)
+                in_array(Save.user_id, followee_user_ids)
             )
             .all()
         )
-        followee_playlist_saves = helpers.query_result_to_list(
-            followee_playlist_saves)
-        for playlist_save in followee_playlist_saves:
-            if playlist_save["save_item_id"] not in followee_playlist_save_dict:
-                followee_playlist_save_dict[playlist_save["save_item_id"]] = []
-            followee_playlist_save_dict[playlist_save["save_item_id"]].append(
-                playlist_save)
 
-    track_ids = []
-    for playlist in playlists:
-        for track in playlist['playlist_contents']['track_ids']:
-            track_ids.append(track['track'])
-    play_count_dict = get_track_play_count_dict(session, track_ids)
+    return [query_user_reposted, query_user_saved, query_followee_reposts, query_followee_saves]
 
-    for playlist in playlists:
-        playlist_id = playlist["playlist_id"]
-        playlist[response_name_constants.repost_count] = count_dict.get(
-            playlist_id, {}).get(response_name_constants.repost_count, 0)
-        playlist[response_name_constants.save_count] = count_dict.get(
-            playlist_id, {}).get(response_name_constants.save_count, 0)
 
-        total_play_count = 0
-        for track in playlist['playlist_contents']['track_ids']:
-            total_play_count += play_count_dict.get(track['track'], 0)
-        playlist[response_name_constants.total_play_count] = total_play_count
+# given the results of get_current_user_playlist_queries, returns the current user specific playlist fields as
+#   {playlist id: has reposted}, {playlist id: has saved}, {playlist id: followee reposts},
+#   {playlist id: followee saves}
+def build_current_user_playlist_metadata(current_user_playlist_reposts, user_saved_playlists_query,
+                                         followee_playlist_reposts, followee_playlist_saves):
+    user_reposted_playlist_dict = {
+        r[0]: True for r in current_user_playlist_reposts}
+    user_saved_playlist_dict = {
+        save[0]: True for save in user_saved_playlists_query}
 
-        # current user specific
-        playlist[response_name_constants.followee_reposts] = followee_playlist_repost_dict.get(
-            playlist_id, [])
-        playlist[response_name_constants.followee_saves] = followee_playlist_save_dict.get(
-            playlist_id, [])
-        playlist[response_name_constants.has_current_user_reposted] = \
-            user_reposted_playlist_dict.get(playlist_id, False)
-        playlist[response_name_constants.has_current_user_saved] = user_saved_playlist_dict.get(
-            playlist_id, False)
+    # Build dict of playlist id --> followee reposts.
+    followee_playlist_repost_dict = {}
+    for playlist_repost in followee_playlist_reposts:
+        if playlist_repost["repost_item_id"] not in followee_playlist_repost_dict:
+            followee_playlist_repost_dict[playlist_repost["repost_item_id"]] = [
+            ]
+        followee_playlist_repost_dict[playlist_repost["repost_item_id"]].append(
+            playlist_repost)
+
+    # Build dict of playlist id --> followee saves.
+    followee_playlist_save_dict = {}
+    for playlist_save in followee_playlist_saves:
+        if playlist_save["save_item_id"] not in followee_playlist_save_dict:
+            followee_playlist_save_dict[playlist_save["save_item_id"]] = []
+        followee_playlist_save_dict[playlist_save["save_item_id"]].append(
+            playlist_save)
+    return user_reposted_playlist_dict, user_saved_playlist_dict, followee_playlist_repost_dict, \
+        followee_playlist_save_dict
+
+
+# given list of playlist ids, returns the current user specific playlist fields as
+#   {playlist id: has reposted}, {playlist id: has saved}, {playlist id: followee reposts},
+#   {playlist id: followee saves}
+def get_current_user_playlist_metadata(session, playlist_ids, repost_types, save_types, current_user_id):
+    return build_current_user_playlist_metadata(*run_queries(session, get_current_user_playlist_queries(
+        session, playlist_ids, repost_types, save_types, current_user_id)))
 
-    return playlists
 
 def get_repost_counts_query(
         session,
@@ -1174,23 +1262,13 @@ def create_followee_playlists_subquery(session, current_user_id):
         current_user_id: The current user id to query against
     """
     # Get active followees
-    followee_user_ids_subquery = (
-        session.query(Follow.followee_user_id)
-        .filter(
-            Follow.follower_user_id == current_user_id,
-            Follow.is_current == True,
-            Follow.is_delete == False
-        )
-        .subquery()
-    )
+    followee_user_ids = get_followee_user_ids(session, current_user_id)
     followee_playlists_subquery = (
         session.query(
             Playlist
         )
-        .select_from(Playlist)
-        .join(
-            followee_user_ids_subquery,
-            Playlist.playlist_owner_id == followee_user_ids_subquery.c.followee_user_id
+        .filter(
+            in_array(Playlist.playlist_owner_id, followee_user_ids)
         )
         .subquery()
     )
@@ -0,0 +1,312 @@
+import logging
+from collections import Counter, defaultdict
+from sqlalchemy import and_, update
+from src.models import Follow, Playlist, Repost, RepostType, Save, SaveType, Track, User
+
+logger = logging.getLogger(__name__)
+
+# Names of the aggregate tables maintained by the indexer
+AGGREGATE_USER = 'aggregate_user'
+AGGREGATE_TRACK = 'aggregate_track'
+AGGREGATE_PLAYLIST = 'aggregate_playlist'
+
+# Counts of the content owned by a user, as correlated subqueries on the user id {user_id}
+user_track_count_sql = """
+    (SELECT count(*) FROM tracks t
+    WHERE t.owner_id = {user_id} AND t.is_current IS TRUE AND t.is_delete IS FALSE
+    AND t.is_unlisted IS FALSE AND t.stem_of IS NULL)
+"""
+user_playlist_count_sql = """
+    (SELECT count(*) FROM playlists p
+    WHERE p.playlist_owner_id = {user_id} AND p.is_album IS {is_album} AND p.is_current IS TRUE
+    AND p.is_delete IS FALSE AND p.is_private IS FALSE)
+"""
+
+# Expected rows of each aggregate table for the entities matching {id_filter}, a condition on the entity id {id}.
+# The counts match the aggregate materialized views these tables replace.
+aggregate_tables = {
+    AGGREGATE_USER: {
+        "entity_table": "users",
+        "id_column": "user_id",
+        "columns": [
+            "track_count", "playlist_count", "album_count", "follower_count",
+            "following_count", "repost_count", "track_save_count"
+        ],
+        "query": f"""
+            SELECT DISTINCT
+                u.user_id,
+                {user_track_count_sql.format(user_id="u.user_id")} AS track_count,
+                {user_playlist_count_sql.format(user_id="u.user_id", is_album="FALSE")} AS playlist_count,
+                {user_playlist_count_sql.format(user_id="u.user_id", is_album="TRUE")} AS album_count,
+                (SELECT count(*) FROM follows f
+                WHERE f.followee_user_id = u.user_id AND f.is_current IS TRUE AND f.is_delete IS FALSE)
+                AS follower_count,
+                (SELECT count(*) FROM follows f
+                WHERE f.follower_user_id = u.user_id AND f.is_current IS TRUE AND f.is_delete IS FALSE)
+                AS following_count,
+                (SELECT count(*) FROM reposts r
+                WHERE r.user_id = u.user_id AND r.is_current IS TRUE AND r.is_delete IS FALSE)
+                AS repost_count,
+                (SELECT count(*) FROM saves s
+                WHERE s.user_id = u.user_id AND s.save_type = 'track' AND s.is_current IS TRUE
+                AND s.is_delete IS FALSE)
+                AS track_save_count
+            FROM users u
+            WHERE u.is_current IS TRUE AND {{id_filter}}
+        """,
+        "entity_id": "u.user_id"
+    },
+    AGGREGATE_TRACK: {
+        "entity_table": "tracks",
+        "id_column": "track_id",
+        "columns": ["repost_count", "save_count"],
+        "query": """
+            SELECT DISTINCT
+                t.track_id,
+                (SELECT count(*) FROM reposts r
+                WHERE r.repost_item_id = t.track_id AND r.repost_type = 'track' AND r.is_current IS TRUE
+                AND r.is_delete IS FALSE)
+                AS repost_count,
+                (SELECT count(*) FROM saves s
+                WHERE s.save_item_id = t.track_id AND s.save_type = 'track' AND s.is_current IS TRUE
+                AND s.is_delete IS FALSE)
+                AS save_count
+            FROM tracks t
+            WHERE t.is_current IS TRUE AND t.is_delete IS FALSE AND {id_filter}
+        """,
+        "entity_id": "t.track_id"
+    },
+    AGGREGATE_PLAYLIST: {
+        "entity_table": "playlists",
+        "id_column": "playlist_id",
+        "columns": ["is_album", "repost_count", "save_count"],
+        "query": """
+            SELECT DISTINCT
+                p.playlist_id,
+                p.is_album,
+                (SELECT count(*) FROM reposts r
+                WHERE r.repost_item_id = p.playlist_id AND r.repost_type IN ('playlist', 'album')
+                AND r.is_current IS TRUE AND r.is_delete IS FALSE)
+                AS repost_count,
+                (SELECT count(*) FROM saves s
+                WHERE s.save_item_id = p.playlist_id AND s.save_type IN ('playlist', 'album')
+                AND s.is_current IS TRUE AND s.is_delete IS FALSE)
+                AS save_count
+            FROM playlists p
+            WHERE p.is_current IS TRUE AND p.is_delete IS FALSE AND {id_filter}
+        """,
+        "entity_id": "p.playlist_id"
+    }
+}
+
+
+def get_aggregate_query(table, id_filter="TRUE"):
+    """Returns the query for the expected rows of the aggregate table for the entities matching id_filter"""
+    aggregate = aggregate_tables[table]
+    return aggregate["query"].format(id_filter=id_filter.format(id=aggregate["entity_id"]))
+
+
+def reconcile_aggregate_rows(session, table, id_filter="TRUE", params=None, missing_only=False, skip_locked=False):
+    """Recomputes the rows of the aggregate table for the entity ids matching id_filter, a SQL condition
+    on {id}, and fixes the stored rows that differ. With missing_only, only inserts the rows that don't exist yet.
+
+    The indexer updates aggregate rows over many statements in one transaction, so the order it locks rows in
+    can't be controlled. Reconciling outside of the indexer uses skip_locked, which leaves out the rows locked by
+    other transactions instead of waiting on them, so that the two can't deadlock.
+
+    Returns the ids of the rows inserted, updated or deleted, and the ids of the rows skipped with skip_locked.
+    """
+    aggregate = aggregate_tables[table]
+    id_column = aggregate["id_column"]
+    columns = aggregate["columns"]
+    stored_id_filter = id_filter.format(id=f"{table}.{id_column}")
+    skipped_ids = []
+
+    # the counts of new rows are read from the entity tables, so write the pending changes first
+    session.flush()
+    if missing_only:
+        expected_id_filter = (
+            f"({id_filter}) AND NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.{id_column} = {{id}})"
+        )
+        conflict_action = "NOTHING"
+        delete_filter = "FALSE"
+    else:
+        expected_id_filter = id_filter
+        conflict_action = (
+            f"UPDATE SET {', '.join(f'{column} = EXCLUDED.{column}' for column in columns)} "
+            f"WHERE ({', '.join(f'{table}.{column}' for column in columns)}) "
+            f"IS DISTINCT FROM ({', '.join(f'EXCLUDED.{column}' for column in columns)})"
+        )
+        delete_filter = stored_id_filter
+        # lock the stored rows, so counts updated by a concurrent indexer transaction are
+        # recomputed once it commits instead of being overwritten
+        if skip_locked:
+            rows = session.execute(
+                f"""
+                WITH locked AS (
+                    SELECT {id_column} FROM {table} WHERE {stored_id_filter}
+                    ORDER BY {id_column} FOR UPDATE SKIP LOCKED
+                )
+                SELECT {id_column}, {id_column} IN (SELECT {id_column} FROM locked)
+                FROM {table} WHERE {stored_id_filter}
+                """,
+                params
+            ).fetchall()
+            locked_ids = [entity_id for entity_id, is_locked in rows if is_locked]
+            skipped_ids = [entity_id for entity_id, is_locked in rows if not is_locked]
+            params = {**(params or {}), "locked_ids": locked_ids}
+            # only write the rows locked here, and the rows that don't exist yet
+            expected_id_filter = (
+                f"({id_filter}) AND ({{id}} = ANY(:locked_ids) "
+                f"OR NOT EXISTS (SELECT 1 FROM {table} WHERE {table}.{id_column} = {{id}}))"
+            )
+            delete_filter = f"{table}.{id_column} = ANY(:locked_ids)"
+        else:
+            session.execute(
+                f"SELECT {id_column} FROM {table} WHERE {stored_id_filter} ORDER BY {id_column} FOR UPDATE",
+                params
+            )
+
+    all_columns = ", ".join([id_column] + columns)
+    fixed_ids = session.execute(
+        f"""
+        WITH expected AS ({get_aggregate_query(table, expected_id_filter)}),
+        upserted AS (
+            INSERT INTO {table} ({all_columns})
+            SELECT {all_columns} FROM expected
+            ORDER BY {id_column}
+            ON CONFLICT ({id_column}) DO {conflict_action}
+            RETURNING {id_column}
+        ),
+        deleted AS (
+            DELETE FROM {table}
+            WHERE {delete_filter} AND {id_column} NOT IN (SELECT {id_column} FROM expected)
+            RETURNING {id_column}
+        )
+        SELECT {id_column} FROM upserted UNION ALL SELECT {id_column} FROM deleted
+        ORDER BY {id_column}
+        """,
+        params
+    ).fetchall()
+    return [entity_id for (entity_id,) in fixed_ids], skipped_ids
+
+
+def reconcile_aggregate_ids(session, table, ids, missing_only=False):
+    """reconcile_aggregate_rows for the given entity ids, returning the number of rows fixed"""
+    if not ids:
+        return 0
+    fixed_ids, _ = reconcile_aggregate_rows(session, table, "{id} = ANY(:ids)", {"ids": sorted(ids)}, missing_only)
+    return len(fixed_ids)
+
+
+def update_user_content_counts(session, user_ids):
+    """Recounts the tracks, playlists and albums of users whose owned content changed"""
+    user_ids = sorted(user_id for user_id in user_ids if user_id is not None)
+    if not user_ids:
+        return
+    session.flush()
+    session.execute(
+        f"""
+        UPDATE aggregate_user SET
+            track_count = {user_track_count_sql.format(user_id="aggregate_user.user_id")},
+            playlist_count = {user_playlist_count_sql.format(user_id="aggregate_user.user_id", is_album="FALSE")},
+            album_count = {user_playlist_count_sql.format(user_id="aggregate_user.user_id", is_album="TRUE")}
+        WHERE aggregate_user.user_id = ANY(:user_ids)
+        """,
+        {"user_ids": user_ids}
+    )
+
+
+def get_count_change(was_active, is_delete):
+    """Returns the change to a count of active rows when an active or inactive row is replaced by one with is_delete"""
+    return int(not is_delete) - int(bool(was_active))
+
+
+def invalidate_current_row(session, model, *criteria):
+    """Marks the current row of model matching criteria as not current, and returns whether it was active
+    (not deleted)"""
+    # flush pending rows first, so a row added earlier in the session is invalidated as with Query.update
+    session.flush()
+    invalidated_rows = session.execute(
+        update(model.__table__)
+        .where(and_(*criteria, model.is_current == True))
+        .values(is_current=False)
+        .returning(model.is_delete)
+    ).fetchall()
+    return any(not is_delete for (is_delete,) in invalidated_rows)
+
+
+def get_count_deltas():
+    """Returns an empty { entity id: Counter({ count column: change }) } for update_aggregate_counts"""
+    return defaultdict(Counter)
+
+
+def update_aggregate_counts(session, model, deltas):
+    """Adds deltas, { entity id: { count column: change } }, to the existing rows of the aggregate model.
+
+    Entities without a row don't count yet, and their counts are computed when the row is inserted.
+    The indexer is the only writer that waits on aggregate row locks, see reconcile_aggregate_rows.
+    """
+    id_column = list(model.__table__.primary_key)[0]
+    for entity_id in sorted(deltas):
+        changes = {
+            getattr(model, column): getattr(model, column) + change
+            for column, change in deltas[entity_id].items() if change
+        }
+        if changes:
+            session.query(model).filter(id_column == entity_id).update(changes, synchronize_session=False)
+
+
+def get_reverted_aggregate_ids(session, revert_hashes):
+    """Returns { aggregate table: entity ids } of the aggregate rows affected by the rows indexed in revert_hashes"""
+    user_ids = set()
+    track_ids = set()
+    playlist_ids = set()
+
+    for user_id, track_id in (
+            session.query(Repost.user_id, Repost.repost_item_id)
+            .filter(Repost.blockhash.in_(revert_hashes), Repost.repost_type == RepostType.track)
+            .union(
+                session.query(Save.user_id, Save.save_item_id)
+                .filter(Save.blockhash.in_(revert_hashes), Save.save_type == SaveType.track)
+            )
+    ):
+        user_ids.add(user_id)
+        track_ids.add(track_id)
+
+    for user_id, playlist_id in (
+            session.query(Repost.user_id, Repost.repost_item_id)
+            .filter(Repost.blockhash.in_(revert_hashes), Repost.repost_type != RepostType.track)
+            .union(
+                session.query(Save.user_id, Save.save_item_id)
+                .filter(Save.blockhash.in_(revert_hashes), Save.save_type != SaveType.track)
+            )
+    ):
+        user_ids.add(user_id)
+        playlist_ids.add(playlist_id)
+
+    for follower_user_id, followee_user_id in (
+            session.query(Follow.follower_user_id, Follow.followee_user_id)
+            .filter(Follow.blockhash.in_(revert_hashes))
+    ):
+        user_ids.update([follower_user_id, followee_user_id])
+
+    for track_id, owner_id in (
+            session.query(Track.track_id, Track.owner_id).filter(Track.blockhash.in_(revert_hashes))
+    ):
+        track_ids.add(track_id)
+        user_ids.add(owner_id)
+
+    for playlist_id, owner_id in (
+            session.query(Playlist.playlist_id, Playlist.playlist_owner_id)
+            .filter(Playlist.blockhash.in_(revert_hashes))
+    ):
+        playlist_ids.add(playlist_id)
+        user_ids.add(owner_id)
+
+    user_ids.update(
+        user_id for (user_id,) in session.query(User.user_id).filter(User.blockhash.in_(revert_hashes))
+    )
+
+    user_ids.discard(None)
+    return {AGGREGATE_USER: user_ids, AGGREGATE_TRACK: track_ids, AGGREGATE_PLAYLIST: playlist_ids}
@@ -3,10 +3,11 @@ from datetime import datetime, timedelta
 from urllib.parse import unquote
 from sqlalchemy import func, desc
 
-from src.models import AggregatePlays, Track, RepostType, Follow, SaveType, Play
+from src.models import AggregatePlays, HourlyPlayCounts, Track, RepostType, Follow, SaveType
 from src.queries import response_name_constants
 from src.queries.query_helpers import \
     get_karma, get_repost_counts, get_save_counts, get_genre_list
+from src.tasks.play_counts import get_play_count_hour
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,7 @@ def get_listen_counts(session, time, genre, limit, offset):
             return base_query
         return (base_query
                 .filter(
-                    Play.created_at > datetime.now() - delta
+                    HourlyPlayCounts.hour_timestamp >= get_play_count_hour(datetime.now() - delta)
                 ))
 
     # Adds a genre filter
@@ -65,11 +66,15 @@ def get_listen_counts(session, time, genre, limit, offset):
 
     # Construct base query
     if time:
-        # If we want to query plays by time, use the plays table directly
+        # If we want to query plays by time, sum the hourly play counts in the time range
         base_query = (
             session
-            .query(Play.play_item_id, func.count(Play.id).label('count'), Track.created_at)
-            .join(Track, Track.track_id == Play.play_item_id)
+            .query(
+                HourlyPlayCounts.play_item_id,
+                func.sum(HourlyPlayCounts.play_count).label('count'),
+                Track.created_at
+            )
+            .join(Track, Track.track_id == HourlyPlayCounts.play_item_id)
         )
     else:
         # Otherwise, it's safe to just query over the aggregate plays table (all time)
@@ -90,7 +95,7 @@ def get_listen_counts(session, time, genre, limit, offset):
     )
 
     if time:
-        base_query = base_query.group_by(Play.play_item_id, Track.created_at)
+        base_query = base_query.group_by(HourlyPlayCounts.play_item_id, Track.created_at)
 
     # Add filters to query
     base_query = with_time_filter(base_query, time)
@@ -245,3 +250,187 @@ def generate_trending(session, time, genre, limit, offset, strategy):
     final_resp = {}
     final_resp['listen_counts'] = trending_tracks
     return final_resp
+
+
+# Returns the listen counts of the tracks that can trend in any genre, the top `limit`
+# tracks by listens of each genre, subject to time restrictions.
+# Umbrella genres like 'Electronic' trend from the union of their genres' top tracks.
+# Returns [{ track_id: number, listens: number, created_at: datetime, genre: string }]
+def get_trending_candidate_listen_counts(session, time, limit):
+    delta = time_delta_map.get(time) if time else None
+    if time and not delta:
+        logger.warning(f"Invalid time passed to get_trending_candidate_listen_counts: {time}")
+
+    if delta:
+        listens_query = (
+            session
+            .query(
+                HourlyPlayCounts.play_item_id.label('track_id'),
+                func.sum(HourlyPlayCounts.play_count).label('count'),
+                Track.created_at,
+                Track.genre
+            )
+            .join(Track, Track.track_id == HourlyPlayCounts.play_item_id)
+            .filter(HourlyPlayCounts.hour_timestamp >= get_play_count_hour(datetime.now() - delta))
+            .group_by(HourlyPlayCounts.play_item_id, Track.created_at, Track.genre)
+        )
+    else:
+        listens_query = (
+            session
+            .query(
+                AggregatePlays.play_item_id.label('track_id'),
+                AggregatePlays.count.label('count'),
+                Track.created_at,
+                Track.genre
+            )
+            .join(Track, Track.track_id == AggregatePlays.play_item_id)
+        )
+
+    listens_query = (
+        listens_query
+        .filter(
+            Track.is_current == True,
+            Track.is_delete == False,
+            Track.is_unlisted == False,
+            Track.stem_of == None
+        )
+    ).subquery()
+
+    ranked_listens = (
+        session.query(
+            listens_query.c.track_id,
+            listens_query.c.count,
+            listens_query.c.created_at,
+            listens_query.c.genre,
+            func.row_number().over(
+                partition_by=listens_query.c.genre,
+                order_by=desc(listens_query.c.count)
+            ).label('genre_rank')
+        )
+    ).subquery()
+
+    listens = (
+        session.query(
+            ranked_listens.c.track_id,
+            ranked_listens.c.count,
+            ranked_listens.c.created_at,
+            ranked_listens.c.genre
+        )
+        .filter(ranked_listens.c.genre_rank <= limit)
+        .order_by(desc(ranked_listens.c.count))
+    ).all()
+
+    return [{
+        "track_id": track_id,
+        "listens": count,
+        "created_at": created_at,
+        "genre": genre
+    } for (track_id, count, created_at, genre) in listens]
+
+def generate_trending_features(session, time_ranges, limit, xf_values):
+    """Computes the trending features of the tracks that can trend in any genre, for each time range.
+
+    Returns { time_range: [track features] } sorted by listens, where the track features hold the
+    fields of generate_trending's listen counts with the owner's unfiltered follower count, the genre,
+    and the karma for each of xf_values as { xf: karma }.
+    Use get_trending_from_features to derive generate_trending's result for a genre and strategy.
+    """
+    listen_counts = {
+        time: get_trending_candidate_listen_counts(session, time, limit) for time in time_ranges
+    }
+    track_ids = list({
+        track["track_id"] for time in time_ranges for track in listen_counts[time]
+    })
+    if not track_ids:
+        return {time: [] for time in time_ranges}
+
+    def get_track_counts(counts, item_type):
+        return {item_id: count for (item_id, count, count_item_type) in counts if count_item_type == item_type}
+
+    # Features that don't depend on the time range are computed once for every candidate track
+    track_repost_counts = get_track_counts(
+        get_repost_counts(session, False, True, track_ids, None), RepostType.track)
+    track_save_counts = get_track_counts(
+        get_save_counts(session, False, True, track_ids, None), SaveType.track)
+
+    track_owner_dict = dict(
+        session.query(Track.track_id, Track.owner_id)
+        .filter(
+            Track.is_current == True,
+            Track.is_unlisted == False,
+            Track.stem_of == None,
+            Track.track_id.in_(track_ids)
+        )
+        .all()
+    )
+    follower_count_dict = dict(
+        session.query(
+            Follow.followee_user_id,
+            func.count(Follow.followee_user_id)
+        )
+        .filter(
+            Follow.is_current == True,
+            Follow.is_delete == False,
+            Follow.followee_user_id.in_(list(set(track_owner_dict.values())))
+        )
+        .group_by(Follow.followee_user_id)
+        .all()
+    )
+    karma_counts_for_xf = {
+        xf: dict(get_karma(session, tuple(track_ids), None, False, xf)) for xf in xf_values
+    }
+
+    trending_features = {}
+    for time in time_ranges:
+        # Query repost and save counts with respect to the rolling time frame
+        track_repost_counts_for_time = get_track_counts(
+            get_repost_counts(session, False, True, track_ids, None, None, time), RepostType.track)
+        track_save_counts_for_time = get_track_counts(
+            get_save_counts(session, False, True, track_ids, None, None, time), SaveType.track)
+
+        features = []
+        for listen_count in listen_counts[time]:
+            track_id = listen_count["track_id"]
+            owner_id = track_owner_dict[track_id]
+            created_at = listen_count["created_at"]
+            features.append({
+                response_name_constants.track_id: track_id,
+                "listens": listen_count["listens"],
+                "genre": listen_count["genre"],
+                response_name_constants.repost_count: track_repost_counts.get(track_id, 0),
+                response_name_constants.windowed_repost_count: track_repost_counts_for_time.get(track_id, 0),
+                response_name_constants.save_count: track_save_counts.get(track_id, 0),
+                response_name_constants.windowed_save_count: track_save_counts_for_time.get(track_id, 0),
+                response_name_constants.track_owner_id: owner_id,
+                response_name_constants.owner_follower_count: follower_count_dict.get(owner_id, 0),
+                response_name_constants.created_at:
+                    created_at.isoformat(timespec='seconds') if created_at else None,
+                "karma": {xf: karma_counts.get(track_id, 0) for xf, karma_counts in karma_counts_for_xf.items()}
+            })
+        trending_features[time] = features
+
+    return trending_features
+
+def get_trending_from_features(features, genre, limit, strategy):
+    """Returns generate_trending's result for a genre and strategy from one time range's trending features"""
+    score_params = strategy.get_score_params()
+    xf = score_params['xf']
+    pt = score_params['pt']
+
+    if genre:
+        # Parse encoded characters, such as Hip-Hop%252FRap -> Hip-Hop/Rap
+        genre_set = set(get_genre_list(unquote(genre)))
+        features = [track for track in features if track["genre"] in genre_set]
+
+    trending_tracks = []
+    for track in features[:limit]:
+        track_entry = {key: value for key, value in track.items() if key != "genre"}
+        owner_follow_count = track_entry[response_name_constants.owner_follower_count]
+        track_entry[response_name_constants.owner_follower_count] = \
+            owner_follow_count if owner_follow_count > pt else 0
+        track_entry["karma"] = track["karma"][xf]
+        trending_tracks.append(track_entry)
+
+    final_resp = {}
+    final_resp['listen_counts'] = trending_tracks
+    return final_resp
@@ -1,21 +1,35 @@
 import logging
 import concurrent.futures
+import time
+import uuid
+from sqlalchemy import text
+
+from web3.datastructures import AttributeDict
 
 from src.app import contract_addresses
 from src.models import Block, User, Track, Repost, Follow, Playlist, \
     Save, URSMContentNode, AssociatedWallet
 from src.tasks.celery_app import celery
-from src.tasks.tracks import track_state_update
+from src.tasks.tracks import track_state_update, track_event_types_lookup
 from src.tasks.users import user_state_update  # pylint: disable=E0611,E0001
 from src.tasks.social_features import social_feature_state_update
 from src.tasks.playlists import playlist_state_update
 from src.tasks.user_library import user_library_state_update
 from src.tasks.user_replica_set import user_replica_set_state_update
-from src.utils.redis_constants import latest_block_redis_key, \
+from src.tasks.ipld_blacklist import ipld_blacklist_index, is_blacklisted_ipld
+from src.tasks.aggregate_counts import AGGREGATE_USER, AGGREGATE_TRACK, AGGREGATE_PLAYLIST, \
+    get_reverted_aggregate_ids, reconcile_aggregate_ids
+from src.tasks.search_dicts import add_dirty_search_ids
+from src.tasks.metadata import track_metadata_format, user_metadata_format
+from src.utils.redis_constants import latest_block_redis_key, indexed_block_hashes_redis_key, \
+    next_update_task_id_redis_key, \
     latest_block_hash_redis_key, most_recent_indexed_block_hash_redis_key, \
     most_recent_indexed_block_redis_key
 from src.utils.redis_cache import remove_cached_user_ids, \
-    remove_cached_track_ids, remove_cached_playlist_ids
+    remove_cached_track_ids, remove_cached_playlist_ids, update_cached_followee_ids, remove_cached_followee_ids
+from src.utils.eth_rpc_batch import BatchRequestRejected
+from src.utils import helpers, multihash
+from src.utils.user_event_constants import user_event_types_lookup
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +44,16 @@ default_config_start_hash = "0x0"
 # Used to update user_replica_set_manager address and skip txs conditionally
 zero_address = "0x0000000000000000000000000000000000000000"
 
+# Contracts whose logs are requested with eth_getLogs when block_indexing_mode = logs
+event_log_contract_names = [
+    "user_factory",
+    "track_factory",
+    "social_feature_factory",
+    "playlist_factory",
+    "user_library_factory",
+    "user_replica_set_manager"
+]
+
 def get_contract_info_if_exists(self, address):
     for contract_name, contract_address in contract_addresses.items():
         if update_task.web3.toChecksumAddress(contract_address) == address:
@@ -41,7 +65,7 @@ def initialize_blocks_table_if_necessary(db):
 
     target_blockhash = None
     target_blockhash = update_task.shared_config["discprov"]["start_block"]
-    target_block = update_task.web3.eth.getBlock(target_blockhash, True)
+    target_block = update_task.web3.eth.getBlock(target_blockhash, False)
 
     with db.scoped_session() as session:
         current_block_query_result = session.query(Block).filter_by(is_current=True)
@@ -78,6 +102,8 @@ def initialize_blocks_table_if_necessary(db):
 def get_latest_block(db):
     latest_block = None
     block_processing_window = int(update_task.shared_config["discprov"]["block_processing_window"])
+    if is_event_logs_indexing_mode():
+        block_processing_window = int(update_task.shared_config["discprov"]["event_logs_block_processing_window"])
     with db.scoped_session() as session:
         current_block_query = session.query(Block).filter_by(is_current=True)
         assert (
@@ -91,26 +117,73 @@ def get_latest_block(db):
         if current_block_number == None:
             current_block_number = 0
 
-        target_latest_block_number = current_block_number + block_processing_window
-
-        latest_block_from_chain = update_task.web3.eth.getBlock('latest', True)
+        latest_block_from_chain = update_task.web3.eth.getBlock('latest', False)
         latest_block_number_from_chain = latest_block_from_chain.number
 
+        if not is_event_logs_indexing_mode():
+            # Grow the window with the block lag so that catching up takes fewer, larger runs
+            max_block_processing_window = int(update_task.shared_config["discprov"]["max_block_processing_window"])
+            block_lag = latest_block_number_from_chain - current_block_number
+            block_processing_window = max(block_processing_window, min(block_lag, max_block_processing_window))
+
+        target_latest_block_number = current_block_number + block_processing_window
+
         if target_latest_block_number > latest_block_number_from_chain:
             target_latest_block_number = latest_block_number_from_chain
 
         logger.info(f"index.py | get_latest_block | current={current_block_number} target={target_latest_block_number}")
-        latest_block = update_task.web3.eth.getBlock(target_latest_block_number, True)
+        # Transactions are read from receipts or logs, so only the block header is needed
+        latest_block = update_task.web3.eth.getBlock(target_latest_block_number, False)
     return latest_block
 
 def update_latest_block_redis():
-    latest_block_from_chain = update_task.web3.eth.getBlock('latest', True)
+    latest_block_from_chain = update_task.web3.eth.getBlock('latest', False)
     default_indexing_interval_seconds = int(update_task.shared_config["discprov"]["block_processing_interval_sec"])
     redis = update_task.redis
     # these keys have a TTL which is the indexing interval
     redis.set(latest_block_redis_key, latest_block_from_chain.number, ex=default_indexing_interval_seconds)
     redis.set(latest_block_hash_redis_key, latest_block_from_chain.hash.hex(), ex=default_indexing_interval_seconds)
 
+def fetch_blocks_by_number(block_numbers):
+    """ Returns a dict of block number -> block header for every number in block_numbers """
+    receipt_fetcher = update_task.receipt_fetcher
+    if receipt_fetcher.batch_supported:
+        try:
+            return receipt_fetcher.get_blocks(block_numbers)
+        except BatchRequestRejected:
+            logger.warning("index.py | fetch_blocks_by_number | Batch requests rejected, fetching blocks per number")
+
+    web3 = update_task.web3
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+        blocks = executor.map(lambda block_number: web3.eth.getBlock(block_number, False), block_numbers)
+        return dict(zip(block_numbers, blocks))
+
+def get_blocks_after_current_block(session, latest_block):
+    """ Returns the blocks after the current indexed block through latest_block, newest first, and the
+        current block's hash, fetching the block headers by number in batches. Returns None if the
+        blocks don't chain back to the current block, e.g. after a reorg, in which case the intersection
+        is found by walking back from latest_block one parent at a time.
+    """
+    web3 = update_task.web3
+    current_block = session.query(Block).filter(Block.is_current == True).first()
+    if current_block is None or current_block.number is None or latest_block.number <= current_block.number:
+        return None
+
+    block_numbers = list(range(current_block.number + 1, latest_block.number))
+    blocks_by_number = fetch_blocks_by_number(block_numbers)
+    blocks = [blocks_by_number[block_number] for block_number in block_numbers] + [latest_block]
+
+    parent_hash = current_block.blockhash
+    for block in blocks:
+        if web3.toHex(block.parentHash) != parent_hash:
+            logger.info(
+                f"index.py | get_blocks_after_current_block | Block {block.number} does not chain back to "
+                f"current block {current_block.number}"
+            )
+            return None
+        parent_hash = web3.toHex(block.hash)
+    return blocks[::-1], current_block.blockhash
+
 def fetch_tx_receipt(transaction):
     web3 = update_task.web3
     tx_hash = web3.toHex(transaction["hash"])
@@ -121,6 +194,21 @@ def fetch_tx_receipt(transaction):
     return response
 
 def fetch_tx_receipts(self, block_transactions):
+    if not block_transactions:
+        return {}
+
+    receipt_fetcher = update_task.receipt_fetcher
+    if receipt_fetcher.batch_supported:
+        web3 = update_task.web3
+        tx_hashes = [web3.toHex(tx["hash"]) for tx in block_transactions]
+        try:
+            return receipt_fetcher.get_transaction_receipts(tx_hashes)
+        except BatchRequestRejected:
+            logger.warning("index.py | fetch_tx_receipts | Batch requests rejected, fetching receipts per tx")
+
+    return fetch_tx_receipts_individually(self, block_transactions)
+
+def fetch_tx_receipts_individually(self, block_transactions):
     block_tx_with_receipts = {}
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
         future_to_tx_receipt = {executor.submit(fetch_tx_receipt, tx): tx for tx in block_transactions}
@@ -131,13 +219,124 @@ def fetch_tx_receipts(self, block_transactions):
                 tx_hash = tx_receipt_info["tx_hash"]
                 block_tx_with_receipts[tx_hash] = tx_receipt_info["tx_receipt"]
             except Exception as exc:
-                logger.error(f"index.py | fetch_tx_receipts {tx} generated {exc}")
+                logger.error(f"index.py | fetch_tx_receipts_individually {tx} generated {exc}")
     num_processed_txs = len(block_tx_with_receipts.keys())
     num_submitted_txs = len(block_transactions)
     if num_processed_txs != num_submitted_txs:
-        raise Exception(f"index.py | fetch_tx_receipts Expected ${num_submitted_txs} received {num_processed_txs}")
+        raise Exception(
+            f"index.py | fetch_tx_receipts_individually Expected ${num_submitted_txs} received {num_processed_txs}"
+        )
     return block_tx_with_receipts
 
+def fetch_block_tx_receipts(self, block):
+    """ Returns the block's transactions and their receipts keyed by tx hash. Blocks fetched without
+        full transactions only list tx hashes, so each transaction's target is read from its receipt.
+    """
+    block_transactions = block.transactions
+    if not block_transactions or not isinstance(block_transactions[0], bytes):
+        return block_transactions, fetch_tx_receipts(self, block_transactions)
+
+    tx_receipt_dict = fetch_tx_receipts(self, [AttributeDict({"hash": tx_hash}) for tx_hash in block_transactions])
+    block_transactions = [
+        AttributeDict({"hash": tx_receipt.transactionHash, "to": tx_receipt["to"]})
+        for tx_receipt in tx_receipt_dict.values()
+    ]
+    return block_transactions, tx_receipt_dict
+
+# Fetch receipts for the blocks ahead of the one currently being indexed in the background,
+# keeping up to block_prefetch_window blocks in flight. Results are yielded in index order so
+# that parsing and commits still happen strictly block by block.
+def prefetch_block_tx_receipts(self, ordered_blocks):
+    if is_event_logs_indexing_mode():
+        yield from fetch_event_log_receipts(self, ordered_blocks)
+        return
+
+    num_blocks = len(ordered_blocks)
+    prefetch_window = int(update_task.shared_config["discprov"]["block_prefetch_window"])
+    if prefetch_window <= 0:
+        for block in ordered_blocks:
+            yield (block, *fetch_block_tx_receipts(self, block))
+        return
+
+    prefetch_futures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=prefetch_window) as executor:
+        try:
+            for index, block in enumerate(ordered_blocks):
+                # Keep the current block and the next prefetch_window blocks submitted
+                for ahead in range(index, min(index + prefetch_window + 1, num_blocks)):
+                    if ahead not in prefetch_futures:
+                        prefetch_futures[ahead] = executor.submit(
+                            fetch_block_tx_receipts, self, ordered_blocks[ahead]
+                        )
+                yield (block, *prefetch_futures.pop(index).result())
+        finally:
+            # Drop any outstanding work if indexing stops early
+            for future in prefetch_futures.values():
+                future.cancel()
+
+def is_event_logs_indexing_mode():
+    return update_task.shared_config["discprov"]["block_indexing_mode"] == "logs"
+
+def get_event_log_contract_addresses():
+    return [
+        contract_addresses[contract_name]
+        for contract_name in event_log_contract_names
+        if contract_addresses[contract_name] != zero_address
+    ]
+
+# Retrieve every log emitted by the indexed factory contracts across the block range with a
+# single eth_getLogs call and regroup them per block into transaction and receipt-shaped
+# entries. The receipts only carry the logs of the indexed contracts, which is all that
+# processReceipt in the *_state_update functions reads.
+def fetch_event_log_receipts(self, ordered_blocks):
+    web3 = update_task.web3
+    if not ordered_blocks:
+        return
+
+    # Make sure a newly registered UserReplicaSetManager is part of the log filter
+    update_ursm_address(self)
+
+    block_hashes = {block.number: web3.toHex(block.hash) for block in ordered_blocks}
+    block_txs = {block.number: [] for block in ordered_blocks}
+    block_receipts = {block.number: {} for block in ordered_blocks}
+
+    from_block = ordered_blocks[0].number
+    to_block = ordered_blocks[-1].number
+    logs = web3.eth.getLogs({
+        "fromBlock": from_block,
+        "toBlock": to_block,
+        "address": get_event_log_contract_addresses()
+    })
+    logger.info(f"index.py | fetch_event_log_receipts | {len(logs)} logs in blocks {from_block}-{to_block}")
+
+    for log in logs:
+        log_block_number = log.blockNumber
+        # Logs are fetched by number, so guard against the range being reorganized underneath us
+        if block_hashes.get(log_block_number) != web3.toHex(log.blockHash):
+            raise Exception(
+                f"index.py | fetch_event_log_receipts | Log blockhash {web3.toHex(log.blockHash)} "
+                f"does not match indexed block {log_block_number}"
+            )
+
+        tx_hash = web3.toHex(log.transactionHash)
+        tx_receipts = block_receipts[log_block_number]
+        if tx_hash not in tx_receipts:
+            tx_receipts[tx_hash] = {
+                "transactionHash": log.transactionHash,
+                "transactionIndex": log.transactionIndex,
+                "blockHash": log.blockHash,
+                "blockNumber": log_block_number,
+                "logs": []
+            }
+            block_txs[log_block_number].append(AttributeDict({"hash": log.transactionHash, "to": log.address}))
+        tx_receipts[tx_hash]["logs"].append(log)
+
+    for block in ordered_blocks:
+        tx_receipt_dict = {
+            tx_hash: AttributeDict(tx_receipt) for tx_hash, tx_receipt in block_receipts[block.number].items()
+        }
+        yield block, block_txs[block.number], tx_receipt_dict
+
 # During each indexing iteration, check if the address for UserReplicaSetManager
 # has been set in the L2 contract registry - if so, update the global contract_addresses object
 # This change is to ensure no indexing restart is necessary when UserReplicaSetManager is
@@ -165,204 +364,396 @@ def update_ursm_address(self):
             logger.info(f"index.py | Updated user_replica_set_manager_address={user_replica_set_manager_address}")
 
 def index_blocks(self, db, blocks_list):
-    web3 = update_task.web3
-    redis = update_task.redis
-
     num_blocks = len(blocks_list)
     block_order_range = range(len(blocks_list) - 1, -1, -1)
-    for i in block_order_range:
-        update_ursm_address(self)
-        block = blocks_list[i]
-        block_index = num_blocks - i
-        block_number = block.number
-        block_timestamp = block.timestamp
+    ordered_blocks = [blocks_list[i] for i in block_order_range]
+    blocks_per_transaction = get_blocks_per_transaction(ordered_blocks)
+    prefetched_blocks = prefetch_block_tx_receipts(self, ordered_blocks)
+    block_batch = []
+    for block_index, prefetched_block in enumerate(prefetched_blocks, start=1):
+        block = prefetched_block[0]
         logger.info(
             f"index.py | index_blocks | {self.request.id} | block {block.number} - {block_index}/{num_blocks}"
         )
+        block_batch.append(prefetched_block)
+        if len(block_batch) >= blocks_per_transaction or block_index == num_blocks:
+            index_block_batch(self, db, block_batch)
+            block_batch = []
 
-        # Handle each block in a distinct transaction
-        with db.scoped_session() as session:
-            current_block_query = session.query(Block).filter_by(is_current=True)
-
-            # Without this check we may end up duplicating an insert operation
-            block_model = Block(
-                blockhash=web3.toHex(block.hash),
-                parenthash=web3.toHex(block.parentHash),
-                number=block.number,
-                is_current=True,
-            )
-
-            # Update blocks table after
-            assert (
-                current_block_query.count() == 1
-            ), "Expected single row marked as current"
-
-            former_current_block = current_block_query.first()
-            former_current_block.is_current = False
-            session.add(block_model)
-
-            user_factory_txs = []
-            track_factory_txs = []
-            social_feature_factory_txs = []
-            playlist_factory_txs = []
-            user_library_factory_txs = []
-            user_replica_set_manager_txs = []
-
-            tx_receipt_dict = fetch_tx_receipts(self, block.transactions)
-
-            # Sort transactions by hash
-            sorted_txs = sorted(block.transactions, key=lambda entry: entry['hash'])
-
-            # Parse tx events in each block
-            for tx in sorted_txs:
-                tx_hash = web3.toHex(tx["hash"])
-                tx_target_contract_address = tx["to"]
-                tx_receipt = tx_receipt_dict[tx_hash]
-
-                # Skip in case a transaction targets zero address
-                if tx_target_contract_address == zero_address:
-                    logger.info(f"index.py | Skipping tx {tx_hash} targeting {tx_target_contract_address}")
-                    continue
-
-                # Handle user operations
-                if tx_target_contract_address == contract_addresses["user_factory"]:
-                    logger.info(
-                        f"index.py | UserFactory contract addr: {tx_target_contract_address}"
-                        f" tx from block - {tx}, receipt - {tx_receipt}, adding to user_factory_txs to process in bulk"
-                    )
-                    user_factory_txs.append(tx_receipt)
-
-                # Handle track operations
-                if tx_target_contract_address == contract_addresses["track_factory"]:
-                    logger.info(
-                        f"index.py | TrackFactory contract addr: {tx_target_contract_address}"
-                        f" tx from block - {tx}, receipt - {tx_receipt}"
-                    )
-                    # Track state operations
-                    track_factory_txs.append(tx_receipt)
-
-                # Handle social operations
-                if tx_target_contract_address == contract_addresses["social_feature_factory"]:
-                    logger.info(
-                        f"index.py | Social feature contract addr: {tx_target_contract_address}"
-                        f"tx from block - {tx}, receipt - {tx_receipt}"
-                    )
-                    social_feature_factory_txs.append(tx_receipt)
-
-                # Handle repost operations
-                if tx_target_contract_address == contract_addresses["playlist_factory"]:
-                    logger.info(
-                        f"index.py | Playlist contract addr: {tx_target_contract_address}"
-                        f"tx from block - {tx}, receipt - {tx_receipt}"
-                    )
-                    playlist_factory_txs.append(tx_receipt)
+    if num_blocks > 0:
+        logger.warning(f"index.py | index_blocks | Indexed {num_blocks} blocks")
 
-                # Handle User Library operations
-                if tx_target_contract_address == contract_addresses["user_library_factory"]:
-                    logger.info(
-                        f"index.py | User Library contract addr: {tx_target_contract_address}"
-                        f"tx from block - {tx}, receipt - {tx_receipt}"
-                    )
-                    user_library_factory_txs.append(tx_receipt)
+def get_blocks_per_transaction(ordered_blocks):
+    """ Returns how many blocks to index per db transaction. When the indexer is more than
+        catchup_block_lag_threshold blocks behind the chain head, consecutive blocks are
+        grouped so that commit overhead is paid once per catchup_blocks_per_transaction blocks.
+    """
+    if not ordered_blocks:
+        return 1
+    discprov_config = update_task.shared_config["discprov"]
+    catchup_blocks_per_transaction = int(discprov_config["catchup_blocks_per_transaction"])
+    catchup_block_lag_threshold = int(discprov_config["catchup_block_lag_threshold"])
+
+    latest_block_number = update_task.redis.get(latest_block_redis_key)
+    if latest_block_number is None:
+        latest_block_number = ordered_blocks[-1].number
+    block_lag = int(latest_block_number) - ordered_blocks[0].number
+    if block_lag > catchup_block_lag_threshold and catchup_blocks_per_transaction > 1:
+        logger.info(
+            f"index.py | get_blocks_per_transaction | block lag {block_lag} exceeds "
+            f"{catchup_block_lag_threshold}, indexing {catchup_blocks_per_transaction} blocks per transaction"
+        )
+        return catchup_blocks_per_transaction
+    return 1
+
+def is_indexed_block(session, blockhash):
+    """ Returns whether blockhash is in the blocks table, checking the indexed block hash cache
+        before querying the db
+    """
+    if update_task.redis.zscore(indexed_block_hashes_redis_key, blockhash) is not None:
+        return True
+    return session.query(Block).filter(Block.blockhash == blockhash).count() > 0
+
+def cache_indexed_block_hashes(blocks):
+    """ Adds committed blocks to the indexed block hash cache, a redis sorted set of block hashes
+        scored by block number that keeps the indexed_block_hash_cache_size most recent blocks
+    """
+    web3 = update_task.web3
+    cache_size = int(update_task.shared_config["discprov"]["indexed_block_hash_cache_size"])
+    with update_task.redis.pipeline() as pipe:
+        pipe.zadd(indexed_block_hashes_redis_key, {web3.toHex(block.hash): block.number for block in blocks})
+        pipe.zremrangebyrank(indexed_block_hashes_redis_key, 0, -(cache_size + 1))
+        pipe.execute()
+
+def index_block_batch(self, db, block_batch):
+    """ Indexes consecutive prefetched blocks in a single db transaction.
+        If the batch fails, its work is rolled back and redone one block per transaction
+        so that a bad block surfaces exactly as it would without batching.
+    """
+    redis = update_task.redis
+    # "follow" maps (follower_user_id, followee_user_id) to is_delete, with later blocks taking precedence
+    changed_entity_ids = {
+        "user": set(), "track": set(), "playlist": set(), "follow": {},
+        "search_user": set(), "search_track": set(), "search_playlist": set(), "search_follower_count": set()
+    }
+    try:
+        with db.scoped_session() as session:
+            for block, block_transactions, tx_receipt_dict in block_batch:
+                block_changed_entity_ids = index_block(self, session, block, block_transactions, tx_receipt_dict)
+                for entity_type, entity_ids in block_changed_entity_ids.items():
+                    changed_entity_ids[entity_type].update(entity_ids)
+    except Exception as e:
+        if len(block_batch) == 1:
+            raise
+        logger.error(
+            f"index.py | index_block_batch | failed to index blocks {block_batch[0][0].number}-"
+            f"{block_batch[-1][0].number} in one transaction, retrying per block: {e}",
+            exc_info=True
+        )
+        for prefetched_block in block_batch:
+            index_block_batch(self, db, [prefetched_block])
+        return
 
-                # Handle UserReplicaSetManager operations
-                if tx_target_contract_address == contract_addresses["user_replica_set_manager"]:
-                    logger.info(
-                        f"index.py | User Replica Set Manager contract addr: {tx_target_contract_address}"
-                        f"tx from block - {tx}, receipt - {tx_receipt}"
-                    )
-                    user_replica_set_manager_txs.append(tx_receipt)
+    last_block = block_batch[-1][0]
+    logger.info(f"index.py | session commmited to db for block=${last_block.number}")
+
+    if changed_entity_ids["user"]:
+        remove_cached_user_ids(redis, list(changed_entity_ids["user"]))
+    if changed_entity_ids["track"]:
+        remove_cached_track_ids(redis, list(changed_entity_ids["track"]))
+    if changed_entity_ids["playlist"]:
+        remove_cached_playlist_ids(redis, list(changed_entity_ids["playlist"]))
+    if changed_entity_ids["follow"]:
+        update_cached_followee_ids(redis, changed_entity_ids["follow"])
+    add_dirty_search_ids(
+        redis,
+        changed_entity_ids["search_user"],
+        changed_entity_ids["search_track"],
+        changed_entity_ids["search_playlist"],
+        changed_entity_ids["search_follower_count"]
+    )
+    logger.info(f"index.py | redis cache clean operations complete for block=${last_block.number}")
+
+    cache_indexed_block_hashes([block for block, _, _ in block_batch])
+
+    # add the block number of the most recently processed block to redis
+    redis.set(most_recent_indexed_block_redis_key, last_block.number)
+    redis.set(most_recent_indexed_block_hash_redis_key, last_block.hash.hex())
+    logger.info(f"index.py | update most recently processed block complete for block=${last_block.number}")
+
+def prefetch_block_metadata(session, user_factory_txs, track_factory_txs):
+    """ Resolves the metadata CIDs of every user and track event in a block concurrently, so that
+        the state handlers read them from the ipfs client instead of fetching one CID at a time
+    """
+    event_decoder = update_task.event_decoder
+    # {metadata multihash: (metadata_format, user_id whose creator node endpoint serves the CID)}
+    metadata_requests = {}
+    for tx_receipt in user_factory_txs:
+        user_events = event_decoder.decode_receipt("UserFactory", tx_receipt)
+        for entry in user_events.get(user_event_types_lookup["update_multihash"], []):
+            metadata_multihash = helpers.multihash_digest_to_cid(entry["args"]._multihashDigest)
+            metadata_requests[metadata_multihash] = (user_metadata_format, entry["args"]._userId)
+
+    for tx_receipt in track_factory_txs:
+        track_events = event_decoder.decode_receipt("TrackFactory", tx_receipt)
+        for event_type in [track_event_types_lookup["new_track"], track_event_types_lookup["update_track"]]:
+            for entry in track_events.get(event_type, []):
+                event_args = entry["args"]
+                buf = multihash.encode(bytes(event_args._multihashDigest), event_args._multihashHashFn)
+                metadata_multihash = multihash.to_b58_string(buf)
+                metadata_requests[metadata_multihash] = (track_metadata_format, event_args._trackOwnerId)
+
+    metadata_requests = {
+        metadata_multihash: request for metadata_multihash, request in metadata_requests.items()
+        if not is_blacklisted_ipld(session, metadata_multihash)
+    }
+    if not metadata_requests:
+        return
 
-            # bulk process operations once all tx's for block have been parsed
-            total_user_changes, user_ids = user_state_update(
-                self, update_task, session, user_factory_txs, block_number, block_timestamp)
-            user_state_changed = total_user_changes > 0
+    user_ids = {user_id for _, user_id in metadata_requests.values()}
+    creator_node_endpoints = dict(
+        session.query(User.user_id, User.creator_node_endpoint)
+        .filter(User.user_id.in_(user_ids), User.is_current == True)
+        .all()
+    )
+    update_task.ipfs_client.prefetch_metadata(
+        [
+            (metadata_multihash, metadata_format, creator_node_endpoints.get(user_id))
+            for metadata_multihash, (metadata_format, user_id) in metadata_requests.items()
+        ],
+        int(update_task.shared_config["ipfs"]["metadata_prefetch_workers"])
+    )
+
+def index_block(self, session, block, block_transactions, tx_receipt_dict):
+    """ Applies a single block's transactions to session and returns the user, track and
+        playlist ids whose cached entries must be cleared, the follow changes to apply to the
+        cached followee sets, and the user, track and playlist ids whose search dictionary rows
+        must be refreshed, along with the users whose follower counts changed, once the session is committed
+    """
+    web3 = update_task.web3
+    redis = update_task.redis
+    update_ursm_address(self)
+    block_number = block.number
+    block_timestamp = block.timestamp
+
+    # Pick up iplds blacklisted since the last block
+    ipld_blacklist_index.refresh(session, redis)
+
+    current_block_query = session.query(Block).filter_by(is_current=True)
+
+    # Without this check we may end up duplicating an insert operation
+    block_model = Block(
+        blockhash=web3.toHex(block.hash),
+        parenthash=web3.toHex(block.parentHash),
+        number=block.number,
+        is_current=True,
+    )
+
+    # Update blocks table after
+    assert (
+        current_block_query.count() == 1
+    ), "Expected single row marked as current"
+
+    former_current_block = current_block_query.first()
+    former_current_block.is_current = False
+    session.add(block_model)
+
+    user_factory_txs = []
+    track_factory_txs = []
+    social_feature_factory_txs = []
+    playlist_factory_txs = []
+    user_library_factory_txs = []
+    user_replica_set_manager_txs = []
+
+    # Sort transactions by hash
+    sorted_txs = sorted(block_transactions, key=lambda entry: entry['hash'])
+
+    # Parse tx events in each block
+    for tx in sorted_txs:
+        tx_hash = web3.toHex(tx["hash"])
+        tx_target_contract_address = tx["to"]
+        tx_receipt = tx_receipt_dict[tx_hash]
+
+        # Skip in case a transaction targets zero address
+        if tx_target_contract_address == zero_address:
+            logger.info(f"index.py | Skipping tx {tx_hash} targeting {tx_target_contract_address}")
+            continue
+
+        # Handle user operations
+        if tx_target_contract_address == contract_addresses["user_factory"]:
             logger.info(
-                f"index.py | user_state_update completed"
-                f" user_state_changed={user_state_changed} for block={block_number}"
+                f"index.py | UserFactory contract addr: {tx_target_contract_address}"
+                f" tx from block - {tx}, receipt - {tx_receipt}, adding to user_factory_txs to process in bulk"
             )
+            user_factory_txs.append(tx_receipt)
 
-            total_track_changes, track_ids = track_state_update(
-                self, update_task, session, track_factory_txs, block_number, block_timestamp
-            )
-            track_state_changed = total_track_changes > 0
+        # Handle track operations
+        if tx_target_contract_address == contract_addresses["track_factory"]:
             logger.info(
-                f"index.py | track_state_update completed"
-                f" track_state_changed={track_state_changed} for block={block_number}"
+                f"index.py | TrackFactory contract addr: {tx_target_contract_address}"
+                f" tx from block - {tx}, receipt - {tx_receipt}"
             )
+            # Track state operations
+            track_factory_txs.append(tx_receipt)
 
-            social_feature_state_changed = ( # pylint: disable=W0612
-                social_feature_state_update(
-                    self, update_task, session, social_feature_factory_txs, block_number, block_timestamp
-                )
-                > 0
-            )
+        # Handle social operations
+        if tx_target_contract_address == contract_addresses["social_feature_factory"]:
             logger.info(
-                f"index.py | social_feature_state_update completed"
-                f" social_feature_state_changed={social_feature_state_changed} for block={block_number}"
+                f"index.py | Social feature contract addr: {tx_target_contract_address}"
+                f"tx from block - {tx}, receipt - {tx_receipt}"
             )
+            social_feature_factory_txs.append(tx_receipt)
 
-            # Index UserReplicaSet changes
-            total_user_replica_set_changes, replica_user_ids = (
-                user_replica_set_state_update(
-                    self,
-                    update_task,
-                    session,
-                    user_replica_set_manager_txs,
-                    block_number,
-                    block_timestamp,
-                    redis
-                )
-            )
-            user_replica_set_state_changed = total_user_replica_set_changes > 0
+        # Handle repost operations
+        if tx_target_contract_address == contract_addresses["playlist_factory"]:
             logger.info(
-                f"index.py | user_replica_set_state_update completed"
-                f" user_replica_set_state_changed={user_replica_set_state_changed} for block={block_number}"
+                f"index.py | Playlist contract addr: {tx_target_contract_address}"
+                f"tx from block - {tx}, receipt - {tx_receipt}"
             )
+            playlist_factory_txs.append(tx_receipt)
 
-            # Playlist state operations processed in bulk
-            total_playlist_changes, playlist_ids = playlist_state_update(
-                self, update_task, session, playlist_factory_txs, block_number, block_timestamp
-            )
-            playlist_state_changed = total_playlist_changes > 0
+        # Handle User Library operations
+        if tx_target_contract_address == contract_addresses["user_library_factory"]:
             logger.info(
-                f"index.py | playlist_state_update completed"
-                f" playlist_state_changed={playlist_state_changed} for block={block_number}"
+                f"index.py | User Library contract addr: {tx_target_contract_address}"
+                f"tx from block - {tx}, receipt - {tx_receipt}"
             )
+            user_library_factory_txs.append(tx_receipt)
 
-            user_library_state_changed = user_library_state_update( # pylint: disable=W0612
-                self, update_task, session, user_library_factory_txs, block_number, block_timestamp
-            )
+        # Handle UserReplicaSetManager operations
+        if tx_target_contract_address == contract_addresses["user_replica_set_manager"]:
             logger.info(
-                f"index.py | user_library_state_update completed"
-                f" user_library_state_changed={user_library_state_changed} for block={block_number}"
+                f"index.py | User Replica Set Manager contract addr: {tx_target_contract_address}"
+                f"tx from block - {tx}, receipt - {tx_receipt}"
             )
-
-            track_lexeme_state_changed = (user_state_changed or track_state_changed)
-            session.commit()
-            logger.info(f"index.py | session commmited to db for block=${block_number}")
-
-            if user_state_changed:
-                if user_ids:
-                    remove_cached_user_ids(redis, user_ids)
-            if user_replica_set_state_changed:
-                if replica_user_ids:
-                    remove_cached_user_ids(redis, replica_user_ids)
-            if track_lexeme_state_changed:
-                if track_ids:
-                    remove_cached_track_ids(redis, track_ids)
-            if playlist_state_changed:
-                if playlist_ids:
-                    remove_cached_playlist_ids(redis, playlist_ids)
-            logger.info(f"index.py | redis cache clean operations complete for block=${block_number}")
-
-        # add the block number of the most recently processed block to redis
-        redis.set(most_recent_indexed_block_redis_key, block.number)
-        redis.set(most_recent_indexed_block_hash_redis_key, block.hash.hex())
-        logger.info(f"index.py | update most recently processed block complete for block=${block_number}")
-
-    if num_blocks > 0:
-        logger.warning(f"index.py | index_blocks | Indexed {num_blocks} blocks")
+            user_replica_set_manager_txs.append(tx_receipt)
+
+    # fetch the block's ipfs metadata concurrently before the state handlers read it
+    prefetch_block_metadata(session, user_factory_txs, track_factory_txs)
+
+    # bulk process operations once all tx's for block have been parsed
+    total_user_changes, user_ids = user_state_update(
+        self, update_task, session, user_factory_txs, block_number, block_timestamp)
+    user_state_changed = total_user_changes > 0
+    logger.info(
+        f"index.py | user_state_update completed"
+        f" user_state_changed={user_state_changed} for block={block_number}"
+    )
+
+    total_track_changes, track_ids = track_state_update(
+        self, update_task, session, track_factory_txs, block_number, block_timestamp
+    )
+    track_state_changed = total_track_changes > 0
+    logger.info(
+        f"index.py | track_state_update completed"
+        f" track_state_changed={track_state_changed} for block={block_number}"
+    )
+
+    total_social_feature_changes, follow_changes, reposted_item_ids = social_feature_state_update(
+        self, update_task, session, social_feature_factory_txs, block_number, block_timestamp
+    )
+    social_feature_state_changed = total_social_feature_changes > 0
+    logger.info(
+        f"index.py | social_feature_state_update completed"
+        f" social_feature_state_changed={social_feature_state_changed} for block={block_number}"
+    )
+
+    # Index UserReplicaSet changes
+    total_user_replica_set_changes, replica_user_ids = (
+        user_replica_set_state_update(
+            self,
+            update_task,
+            session,
+            user_replica_set_manager_txs,
+            block_number,
+            block_timestamp,
+            redis
+        )
+    )
+    user_replica_set_state_changed = total_user_replica_set_changes > 0
+    logger.info(
+        f"index.py | user_replica_set_state_update completed"
+        f" user_replica_set_state_changed={user_replica_set_state_changed} for block={block_number}"
+    )
+
+    # Playlist state operations processed in bulk
+    total_playlist_changes, playlist_ids = playlist_state_update(
+        self, update_task, session, playlist_factory_txs, block_number, block_timestamp
+    )
+    playlist_state_changed = total_playlist_changes > 0
+    logger.info(
+        f"index.py | playlist_state_update completed"
+        f" playlist_state_changed={playlist_state_changed} for block={block_number}"
+    )
+
+    user_library_state_changed = user_library_state_update( # pylint: disable=W0612
+        self, update_task, session, user_library_factory_txs, block_number, block_timestamp
+    )
+    logger.info(
+        f"index.py | user_library_state_update completed"
+        f" user_library_state_changed={user_library_state_changed} for block={block_number}"
+    )
+
+    track_lexeme_state_changed = (user_state_changed or track_state_changed)
+    changed_entity_ids = {"user": set(), "track": set(), "playlist": set(), "follow": follow_changes}
+    # Search dictionary rows carry user names and handles, follower counts and repost counts.
+    # Follows only change the followees' own rows, not those of their tracks and playlists.
+    changed_entity_ids["search_user"] = set(user_ids)
+    changed_entity_ids["search_follower_count"] = {followee_user_id for (_, followee_user_id) in follow_changes}
+    changed_entity_ids["search_track"] = set(track_ids) | reposted_item_ids["track"]
+    changed_entity_ids["search_playlist"] = set(playlist_ids) | reposted_item_ids["playlist"]
+    if user_state_changed and user_ids:
+        changed_entity_ids["user"].update(user_ids)
+    if user_replica_set_state_changed and replica_user_ids:
+        changed_entity_ids["user"].update(replica_user_ids)
+    if track_lexeme_state_changed and track_ids:
+        changed_entity_ids["track"].update(track_ids)
+    if playlist_state_changed and playlist_ids:
+        changed_entity_ids["playlist"].update(playlist_ids)
+    return changed_entity_ids
+
+# Entity tables reverted by revert_blocks, in revert order, as
+# (model, columns identifying an entity's versions, whether every latest version is restored on blocknumber ties)
+revert_entity_tables = [
+    (Save, ["user_id", "save_item_id", "save_type"], False),
+    (Repost, ["user_id", "repost_item_id", "repost_type"], False),
+    (Follow, ["follower_user_id", "followee_user_id"], False),
+    (Playlist, ["playlist_id"], False),
+    (Track, ["track_id"], False),
+    (URSMContentNode, ["cnode_sp_id"], False),
+    (User, ["user_id"], False),
+    # a user's associated wallets are all versioned by the same block
+    (AssociatedWallet, ["user_id"], True),
+]
+
+def revert_entity_versions(session, model, key_columns, restore_ties, revert_hashes):
+    """ Deletes every row of model indexed in revert_hashes and marks the latest remaining version
+        of each reverted entity as current, with one UPDATE and one DELETE for the whole range
+    """
+    table = model.__tablename__
+    keys = ", ".join(key_columns)
+    rank_function = "rank" if restore_ties else "row_number"
+    session.execute(
+        text(
+            f"""
+            UPDATE {table} SET is_current = true
+            FROM (
+                SELECT ctid AS version_ctid,
+                    {rank_function}() OVER (PARTITION BY {keys} ORDER BY blocknumber DESC) AS version_rank
+                FROM {table}
+                WHERE blockhash <> ALL(:revert_hashes)
+                AND ({keys}) IN (SELECT {keys} FROM {table} WHERE blockhash = ANY(:revert_hashes))
+            ) AS latest_versions
+            WHERE {table}.ctid = latest_versions.version_ctid AND latest_versions.version_rank = 1
+            """
+        ),
+        {"revert_hashes": revert_hashes}
+    )
+    deleted_entries = session.execute(
+        text(f"DELETE FROM {table} WHERE blockhash = ANY(:revert_hashes)"),
+        {"revert_hashes": revert_hashes}
+    )
+    return deleted_entries.rowcount
 
 # transactions are reverted in reverse dependency order (social features --> playlists --> tracks --> users)
 def revert_blocks(self, db, revert_blocks_list):
@@ -385,198 +776,104 @@ def revert_blocks(self, db, revert_blocks_list):
     logger.info(f"index.py | {self.request.id} | Reverting {num_revert_blocks} blocks")
     logger.info(revert_blocks_list)
 
-    with db.scoped_session() as session:
-
-        rebuild_playlist_index = False
-        rebuild_track_index = False
-        rebuild_user_index = False
+    revert_hashes = [revert_block.blockhash for revert_block in revert_blocks_list]
 
-        for revert_block in revert_blocks_list:
-            # Cache relevant information about current block
-            revert_hash = revert_block.blockhash
-            revert_block_number = revert_block.number
-            logger.info(f"Reverting {revert_block_number}")
-            parent_hash = revert_block.parenthash
+    # Blocks are listed from the current block back to the intersection, so the oldest reverted
+    # block's parent becomes current
+    parent_hash = revert_blocks_list[-1].parenthash
+    # Special case for default start block value of 0x0 / 0x0...0
+    if parent_hash == default_padded_start_hash:
+        parent_hash = default_config_start_hash
 
-            # Special case for default start block value of 0x0 / 0x0...0
-            if revert_block.parenthash == default_padded_start_hash:
-                parent_hash = default_config_start_hash
+    # Drop reverted blocks from the indexed block hash cache before they leave the db, so the
+    # cache never lists a block that is no longer indexed
+    update_task.redis.zrem(indexed_block_hashes_redis_key, *revert_hashes)
 
-            # Update newly current block row and outdated row (indicated by current block's parent hash)
-            session.query(Block).filter(Block.blockhash == revert_hash).update(
-                {"is_current": False}
-            )
-            session.query(Block).filter(Block.blockhash == parent_hash).update(
-                {"is_current": True}
+    with db.scoped_session() as session:
+        # Followee sets of users whose follows are reverted are rebuilt on their next read
+        reverted_follower_ids = [
+            follower_user_id for (follower_user_id,) in
+            session.query(Follow.follower_user_id).filter(Follow.blockhash.in_(revert_hashes)).distinct()
+        ]
+        # Aggregate counts affected by the reverted entries are recounted from the restored versions
+        reverted_aggregate_ids = get_reverted_aggregate_ids(session, revert_hashes)
+        num_reverted_entries = {}
+        for model, key_columns, restore_ties in revert_entity_tables:
+            num_reverted_entries[model.__tablename__] = revert_entity_versions(
+                session, model, key_columns, restore_ties, revert_hashes
             )
+        logger.info(f"index.py | {self.request.id} | Reverted entries {num_reverted_entries}")
+        for aggregate_table, entity_ids in reverted_aggregate_ids.items():
+            reconcile_aggregate_ids(session, aggregate_table, entity_ids)
+
+        # Remove outdated block entries and mark the intersection block as current
+        session.query(Block).filter(Block.blockhash.in_(revert_hashes)).delete(synchronize_session=False)
+        session.query(Block).filter(Block.blockhash == parent_hash).update(
+            {"is_current": True}, synchronize_session=False
+        )
 
-            # aggregate all transactions in current block
-            revert_save_entries = (
-                session.query(Save).filter(Save.blockhash == revert_hash).all()
-            )
-            revert_repost_entries = (
-                session.query(Repost).filter(Repost.blockhash == revert_hash).all()
-            )
-            revert_follow_entries = (
-                session.query(Follow).filter(Follow.blockhash == revert_hash).all()
-            )
-            revert_playlist_entries = (
-                session.query(Playlist).filter(Playlist.blockhash == revert_hash).all()
-            )
-            revert_track_entries = (
-                session.query(Track).filter(Track.blockhash == revert_hash).all()
-            )
-            revert_user_entries = (
-                session.query(User).filter(User.blockhash == revert_hash).all()
-            )
-            revert_ursm_content_node_entries = (
-                session.query(URSMContentNode).filter(URSMContentNode.blockhash == revert_hash).all()
-            )
-            revert_associated_wallets = (
-                session.query(AssociatedWallet).filter(AssociatedWallet.blockhash == revert_hash).all()
-            )
+    if reverted_follower_ids:
+        remove_cached_followee_ids(update_task.redis, reverted_follower_ids)
+    add_dirty_search_ids(
+        update_task.redis,
+        reverted_aggregate_ids[AGGREGATE_USER],
+        reverted_aggregate_ids[AGGREGATE_TRACK],
+        reverted_aggregate_ids[AGGREGATE_PLAYLIST]
+    )
 
-            # Revert all of above transactions
-            for save_to_revert in revert_save_entries:
-                save_item_id = save_to_revert.save_item_id
-                save_user_id = save_to_revert.user_id
-                save_type = save_to_revert.save_type
-                previous_save_entry = (
-                    session.query(Save)
-                    .filter(Save.user_id == save_user_id)
-                    .filter(Save.save_item_id == save_item_id)
-                    .filter(Save.save_type == save_type)
-                    .order_by(Save.blocknumber.desc())
-                    .first()
-                )
-                if previous_save_entry:
-                    previous_save_entry.is_current = True
-                # Remove outdated save item entry
-                session.delete(save_to_revert)
-
-            for repost_to_revert in revert_repost_entries:
-                repost_user_id = repost_to_revert.user_id
-                repost_item_id = repost_to_revert.repost_item_id
-                repost_type = repost_to_revert.repost_type
-                previous_repost_entry = (
-                    session.query(Repost)
-                    .filter(Repost.user_id == repost_user_id)
-                    .filter(Repost.repost_item_id == repost_item_id)
-                    .filter(Repost.repost_type == repost_type)
-                    .order_by(Repost.blocknumber.desc())
-                    .first()
-                )
-                # Update prev repost row (is_delete) to is_current == True
-                if previous_repost_entry:
-                    previous_repost_entry.is_current = True
-                # Remove outdated repost entry
-                logger.info(f"Reverting repost: {repost_to_revert}")
-                session.delete(repost_to_revert)
-
-            for follow_to_revert in revert_follow_entries:
-                previous_follow_entry = (
-                    session.query(Follow)
-                    .filter(Follow.follower_user_id == follow_to_revert.follower_user_id)
-                    .filter(Follow.followee_user_id == follow_to_revert.followee_user_id)
-                    .order_by(Follow.blocknumber.desc())
-                    .first()
-                )
-                # update prev follow row (is_delete) to is_current = true
-                if previous_follow_entry:
-                    previous_follow_entry.is_current = True
-                # remove outdated follow entry
-                logger.info(f"Reverting follow: {follow_to_revert}")
-                session.delete(follow_to_revert)
-
-            for playlist_to_revert in revert_playlist_entries:
-                playlist_id = playlist_to_revert.playlist_id
-                previous_playlist_entry = (
-                    session.query(Playlist)
-                    .filter(Playlist.playlist_id == playlist_id)
-                    .filter(Playlist.blocknumber < revert_block_number)
-                    .order_by(Playlist.blocknumber.desc())
-                    .first()
-                )
-                if previous_playlist_entry:
-                    previous_playlist_entry.is_current = True
-                # Remove outdated playlist entry
-                session.delete(playlist_to_revert)
-
-            for track_to_revert in revert_track_entries:
-                track_id = track_to_revert.track_id
-                previous_track_entry = (
-                    session.query(Track)
-                    .filter(Track.track_id == track_id)
-                    .filter(Track.blocknumber < revert_block_number)
-                    .order_by(Track.blocknumber.desc())
-                    .first()
-                )
-                if previous_track_entry:
-                    # First element in descending order is new current track item
-                    previous_track_entry.is_current = True
-                # Remove track entries
-                logger.info(f"Reverting track: {track_to_revert}")
-                session.delete(track_to_revert)
-
-            for ursm_content_node_to_revert in revert_ursm_content_node_entries:
-                cnode_sp_id = ursm_content_node_to_revert.cnode_sp_id
-                previous_ursm_content_node_entry = (
-                    session.query(URSMContentNode)
-                    .filter(URSMContentNode.cnode_sp_id == cnode_sp_id)
-                    .filter(URSMContentNode.blocknumber < revert_block_number)
-                    .order_by(URSMContentNode.blocknumber.desc())
-                    .first()
-                )
-                if previous_ursm_content_node_entry:
-                    previous_ursm_content_node_entry.is_current = True
-                # Remove previous ursm Content Node entires
-                logger.info(f"Reverting ursm Content Node: {ursm_content_node_to_revert}")
-                session.delete(ursm_content_node_to_revert)
-
-            # TODO: ASSERT ON IDS GREATER FOR BOTH DATA MODELS
-            for user_to_revert in revert_user_entries:
-                user_id = user_to_revert.user_id
-                previous_user_entry = (
-                    session.query(User)
-                    .filter(User.user_id == user_id)
-                    .filter(User.blocknumber < revert_block_number)
-                    .order_by(User.blocknumber.desc())
-                    .first()
-                )
-                if previous_user_entry:
-                    # Update previous user row, setting is_current to true
-                    previous_user_entry.is_current = True
-                # Remove outdated user entries
-                logger.info(f"Reverting user: {user_to_revert}")
-                session.delete(user_to_revert)
-
-            for associated_wallets_to_revert in revert_associated_wallets:
-                user_id = associated_wallets_to_revert.user_id
-                previous_associated_wallet_entry = (
-                    session.query(AssociatedWallet)
-                    .filter(AssociatedWallet.user_id == user_id)
-                    .filter(AssociatedWallet.blocknumber < revert_block_number)
-                    .order_by(AssociatedWallet.blocknumber.desc())
-                    .first()
-                )
-                if previous_associated_wallet_entry:
-                    session.query(AssociatedWallet).filter(
-                        AssociatedWallet.user_id == user_id
-                    ).filter(
-                        AssociatedWallet.blocknumber == previous_associated_wallet_entry.blocknumber
-                    ).update({"is_current": True})
-                # Remove outdated associated wallets
-                logger.info(f"Reverting associated Wallet: {user_id}")
-                session.delete(associated_wallets_to_revert)
-
-            # Remove outdated block entry
-            session.query(Block).filter(Block.blockhash == revert_hash).delete()
-
-            rebuild_playlist_index = rebuild_playlist_index or bool(revert_playlist_entries)
-            rebuild_track_index = rebuild_track_index or bool(revert_track_entries)
-            rebuild_user_index = rebuild_user_index or bool(revert_user_entries)
     # TODO - if we enable revert, need to set the most_recent_indexed_block_redis_key key in redis
 
+def claim_next_update_task_schedule(self, have_lock):
+    """ Returns whether this run schedules the next update_task run. Runs chain back to back,
+        and the id of the scheduled successor is kept in redis so that the watchdog runs from
+        celery beat only restart the chain after it has lapsed. The scheduled successor keeps
+        the chain going even if it misses the lock.
+    """
+    redis = update_task.redis
+    next_task_id = redis.get(next_update_task_id_redis_key)
+    if next_task_id is None:
+        return have_lock
+    return next_task_id.decode() == self.request.id
+
+def wait_for_new_block(indexed_block_number, timeout_sec):
+    """ Polls the chain head until a block past indexed_block_number is mined or timeout_sec elapses """
+    web3 = update_task.web3
+    poll_interval_sec = int(update_task.shared_config["discprov"]["chain_head_poll_interval_ms"]) / 1000
+    deadline = time.time() + timeout_sec
+    while time.time() < deadline:
+        if web3.eth.blockNumber > indexed_block_number:
+            return
+        time.sleep(poll_interval_sec)
+
+def schedule_next_update_task(self, indexing_failed, missed_lock=False):
+    """ Enqueues the next update_task run: immediately while behind the chain head, as soon as a
+        new block is mined once caught up, and after block_processing_interval_sec if this run failed.
+        If this run missed the lock, e.g. to a watchdog run that started between two chained runs,
+        the next run retries after one chain head poll interval so that the chain isn't dropped.
+    """
+    redis = update_task.redis
+    interval_sec = int(update_task.shared_config["discprov"]["block_processing_interval_sec"])
+    poll_interval_sec = int(update_task.shared_config["discprov"]["chain_head_poll_interval_ms"]) / 1000
+    next_task_id = str(uuid.uuid4())
+    # The id lapses if the next run never starts, letting the beat watchdog restart the chain
+    redis.set(next_update_task_id_redis_key, next_task_id, ex=interval_sec * 2 + 60)
+
+    countdown = 0
+    try:
+        if indexing_failed:
+            countdown = interval_sec
+        elif missed_lock:
+            countdown = poll_interval_sec
+        else:
+            indexed_block_number = redis.get(most_recent_indexed_block_redis_key)
+            if indexed_block_number is not None:
+                wait_for_new_block(int(indexed_block_number), interval_sec)
+    except Exception as e:
+        logger.error(f"index.py | update_task | Failed to wait for a new block {e}", exc_info=True)
+        countdown = interval_sec
+    finally:
+        update_task.apply_async(task_id=next_task_id, countdown=countdown)
+
 ######## CELERY TASKS ########
 @celery.task(name="update_discovery_provider", bind=True)
 def update_task(self):
@@ -592,11 +889,14 @@ def update_task(self):
 
     # Define lock acquired boolean
     have_lock = False
+    schedule_next_run = False
+    indexing_failed = False
     # Define redis lock object
     update_lock = redis.lock("disc_prov_lock", blocking_timeout=25)
     try:
         # Attempt to acquire lock - do not block if unable to acquire
         have_lock = update_lock.acquire(blocking=False)
+        schedule_next_run = claim_next_update_task_schedule(self, have_lock)
         if have_lock:
             logger.info(f"index.py | {self.request.id} | update_task | Acquired disc_prov_lock")
             initialize_blocks_table_if_necessary(db)
@@ -613,33 +913,30 @@ def update_task(self):
                 block_intersection_found = False
                 intersect_block_hash = web3.toHex(latest_block.hash)
 
+                # Fetch the blocks ahead of the current block in batches, which is all that's needed
+                # unless the chain was reorganized
+                blocks_after_current_block = get_blocks_after_current_block(session, latest_block)
+                if blocks_after_current_block is not None:
+                    index_blocks_list, intersect_block_hash = blocks_after_current_block
+                    block_intersection_found = True
+
                 # First, we capture the block hash at which the current tail
                 # and our indexed data intersect
                 while not block_intersection_found:
                     current_hash = web3.toHex(latest_block.hash)
                     parent_hash = web3.toHex(latest_block.parentHash)
 
-                    latest_block_db_query = session.query(Block).filter(
-                        Block.blockhash == current_hash
-                        and Block.parenthash == parent_hash
-                        and Block.is_current == True
-                    )
-
                     # Exit loop if we are up to date
-                    if latest_block_db_query.count() > 0:
+                    if is_indexed_block(session, current_hash):
                         block_intersection_found = True
                         intersect_block_hash = current_hash
                         continue
 
                     index_blocks_list.append(latest_block)
 
-                    parent_block_query = session.query(Block).filter(
-                        Block.blockhash == parent_hash
-                    )
-
                     # Intersection is considered found if current block parenthash is
                     # present in Blocks table
-                    block_intersection_found = parent_block_query.count() > 0
+                    block_intersection_found = is_indexed_block(session, parent_hash)
 
                     num_blocks = len(index_blocks_list)
                     if num_blocks % 50 == 0:
@@ -653,7 +950,7 @@ def update_task(self):
                         block_intersection_found = True
                         intersect_block_hash = default_config_start_hash
                     else:
-                        latest_block = web3.eth.getBlock(parent_hash, True)
+                        latest_block = web3.eth.getBlock(parent_hash, False)
                         intersect_block_hash = web3.toHex(latest_block.hash)
 
                 # Determine whether current indexed data (is_current == True) matches the
@@ -714,8 +1011,11 @@ def update_task(self):
         else:
             logger.error(f"index.py | update_task | {self.request.id} | Failed to acquire disc_prov_lock")
     except Exception as e:
+        indexing_failed = True
         logger.error(f"Fatal error in main loop {e}", exc_info=True)
         raise e
     finally:
         if have_lock:
             update_lock.release()
+        if schedule_next_run:
+            schedule_next_update_task(self, indexing_failed, missed_lock=not have_lock)
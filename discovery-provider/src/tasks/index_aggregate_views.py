@@ -1,37 +1,105 @@
 import logging
 import time
 from src.tasks.celery_app import celery
+from src.tasks.aggregate_counts import AGGREGATE_USER, AGGREGATE_TRACK, AGGREGATE_PLAYLIST, \
+    aggregate_tables, reconcile_aggregate_rows
+from src.tasks.search_dicts import add_dirty_search_ids
+from src.utils.redis_constants import aggregate_reconcile_cursor_redis_key_prefix, \
+    aggregate_reconcile_skipped_ids_redis_key_prefix
 
 logger = logging.getLogger(__name__)
 
-# Names of the aggregate tables to update
-AGGREGATE_USER = 'aggregate_user'
-AGGREGATE_TRACK = 'aggregate_track'
-AGGREGATE_PLAYLIST = 'aggregate_playlist'
+# The indexer keeps the aggregate tables up to date as it indexes each block. Each reconcile run
+# recounts the next batch of entities of every aggregate table and fixes any rows that drifted,
+# cycling through all of the entities over successive runs. Rows locked by the indexer are
+# skipped rather than waited on, and rechecked with the next batch.
+AGGREGATE_RECONCILE_BATCH_SIZE = 1000
 
-DEFAULT_UPDATE_TIMEOUT = 60
+DEFAULT_RECONCILE_TIMEOUT = 60 * 10
+
+def get_batch_end_id(session, table, start_id, batch_size):
+    """Returns the id of the last entity in the batch after start_id, or None if the batch runs to the last entity"""
+    aggregate = aggregate_tables[table]
+    id_column = aggregate["id_column"]
+    end_id = session.execute(
+        f"""
+        SELECT {id_column} FROM {aggregate["entity_table"]}
+        WHERE is_current IS TRUE AND {id_column} > :start_id
+        ORDER BY {id_column}
+        OFFSET :offset LIMIT 1
+        """,
+        {"start_id": start_id, "offset": batch_size - 1}
+    ).scalar()
+    return end_id
+
+def reconcile_aggregate_batch(db, redis, table, batch_size=AGGREGATE_RECONCILE_BATCH_SIZE):
+    """Reconciles the next batch of rows of the aggregate table, and the rows skipped by the previous batch,
+    and returns the number of rows fixed"""
+    cursor_key = f"{aggregate_reconcile_cursor_redis_key_prefix}:{table}"
+    skipped_ids_key = f"{aggregate_reconcile_skipped_ids_redis_key_prefix}:{table}"
+    start_id = int(redis.get(cursor_key) or 0)
+    retry_ids = sorted(int(entity_id) for entity_id in redis.smembers(skipped_ids_key))
+    start_time = time.time()
 
-def update_view(mat_view_name, db):
     with db.scoped_session() as session:
-        start_time = time.time()
-        logger.info(f"index_aggregate_views.py | Updating {mat_view_name}")
-        session.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {mat_view_name}")
-        logger.info(
-            f"index_aggregate_views.py | Finished updating {mat_view_name} in: {time.time()-start_time} sec"
+        end_id = get_batch_end_id(session, table, start_id, batch_size)
+        if end_id is None:
+            # also removes the rows of any ids past the last entity
+            id_filter = "({id} > :start_id OR {id} = ANY(:retry_ids))"
+        else:
+            id_filter = "(({id} > :start_id AND {id} <= :end_id) OR {id} = ANY(:retry_ids))"
+        fixed_ids, skipped_ids = reconcile_aggregate_rows(
+            session,
+            table,
+            id_filter,
+            {"start_id": start_id, "end_id": end_id, "retry_ids": retry_ids},
+            skip_locked=True
+        )
+
+    with redis.pipeline() as pipe:
+        pipe.delete(skipped_ids_key)
+        if skipped_ids:
+            pipe.sadd(skipped_ids_key, *skipped_ids)
+        pipe.execute()
+
+    # the search dictionaries copy the follower and repost counts of the fixed rows
+    if fixed_ids:
+        add_dirty_search_ids(
+            redis,
+            [],
+            fixed_ids if table == AGGREGATE_TRACK else [],
+            fixed_ids if table == AGGREGATE_PLAYLIST else [],
+            fixed_ids if table == AGGREGATE_USER else []
+        )
+
+    # start over from the first entity after the last batch
+    redis.set(cursor_key, end_id or 0)
+
+    if fixed_ids:
+        logger.warning(
+            f"index_aggregate_views.py | Fixed {len(fixed_ids)} rows of {table} "
+            f"with ids after {start_id} through {end_id or 'the last id'}"
         )
+    logger.info(
+        f"index_aggregate_views.py | Reconciled {table} ids after {start_id} through {end_id or 'the last id'} "
+        f"and {len(retry_ids)} previously skipped ids, skipping {len(skipped_ids)} locked ids, "
+        f"in: {time.time()-start_time} sec"
+    )
+    return len(fixed_ids)
 
-def update_materialized_view(db, redis, mat_view_name, timeout=DEFAULT_UPDATE_TIMEOUT):
+def reconcile_aggregates(db, redis, timeout=DEFAULT_RECONCILE_TIMEOUT):
     # Define lock acquired boolean
     have_lock = False
     # Define redis lock object
-    update_lock = redis.lock(f"refresh_mat_view:{mat_view_name}", timeout=timeout)
+    update_lock = redis.lock("reconcile_aggregates_lock", timeout=timeout)
     try:
         # Attempt to acquire lock - do not block if unable to acquire
         have_lock = update_lock.acquire(blocking=False)
         if have_lock:
-            update_view(mat_view_name, db)
+            for table in [AGGREGATE_USER, AGGREGATE_TRACK, AGGREGATE_PLAYLIST]:
+                reconcile_aggregate_batch(db, redis, table)
         else:
-            logger.info(f"index_aggregate_views.py | Failed to acquire lock refresh_mat_view:{mat_view_name}")
+            logger.info("index_aggregate_views.py | Failed to acquire lock reconcile_aggregates_lock")
     except Exception as e:
         logger.error("index_aggregate_views.py | Fatal error in main loop", exc_info=True)
         raise e
@@ -41,20 +109,8 @@ def update_materialized_view(db, redis, mat_view_name, timeout=DEFAULT_UPDATE_TI
 
 
 ######## CELERY TASKS ########
-@celery.task(name="update_aggregate_user", bind=True)
-def update_aggregate_user(self):
-    db = update_aggregate_user.db
-    redis = update_aggregate_user.redis
-    update_materialized_view(db, redis, AGGREGATE_USER)
-
-@celery.task(name="update_aggregate_track", bind=True)
-def update_aggregate_track(self):
-    db = update_aggregate_track.db
-    redis = update_aggregate_track.redis
-    update_materialized_view(db, redis, AGGREGATE_TRACK)
-
-@celery.task(name="update_aggregate_playlist", bind=True)
-def update_aggregate_playlist(self):
-    db = update_aggregate_playlist.db
-    redis = update_aggregate_playlist.redis
-    update_materialized_view(db, redis, AGGREGATE_PLAYLIST)
+@celery.task(name="reconcile_aggregates", bind=True)
+def reconcile_aggregates_task(self):
+    db = reconcile_aggregates_task.db
+    redis = reconcile_aggregates_task.redis
+    reconcile_aggregates(db, redis)
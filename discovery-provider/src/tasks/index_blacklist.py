@@ -2,9 +2,9 @@ import logging
 from src.app import contract_addresses
 from src.models import IPLDBlacklistBlock, BlacklistedIPLD
 from src.tasks.celery_app import celery
-from src.tasks.ipld_blacklist import ipld_blacklist_state_update
+from src.tasks.ipld_blacklist import ipld_blacklist_state_update, ipld_blacklist_index
 from src.utils.redis_constants import most_recent_indexed_ipld_block_redis_key, \
-    most_recent_indexed_ipld_block_hash_redis_key
+    most_recent_indexed_ipld_block_hash_redis_key, ipld_blacklist_revert_count_redis_key
 
 logger = logging.getLogger(__name__)
 
@@ -131,10 +131,13 @@ def index_blocks(self, db, blocks_list):
             if ipld_blacklist_factory_txs:
                 logger.warning(f'ipld_blacklist_factory_txs {ipld_blacklist_factory_txs}')
 
-            ipld_blacklist_state_update(
+            new_blacklisted_iplds = ipld_blacklist_state_update(
                 self, update_ipld_blacklist_task, session, ipld_blacklist_factory_txs, block_number, block_timestamp
             )
 
+        # Blacklisted iplds are visible to this process as soon as their block commits
+        ipld_blacklist_index.add(new_blacklisted_iplds)
+
         # Add the block number of the most recently processed ipld block to redis
         redis.set(most_recent_indexed_ipld_block_redis_key, block_number)
         redis.set(most_recent_indexed_ipld_block_hash_redis_key, block.hash.hex())
@@ -188,6 +191,10 @@ def revert_blocks(self, db, revert_blocks_list):
             # Remove outdated block entry
             session.query(IPLDBlacklistBlock).filter(IPLDBlacklistBlock.blockhash == revert_hash).delete()
 
+    # Reverted entries can't be applied incrementally, so signal in-memory blacklists to reload
+    if revert_blocks_list:
+        update_ipld_blacklist_task.redis.incr(ipld_blacklist_revert_count_redis_key)
+
 
 ######## CELERY TASKS ########
 
@@ -1,67 +1,77 @@
 import logging
 import time
 from src.tasks.celery_app import celery
+from src.tasks.search_dicts import add_dirty_search_ids, pop_dirty_search_ids, refresh_search_dicts, \
+    rebuild_search_dicts
 
 logger = logging.getLogger(__name__)
 
-# Vacuum can't happen inside a db txn, so we have to acquire
-# a new connection and set it's isolation level to AUTOCOMMIT
-# as per: https://stackoverflow.com/questions/1017463/postgresql-how-to-run-vacuum-from-code-outside-transaction-block
-# (note that connections have their isolation level wiped before being returned
-# to the conn pool: https://docs.sqlalchemy.org/en/14/core/connections.html
-def vacuum_matviews(db):
-    logger.info(f"index_materialized_views.py | Beginning vacuum")
-    vacuum_start = time.time()
+def update_views(self, db, redis):
+    user_ids, track_ids, playlist_ids, follower_count_user_ids = pop_dirty_search_ids(redis)
+    if not (user_ids or track_ids or playlist_ids or follower_count_user_ids):
+        return
 
-    engine = db._engine
-    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
-        connection.execute("VACUUM ANALYZE track_lexeme_dict")
-        connection.execute("VACUUM ANALYZE user_lexeme_dict")
-        connection.execute("VACUUM ANALYZE playlist_lexeme_dict")
-        connection.execute("VACUUM ANALYZE album_lexeme_dict")
+    start_time = time.time()
+    try:
+        with db.scoped_session() as session:
+            refresh_search_dicts(session, user_ids, track_ids, playlist_ids, follower_count_user_ids)
+    except Exception:
+        # leave the ids for the next run to refresh
+        add_dirty_search_ids(redis, user_ids, track_ids, playlist_ids, follower_count_user_ids)
+        raise
 
-    logger.info(f"index_materialized_views.py | vacuumed in {time.time() - vacuum_start} sec.")
+    logger.info(
+        f"index_materialized_views.py | Refreshed search dictionaries of {len(user_ids)} users, "
+        f"{len(track_ids)} tracks, {len(playlist_ids)} playlists and the follower counts of "
+        f"{len(follower_count_user_ids)} users in: {time.time() - start_time} sec."
+    )
 
-def update_views(self, db):
+def rebuild_views(self, db):
     with db.scoped_session() as session:
         start_time = time.time()
-        logger.info('index_materialized_views.py | Updating materialized views')
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY user_lexeme_dict")
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY track_lexeme_dict")
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY playlist_lexeme_dict")
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY album_lexeme_dict")
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY tag_track_user")
-        session.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY aggregate_plays")
-
-    vacuum_matviews(db)
+        logger.info('index_materialized_views.py | Rebuilding search dictionaries')
+        rebuild_search_dicts(session)
 
     logger.info(
-        f"index_materialized_views.py | Finished updating materialized views in: {time.time() - start_time} sec."
+        f"index_materialized_views.py | Finished rebuilding search dictionaries in: {time.time() - start_time} sec."
     )
 
-
-######## CELERY TASKS ########
-@celery.task(name="update_materialized_views", bind=True)
-def update_materialized_views(self):
-    # Cache custom task class properties
-    # Details regarding custom task context can be found in wiki
-    # Custom Task definition can be found in src/__init__.py
-    db = update_materialized_views.db
-    redis = update_materialized_views.redis
+def run_with_lock(redis, lock_timeout, func):
     # Define lock acquired boolean
     have_lock = False
-    # Define redis lock object
-    update_lock = redis.lock("materialized_view_lock", timeout=60*10)
+    # Define redis lock object; refreshes and rebuilds share the lock so they never overlap
+    update_lock = redis.lock("materialized_view_lock", timeout=lock_timeout)
     try:
         # Attempt to acquire lock - do not block if unable to acquire
         have_lock = update_lock.acquire(blocking=False)
         if have_lock:
-            update_views(self, db)
+            func()
         else:
-            logger.info("index_materialized_views.py | Failed to acquire update_materialized_views")
+            logger.info("index_materialized_views.py | Failed to acquire materialized_view_lock")
     except Exception as e:
         logger.error("index_materialized_views.py | Fatal error in main loop", exc_info=True)
         raise e
     finally:
         if have_lock:
             update_lock.release()
+
+
+######## CELERY TASKS ########
+@celery.task(name="update_materialized_views", bind=True)
+def update_materialized_views(self):
+    # Cache custom task class properties
+    # Details regarding custom task context can be found in wiki
+    # Custom Task definition can be found in src/__init__.py
+    db = update_materialized_views.db
+    redis = update_materialized_views.redis
+    run_with_lock(redis, 60, lambda: update_views(self, db, redis))
+
+# Not scheduled, the indexer keeps the search dictionaries up to date. Run on demand to rebuild
+# them in full, e.g. after the dirty ids in redis were lost, or after a revert removed a verified
+# user: refreshes only find impersonators by the current handles, so users named after the
+# removed handle stay out of search until the rebuild.
+@celery.task(name="rebuild_materialized_views", bind=True)
+def rebuild_materialized_views(self):
+    db = rebuild_materialized_views.db
+    redis = rebuild_materialized_views.redis
+    run_with_lock(redis, 60*30, lambda: rebuild_views(self, db))
@@ -6,6 +6,7 @@ import requests
 import dateutil.parser
 from sqlalchemy import func, desc, or_, and_
 from src.models import Play
+from src.tasks.play_counts import update_play_counts
 from src.tasks.celery_app import celery
 
 logger = logging.getLogger(__name__)
@@ -189,6 +190,7 @@ def get_track_plays(self, db, lock):
         has_lock = lock.owned()
         if plays and has_lock:
             session.bulk_save_objects(plays)
+            update_play_counts(session, plays)
 
         job_extra_info['has_lock'] = has_lock
         job_extra_info['number_rows_insert'] = len(plays)
@@ -6,6 +6,7 @@ import time
 import base58
 from sqlalchemy import desc
 from src.models import Play
+from src.tasks.play_counts import update_play_counts
 from src.tasks.celery_app import celery
 from src.utils.config import shared_config
 
@@ -93,7 +94,9 @@ def is_valid_tx(account_keys):
     logger.error(f"index_solana_plays.py | Failed to find {SECP_PROGRAM} or {SIGNER_GROUP} in {account_keys}")
     return False
 
+# Adds the plays in the given transaction to session, and returns them
 def parse_sol_play_transaction(session, solana_client, tx_sig):
+    plays = []
     try:
         tx_info = get_sol_tx_info(solana_client, tx_sig)
         logger.info(
@@ -118,20 +121,21 @@ def parse_sol_play_transaction(session, solana_client, tx_sig):
                                 f"slot: {tx_slot} "
                                 f"sig: {tx_sig}")
 
-                    session.add(
-                        Play(
-                            user_id=user_id,
-                            play_item_id=track_id,
-                            created_at=created_at,
-                            source=source,
-                            slot=tx_slot,
-                            signature=tx_sig
-                        )
+                    play = Play(
+                        user_id=user_id,
+                        play_item_id=track_id,
+                        created_at=created_at,
+                        source=source,
+                        slot=tx_slot,
+                        signature=tx_sig
                     )
+                    session.add(play)
+                    plays.append(play)
         else:
             logger.info(f"index_solana_plays.py | tx={tx_sig} Failed to find SECP_PROGRAM")
     except Exception as e:
         logger.error(f"index_solana_plays.py | Error processing {tx_sig}, {e}", exc_info=True)
+    return plays
 
 
 # Query the highest traversed solana slot
@@ -352,15 +356,18 @@ def process_solana_plays(solana_client):
                                     solana_client, tx_sig): tx_sig
                     for tx_sig in tx_sig_batch
                 }
+                batch_plays = []
                 for future in concurrent.futures.as_completed(
                         parse_sol_tx_futures):
                     try:
-                        # No return value expected here so we just ensure all futures are resolved
-                        future.result()
+                        batch_plays.extend(future.result())
                         num_txs_processed += 1
                     except Exception as exc:
                         logger.error(f"index_solana_plays.py | {exc}")
 
+                # Count the plays in the transaction that commits them
+                update_play_counts(session, batch_plays)
+
         batch_end_time = time.time()
         batch_duration = batch_end_time - batch_start_time
         logger.info(
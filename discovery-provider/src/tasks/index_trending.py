@@ -2,7 +2,8 @@ import logging
 import time
 from src.models import Track
 from src.tasks.celery_app import celery
-from src.queries.get_trending_tracks import make_trending_cache_key, generate_unpopulated_trending
+from src.queries.get_trending_tracks import make_trending_cache_key, generate_unpopulated_trending, TRENDING_LIMIT
+from src.tasks.generate_trending import generate_trending_features
 from src.utils.redis_cache import pickle_and_set
 from src.utils.redis_constants import trending_tracks_last_completion_redis_key
 from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory
@@ -86,12 +87,24 @@ def index_trending(self, db, redis):
         genres.append(None)
 
         trending_track_versions = trending_strategy_factory.get_versions_for_type(TrendingType.TRACKS).keys()
+
+        # Every genre and version's trending is derived from one snapshot of track features per time range
+        features_start_time = time.time()
+        xf_values = {
+            trending_strategy_factory.get_strategy(TrendingType.TRACKS, version).get_score_params()['xf']
+            for version in trending_track_versions
+        }
+        trending_features = generate_trending_features(session, time_ranges, TRENDING_LIMIT, xf_values)
+        logger.info(f"index_trending.py | Generated trending features in {time.time() - features_start_time} seconds")
+
         for version in trending_track_versions:
             strategy = trending_strategy_factory.get_strategy(TrendingType.TRACKS, version)
             for genre in genres:
                 for time_range in time_ranges:
                     cache_start_time = time.time()
-                    res = generate_unpopulated_trending(session, genre, time_range, strategy)
+                    res = generate_unpopulated_trending(
+                        session, genre, time_range, strategy, trending_features=trending_features
+                    )
                     key = make_trending_cache_key(time_range, genre)
                     pickle_and_set(redis, key, res)
                     cache_end_time = time.time()
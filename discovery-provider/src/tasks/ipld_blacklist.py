@@ -1,46 +1,96 @@
 import logging
-from src.app import contract_addresses
 from src.utils import helpers
 from src.models import BlacklistedIPLD
+from src.utils.redis_constants import most_recent_indexed_ipld_block_redis_key, \
+    ipld_blacklist_revert_count_redis_key
 
 logger = logging.getLogger(__name__)
 
 
-def ipld_blacklist_state_update(self, task, session, ipld_blacklist_factory_txs, block_number, block_timestamp):
-    ipld_blacklist_abi = task.abi_values["IPLDBlacklistFactory"]["abi"]
-    ipld_blacklist_contract = task.web3.eth.contract(
-        address=contract_addresses["ipld_blacklist_factory"], abi=ipld_blacklist_abi
-    )
+class IPLDBlacklistIndex:
+    """ Process-local set of blacklisted CIDs.
+
+        The set is versioned by the most recently indexed ipld blacklist block. refresh loads only
+        the rows added since the loaded block, and reloads everything after update_ipld_blacklist_task
+        reverts blocks. Until the first refresh, lookups fall back to querying ipld_blacklists.
+    """
+
+    def __init__(self):
+        self._iplds = set()
+        self._block_number = None
+        self._revert_count = None
+        self._loaded = False
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def refresh(self, session, redis):
+        with redis.pipeline() as pipe:
+            pipe.get(most_recent_indexed_ipld_block_redis_key)
+            pipe.get(ipld_blacklist_revert_count_redis_key)
+            block_number, revert_count = pipe.execute()
+        block_number = int(block_number) if block_number is not None else None
+
+        if not self._loaded or revert_count != self._revert_count:
+            blacklist_query = session.query(BlacklistedIPLD.ipld)
+            self._iplds = {ipld for (ipld,) in blacklist_query.all()}
+            logger.info(f"ipld_blacklist.py | Loaded {len(self._iplds)} blacklisted iplds")
+        elif block_number is not None and (self._block_number is None or block_number > self._block_number):
+            blacklist_query = session.query(BlacklistedIPLD.ipld)
+            if self._block_number is not None:
+                blacklist_query = blacklist_query.filter(BlacklistedIPLD.blocknumber > self._block_number)
+            self._iplds.update(ipld for (ipld,) in blacklist_query.all())
+        else:
+            return
+
+        # redis is only updated after the ipld blacklist block commits, so every row up to
+        # block_number has been loaded
+        self._block_number = block_number
+        self._revert_count = revert_count
+        self._loaded = True
 
-    total_new_ipld_blacklist_events = 0
+    def add(self, iplds):
+        self._iplds.update(iplds)
+
+    def __contains__(self, ipld):
+        return ipld in self._iplds
+
+
+ipld_blacklist_index = IPLDBlacklistIndex()
+
+
+def ipld_blacklist_state_update(self, task, session, ipld_blacklist_factory_txs, block_number, block_timestamp):
+    new_blacklisted_iplds = []
     for tx_receipt in ipld_blacklist_factory_txs:
-        num_new_ipld_blacklist_events = add_to_blacklist(
-            self, ipld_blacklist_contract, task, session, tx_receipt, block_number, block_timestamp
+        tx_events = task.event_decoder.decode_receipt("IPLDBlacklistFactory", tx_receipt)
+        new_blacklisted_iplds.extend(
+            add_to_blacklist(self, tx_events, task, session, tx_receipt, block_number, block_timestamp)
         )
 
-        num_new_ipld_blacklist_events += num_new_ipld_blacklist_events
-
-    return total_new_ipld_blacklist_events
+    return new_blacklisted_iplds
 
 
-def add_to_blacklist(self, ipld_blacklist_contract, task, session, tx_receipt, block_number, block_timestamp):
+def add_to_blacklist(self, tx_events, task, session, tx_receipt, block_number, block_timestamp):
     # Handle AddIPLDToBlacklist event
-    new_ipld_blacklist_event = ipld_blacklist_contract.events.AddIPLDToBlacklist().processReceipt(tx_receipt)
+    new_ipld_blacklist_event = tx_events.get("AddIPLDToBlacklist", [])
+    new_blacklisted_iplds = []
     for entry in new_ipld_blacklist_event:
         event_blockhash = task.web3.toHex(entry.blockHash)
         event_args = entry["args"]
+        ipld = helpers.multihash_digest_to_cid(event_args._multihashDigest)
 
         ipld_blacklist_model = BlacklistedIPLD(
             blockhash=event_blockhash,
             blocknumber=block_number,
-            ipld=helpers.multihash_digest_to_cid(event_args._multihashDigest),
+            ipld=ipld,
             is_blacklisted=True,
             is_current=True
         )
 
         ipld_blacklist_exists = (
             session.query(BlacklistedIPLD)
-            .filter_by(blockhash=event_blockhash, ipld=helpers.multihash_digest_to_cid(event_args._multihashDigest))
+            .filter_by(blockhash=event_blockhash, ipld=ipld)
             .count()
             > 0
         )
@@ -48,9 +98,12 @@ def add_to_blacklist(self, ipld_blacklist_contract, task, session, tx_receipt, b
         if ipld_blacklist_exists:
             continue
         session.add(ipld_blacklist_model)
-    return len(new_ipld_blacklist_event)
+        new_blacklisted_iplds.append(ipld)
+    return new_blacklisted_iplds
 
 def is_blacklisted_ipld(session, ipld_blacklist_multihash):
+    if ipld_blacklist_index.loaded:
+        return ipld_blacklist_multihash in ipld_blacklist_index
     ipld_blacklist_entry = (
         session.query(BlacklistedIPLD).filter(BlacklistedIPLD.ipld == ipld_blacklist_multihash)
     )
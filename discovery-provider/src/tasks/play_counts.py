@@ -0,0 +1,53 @@
+import logging
+from collections import Counter
+from datetime import datetime
+import dateutil.parser
+from sqlalchemy.dialects.postgresql import insert
+from src.models import AggregatePlays, HourlyPlayCounts
+
+logger = logging.getLogger(__name__)
+
+
+def get_play_count_hour(created_at):
+    """Returns the hour_timestamp of the hourly play count bucket a play created at created_at counts toward"""
+    if isinstance(created_at, str):
+        created_at = dateutil.parser.parse(created_at)
+    return created_at.replace(microsecond=0, second=0, minute=0, tzinfo=None)
+
+
+def update_play_counts(session, plays):
+    """Adds plays to the hourly and total play counts of their tracks.
+
+    Call in the transaction that inserts the plays so that the counts always match the plays table.
+    Rows are upserted in key order so that concurrent play indexers can't deadlock.
+    """
+    if not plays:
+        return
+
+    hourly_counts = Counter(
+        (play.play_item_id, get_play_count_hour(play.created_at or datetime.utcnow())) for play in plays
+    )
+    total_counts = Counter(play.play_item_id for play in plays)
+
+    hourly_insert = insert(HourlyPlayCounts.__table__).values([
+        {"play_item_id": play_item_id, "hour_timestamp": hour_timestamp, "play_count": play_count}
+        for ((play_item_id, hour_timestamp), play_count) in sorted(hourly_counts.items())
+    ])
+    session.execute(hourly_insert.on_conflict_do_update(
+        index_elements=['play_item_id', 'hour_timestamp'],
+        set_={"play_count": HourlyPlayCounts.play_count + hourly_insert.excluded.play_count}
+    ))
+
+    total_insert = insert(AggregatePlays.__table__).values([
+        {"play_item_id": play_item_id, "count": count}
+        for (play_item_id, count) in sorted(total_counts.items())
+    ])
+    session.execute(total_insert.on_conflict_do_update(
+        index_elements=['play_item_id'],
+        set_={"count": AggregatePlays.__table__.c["count"] + total_insert.excluded["count"]}
+    ))
+
+    logger.info(
+        f"play_counts.py | Updated play counts of {len(total_counts)} tracks "
+        f"in {len(hourly_counts)} hours for {len(plays)} plays"
+    )
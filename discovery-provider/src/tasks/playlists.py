@@ -1,11 +1,11 @@
 import logging
 from datetime import datetime
 from sqlalchemy.orm.session import make_transient
-from src.app import contract_addresses
 from src.utils import helpers
 from src.models import Playlist
 from src.utils.playlist_event_constants import playlist_event_types_arr, playlist_event_types_lookup
 from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.aggregate_counts import AGGREGATE_PLAYLIST, reconcile_aggregate_ids, update_user_content_counts
 
 logger = logging.getLogger(__name__)
 
@@ -21,18 +21,27 @@ def playlist_state_update(
     if not playlist_factory_txs:
         return num_total_changes, playlist_ids
 
-    playlist_abi = update_task.abi_values["PlaylistFactory"]["abi"]
-    playlist_contract = update_task.web3.eth.contract(
-        address=contract_addresses["playlist_factory"], abi=playlist_abi
+    # decode every log in each tx once, then load the current rows of all playlists touched
+    # in this block with a single query
+    decoded_playlist_factory_txs = [
+        (tx_receipt, update_task.event_decoder.decode_receipt("PlaylistFactory", tx_receipt))
+        for tx_receipt in playlist_factory_txs
+    ]
+    current_playlist_records = get_current_playlist_records(
+        session,
+        {
+            entry["args"]._playlistId
+            for _, playlist_events in decoded_playlist_factory_txs
+            for event_type in playlist_event_types_arr
+            for entry in playlist_events.get(event_type, [])
+        }
     )
 
     playlist_events_lookup = {}
-    for tx_receipt in playlist_factory_txs:
+    for tx_receipt, playlist_events in decoded_playlist_factory_txs:
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in playlist_event_types_arr:
-            playlist_events_tx = getattr(
-                playlist_contract.events, event_type
-            )().processReceipt(tx_receipt)
+            playlist_events_tx = playlist_events.get(event_type, [])
             processedEntries = 0 # if record does not get added, do not count towards num_total_changes
             for entry in playlist_events_tx:
                 playlist_id = entry["args"]._playlistId
@@ -40,7 +49,7 @@ def playlist_state_update(
 
                 if playlist_id not in playlist_events_lookup:
                     existing_playlist_entry = lookup_playlist_record(
-                        update_task, session, entry, block_number, txhash
+                        update_task, session, entry, block_number, txhash, current_playlist_records
                     )
                     playlist_events_lookup[playlist_id] = {
                         "playlist": existing_playlist_entry,
@@ -66,39 +75,63 @@ def playlist_state_update(
 
     logger.info(f"index.py | playlists.py | There are {num_total_changes} events processed.")
 
+    changed_playlist_ids = []
+    changed_playlist_records = []
     for playlist_id, value_obj in playlist_events_lookup.items():
         logger.info(f"index.py | playlists.py | Adding {value_obj['playlist']})")
         if value_obj["events"]:
-            invalidate_old_playlist(session, playlist_id)
-            session.add(value_obj["playlist"])
+            changed_playlist_ids.append(playlist_id)
+            changed_playlist_records.append(value_obj["playlist"])
+
+    invalidate_old_playlists(session, changed_playlist_ids, current_playlist_records)
+    session.add_all(changed_playlist_records)
+
+    # add, update and remove the aggregate rows of the changed playlists, and recount their owners' playlists
+    reconcile_aggregate_ids(session, AGGREGATE_PLAYLIST, changed_playlist_ids)
+    update_user_content_counts(
+        session,
+        {playlist.playlist_owner_id for playlist in changed_playlist_records} |
+        {
+            current_playlist_records[playlist_id].playlist_owner_id
+            for playlist_id in changed_playlist_ids if playlist_id in current_playlist_records
+        }
+    )
 
     return num_total_changes, playlist_ids
 
 
-def lookup_playlist_record(update_task, session, entry, block_number, txhash):
-    event_blockhash = update_task.web3.toHex(entry.blockHash)
-    event_args = entry["args"]
-    playlist_id = event_args._playlistId
+def get_current_playlist_records(session, playlist_ids):
+    """Return {playlist_id: Playlist} for the current row of each playlist id, loaded with one query."""
+    if not playlist_ids:
+        return {}
 
-    # Check if playlist record is in the DB
-    playlist_exists = (
-        session.query(Playlist).filter_by(playlist_id=event_args._playlistId).count()
-        > 0
+    playlist_records = (
+        session.query(Playlist)
+        .filter(Playlist.playlist_id.in_(playlist_ids), Playlist.is_current == True)
+        .all()
     )
 
-    playlist_record = None
-    if playlist_exists:
-        playlist_record = (
-            session.query(Playlist)
-            .filter(Playlist.playlist_id == playlist_id, Playlist.is_current == True)
-            .first()
-        )
-
+    current_playlist_records = {}
+    for playlist_record in playlist_records:
         # expunge the result from sqlalchemy so we can modify it without UPDATE statements being made
         # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
         session.expunge(playlist_record)
         make_transient(playlist_record)
-    else:
+        current_playlist_records[playlist_record.playlist_id] = playlist_record
+    return current_playlist_records
+
+
+def lookup_playlist_record(update_task, session, entry, block_number, txhash, current_playlist_records=None):
+    event_blockhash = update_task.web3.toHex(entry.blockHash)
+    event_args = entry["args"]
+    playlist_id = event_args._playlistId
+
+    # Check if playlist record is in the DB
+    if current_playlist_records is None:
+        current_playlist_records = get_current_playlist_records(session, [playlist_id])
+
+    playlist_record = current_playlist_records.get(playlist_id)
+    if playlist_record is None:
         playlist_record = Playlist(
             playlist_id=playlist_id,
             is_current=True,
@@ -113,22 +146,22 @@ def lookup_playlist_record(update_task, session, entry, block_number, txhash):
     return playlist_record
 
 
-def invalidate_old_playlist(session, playlist_id):
-    # check if playlist id is in db
-    playlist_exists = (
-        session.query(Playlist).filter_by(playlist_id=playlist_id).count() > 0
-    )
+def invalidate_old_playlists(session, playlist_ids, current_playlist_records):
+    if not playlist_ids:
+        return
 
-    if playlist_exists:
-        # Update existing record in db to is_current = False
-        num_invalidated_playlists = (
-            session.query(Playlist)
-            .filter(Playlist.playlist_id == playlist_id, Playlist.is_current == True)
-            .update({"is_current": False})
-        )
-        assert (
-            num_invalidated_playlists > 0
-        ), "Update operation requires a current playlist to be invalidated"
+    # Update all existing records in db to is_current = False in one statement
+    num_invalidated_playlists = (
+        session.query(Playlist)
+        .filter(Playlist.playlist_id.in_(playlist_ids), Playlist.is_current == True)
+        .update({"is_current": False}, synchronize_session=False)
+    )
+    num_existing_playlists = len(
+        [playlist_id for playlist_id in playlist_ids if playlist_id in current_playlist_records]
+    )
+    assert (
+        num_invalidated_playlists >= num_existing_playlists
+    ), "Update operation requires a current playlist to be invalidated"
 
 
 def parse_playlist_event(
@@ -0,0 +1,241 @@
+import logging
+from src.utils.redis_constants import search_dirty_user_ids_redis_key, search_dirty_track_ids_redis_key, \
+    search_dirty_playlist_ids_redis_key, search_dirty_follower_count_user_ids_redis_key
+
+logger = logging.getLogger(__name__)
+
+# Users whose name is the handle of a different verified user are left out of search
+not_impersonator_sql = """
+    NOT EXISTS (
+        SELECT 1 FROM users v
+        WHERE v.is_current IS TRUE AND v.is_verified IS TRUE
+        AND v.handle_lc = lower(u.name) AND v.user_id != u.user_id
+    )
+"""
+
+user_words_sql = f"""
+    SELECT
+        u.user_id,
+        lower(u.name) as user_name,
+        lower(u.handle) as handle,
+        a.follower_count as follower_count,
+        unnest(
+            tsvector_to_array(
+                to_tsvector(
+                    'audius_ts_config',
+                    replace(COALESCE(u.name, ''), '&', 'and')
+                ) ||
+                to_tsvector(
+                    'audius_ts_config',
+                    COALESCE(u.handle, '')
+                )
+            ) || lower(COALESCE(u.name, ''))
+        ) as word
+    FROM
+        users u
+    INNER JOIN aggregate_user a on a.user_id = u.user_id
+    WHERE u.is_current IS TRUE AND {not_impersonator_sql} AND {{id_filter}}
+    GROUP BY u.user_id, u.name, u.handle, a.follower_count
+"""
+
+track_words_sql = f"""
+    SELECT
+        t.track_id,
+        t.owner_id as owner_id,
+        lower(t.title) as track_title,
+        lower(u.handle) as handle,
+        lower(u.name) as user_name,
+        a.repost_count as repost_count,
+        unnest(
+            tsvector_to_array(
+                to_tsvector(
+                    'audius_ts_config',
+                    replace(COALESCE(t."title", ''), '&', 'and')
+                )
+            ) || lower(COALESCE(t."title", ''))
+        ) as word
+    FROM
+        tracks t
+    INNER JOIN users u ON t.owner_id = u.user_id
+    INNER JOIN aggregate_track a on a.track_id = t.track_id
+    WHERE t.is_current IS TRUE AND t.is_unlisted IS FALSE AND t.is_delete IS FALSE AND t.stem_of IS NULL
+    AND u.is_current IS TRUE AND {not_impersonator_sql} AND {{id_filter}}
+    GROUP BY t.track_id, t.title, t.owner_id, u.handle, u.name, a.repost_count
+"""
+
+playlist_words_sql = f"""
+    SELECT
+        p.playlist_id,
+        lower(p.playlist_name) as playlist_name,
+        p.playlist_owner_id as owner_id,
+        lower(u.handle) as handle,
+        lower(u.name) as user_name,
+        a.repost_count as repost_count,
+        unnest(
+            tsvector_to_array(
+                to_tsvector(
+                    'audius_ts_config',
+                    replace(COALESCE(p.playlist_name, ''), '&', 'and')
+                )
+            ) || lower(COALESCE(p.playlist_name, ''))
+        ) as word
+    FROM
+        playlists p
+    INNER JOIN users u ON p.playlist_owner_id = u.user_id
+    INNER JOIN aggregate_playlist a on a.playlist_id = p.playlist_id
+    WHERE p.is_current IS TRUE AND p.is_album IS {{is_album}} AND p.is_private IS FALSE AND p.is_delete IS FALSE
+    AND u.is_current IS TRUE AND {not_impersonator_sql} AND {{id_filter}}
+    GROUP BY p.playlist_id, p.playlist_name, p.playlist_owner_id, u.handle, u.name, a.repost_count
+"""
+
+track_tags_sql = """
+    SELECT tag, track_id, owner_id
+    FROM (
+        SELECT
+            unnest(string_to_array(lower(t.tags), ',')) AS tag,
+            t.track_id,
+            t.owner_id
+        FROM
+            tracks t
+        WHERE
+            t.tags <> ''
+            AND t.tags IS NOT NULL
+            AND t.is_current IS TRUE
+            AND t.is_unlisted IS FALSE
+            AND t.stem_of IS NULL
+            AND {id_filter}
+    ) AS t
+    GROUP BY tag, track_id, owner_id
+"""
+
+# The search dictionaries, with the query for their rows and the conditions that select the rows of
+# the users (:user_ids), tracks (:track_ids) and playlists (:playlist_ids) being refreshed, in the query and
+# in the stored table. The rows of a user's tracks and playlists carry the user's name and handle, while
+# follower counts only appear in the user's own rows (:follower_count_user_ids).
+search_dicts = [
+    {
+        "table": "user_lexeme_dict",
+        "columns": ["user_id", "user_name", "handle", "follower_count", "word"],
+        "query": user_words_sql,
+        "id_filter": "(u.user_id = ANY(:user_ids) OR u.user_id = ANY(:follower_count_user_ids))",
+        "stored_id_filter": "(user_id = ANY(:user_ids) OR user_id = ANY(:follower_count_user_ids))"
+    },
+    {
+        "table": "track_lexeme_dict",
+        "columns": ["track_id", "owner_id", "track_title", "handle", "user_name", "repost_count", "word"],
+        "query": track_words_sql,
+        "id_filter": "(t.track_id = ANY(:track_ids) OR t.owner_id = ANY(:user_ids))",
+        "stored_id_filter": "(track_id = ANY(:track_ids) OR owner_id = ANY(:user_ids))"
+    },
+    {
+        "table": "playlist_lexeme_dict",
+        "columns": ["playlist_id", "playlist_name", "owner_id", "handle", "user_name", "repost_count", "word"],
+        "query": playlist_words_sql.replace("{is_album}", "FALSE"),
+        "id_filter": "(p.playlist_id = ANY(:playlist_ids) OR p.playlist_owner_id = ANY(:user_ids))",
+        "stored_id_filter": "(playlist_id = ANY(:playlist_ids) OR owner_id = ANY(:user_ids))"
+    },
+    {
+        "table": "album_lexeme_dict",
+        "columns": ["playlist_id", "playlist_name", "owner_id", "handle", "user_name", "repost_count", "word"],
+        "query": playlist_words_sql.replace("{is_album}", "TRUE"),
+        "id_filter": "(p.playlist_id = ANY(:playlist_ids) OR p.playlist_owner_id = ANY(:user_ids))",
+        "stored_id_filter": "(playlist_id = ANY(:playlist_ids) OR owner_id = ANY(:user_ids))"
+    },
+    {
+        "table": "tag_track_user",
+        "columns": ["tag", "track_id", "owner_id"],
+        "query": track_tags_sql,
+        "id_filter": "t.track_id = ANY(:track_ids)",
+        "stored_id_filter": "track_id = ANY(:track_ids)"
+    }
+]
+
+
+def get_search_dict_query(search_dict, id_filter="TRUE"):
+    """Returns the query for the rows of the search dictionary matching id_filter"""
+    return search_dict["query"].replace("{id_filter}", id_filter)
+
+
+def insert_search_dict_rows(session, search_dict, id_filter, params=None):
+    columns = ", ".join(search_dict["columns"])
+    session.execute(
+        f"""
+        INSERT INTO {search_dict["table"]} ({columns})
+        SELECT {columns} FROM ({get_search_dict_query(search_dict, id_filter)}) AS search_dict_rows
+        """,
+        params
+    )
+
+
+def get_impersonator_ids(session, user_ids):
+    """Returns the ids of the users named after the handles of user_ids, whose words are left out of search
+    depending on whether those users are verified. Handles are only set when a user is added, so only the
+    current handles are matched; users named after a handle removed by a revert wait for a full rebuild."""
+    return {
+        user_id for (user_id,) in session.execute(
+            """
+            SELECT u.user_id FROM users u
+            WHERE u.is_current IS TRUE AND lower(u.name) IN (
+                SELECT v.handle_lc FROM users v WHERE v.is_current IS TRUE AND v.user_id = ANY(:user_ids)
+            )
+            """,
+            {"user_ids": user_ids}
+        )
+    }
+
+
+def refresh_search_dicts(session, user_ids, track_ids, playlist_ids, follower_count_user_ids=()):
+    """Rebuilds the search dictionary rows of the given users, tracks and playlists, and of the tracks and
+    playlists of the given users. Only the user rows of follower_count_user_ids are rebuilt."""
+    user_ids = sorted(set(user_ids))
+    if user_ids:
+        user_ids = sorted(set(user_ids) | get_impersonator_ids(session, user_ids))
+    params = {
+        "user_ids": user_ids,
+        "track_ids": sorted(set(track_ids)),
+        "playlist_ids": sorted(set(playlist_ids)),
+        "follower_count_user_ids": sorted(set(follower_count_user_ids))
+    }
+
+    for search_dict in search_dicts:
+        session.execute(f"DELETE FROM {search_dict['table']} WHERE {search_dict['stored_id_filter']}", params)
+        insert_search_dict_rows(session, search_dict, search_dict["id_filter"], params)
+
+
+def rebuild_search_dicts(session):
+    """Rebuilds every row of the search dictionaries. Only needed on demand, to recover from lost refreshes."""
+    for search_dict in search_dicts:
+        # DELETE rather than TRUNCATE so searches keep reading the old rows until the rebuild commits
+        session.execute(f"DELETE FROM {search_dict['table']}")
+        insert_search_dict_rows(session, search_dict, "TRUE")
+
+
+def add_dirty_search_ids(redis, user_ids, track_ids, playlist_ids, follower_count_user_ids=()):
+    """Marks the users, tracks and playlists whose search dictionary rows need to be refreshed, and the users
+    whose follower counts changed"""
+    pipe = redis.pipeline()
+    for key, ids in [
+            (search_dirty_user_ids_redis_key, user_ids),
+            (search_dirty_track_ids_redis_key, track_ids),
+            (search_dirty_playlist_ids_redis_key, playlist_ids),
+            (search_dirty_follower_count_user_ids_redis_key, follower_count_user_ids)
+    ]:
+        if ids:
+            pipe.sadd(key, *ids)
+    pipe.execute()
+
+
+def pop_dirty_search_ids(redis):
+    """Returns and clears the (user_ids, track_ids, playlist_ids, follower_count_user_ids) marked by
+    add_dirty_search_ids"""
+    pipe = redis.pipeline()
+    for key in [
+            search_dirty_user_ids_redis_key,
+            search_dirty_track_ids_redis_key,
+            search_dirty_playlist_ids_redis_key,
+            search_dirty_follower_count_user_ids_redis_key
+    ]:
+        pipe.smembers(key)
+        pipe.delete(key)
+    results = pipe.execute()
+    return tuple({int(entity_id) for entity_id in ids} for ids in results[::2])
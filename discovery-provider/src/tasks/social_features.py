@@ -1,7 +1,8 @@
 import logging
 from datetime import datetime
-from src.app import contract_addresses
-from src.models import Repost, RepostType, Follow, Playlist
+from src.models import Repost, RepostType, Follow, Playlist, AggregateUser, AggregateTrack, AggregatePlaylist
+from src.tasks.aggregate_counts import get_count_change, get_count_deltas, update_aggregate_counts, \
+    invalidate_current_row
 
 logger = logging.getLogger(__name__)
 
@@ -9,17 +10,16 @@ logger = logging.getLogger(__name__)
 def social_feature_state_update(
         self, update_task, session, social_feature_factory_txs, block_number, block_timestamp
 ):
-    """Return int representing number of social feature related state changes in this transaction"""
+    """Return int representing number of social feature related state changes in this transaction,
+    the follow changes as {(follower_user_id, followee_user_id): is_delete},
+    and the ids of the reposted items as {"track": track_ids, "playlist": playlist_ids}"""
 
     num_total_changes = 0
+    follow_changes = {}
+    reposted_item_ids = {"track": set(), "playlist": set()}
     if not social_feature_factory_txs:
-        return num_total_changes
+        return num_total_changes, follow_changes, reposted_item_ids
 
-    social_feature_factory_abi = update_task.abi_values["SocialFeatureFactory"]["abi"]
-    social_feature_factory_contract = update_task.web3.eth.contract(
-        address=contract_addresses["social_feature_factory"],
-        abi=social_feature_factory_abi,
-    )
     block_datetime = datetime.utcfromtimestamp(block_timestamp)
 
     # stores net state changes of all reposts and follows and corresponding events in current block
@@ -31,9 +31,11 @@ def social_feature_state_update(
     follow_state_changes = {}
 
     for tx_receipt in social_feature_factory_txs:
+        # decode every log in the tx once and hand the decoded events to each handler
+        tx_events = update_task.event_decoder.decode_receipt("SocialFeatureFactory", tx_receipt)
         add_track_repost(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -43,7 +45,7 @@ def social_feature_state_update(
         )
         delete_track_repost(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -53,7 +55,7 @@ def social_feature_state_update(
         )
         add_playlist_repost(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -63,7 +65,7 @@ def social_feature_state_update(
         )
         delete_playlist_repost(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -73,7 +75,7 @@ def social_feature_state_update(
         )
         add_follow(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -83,7 +85,7 @@ def social_feature_state_update(
         )
         delete_follow(
             self,
-            social_feature_factory_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -92,71 +94,78 @@ def social_feature_state_update(
             follow_state_changes,
         )
 
-    # bulk process all repost and follow changes
+    # bulk process all repost and follow changes, and apply the resulting changes to the aggregate counts
+    user_count_deltas = get_count_deltas()
+    track_count_deltas = get_count_deltas()
+    playlist_count_deltas = get_count_deltas()
 
     for repost_user_id in track_repost_state_changes:
         for repost_track_id in track_repost_state_changes[repost_user_id]:
-            invalidate_old_repost(session, repost_user_id, repost_track_id, RepostType.track)
-            session.add(track_repost_state_changes[repost_user_id][repost_track_id])
+            repost = track_repost_state_changes[repost_user_id][repost_track_id]
+            was_reposted = invalidate_old_repost(session, repost_user_id, repost_track_id, RepostType.track)
+            session.add(repost)
+            count_change = get_count_change(was_reposted, repost.is_delete)
+            user_count_deltas[repost_user_id]["repost_count"] += count_change
+            track_count_deltas[repost_track_id]["repost_count"] += count_change
         num_total_changes += len(track_repost_state_changes[repost_user_id])
 
     for repost_user_id in playlist_repost_state_changes:
         for repost_playlist_id in playlist_repost_state_changes[repost_user_id]:
-            invalidate_old_repost(
-                session,
-                repost_user_id,
-                repost_playlist_id,
-                playlist_repost_state_changes[repost_user_id][repost_playlist_id].repost_type
-            )
-            session.add(playlist_repost_state_changes[repost_user_id][repost_playlist_id])
+            repost = playlist_repost_state_changes[repost_user_id][repost_playlist_id]
+            was_reposted = invalidate_old_repost(session, repost_user_id, repost_playlist_id, repost.repost_type)
+            session.add(repost)
+            count_change = get_count_change(was_reposted, repost.is_delete)
+            user_count_deltas[repost_user_id]["repost_count"] += count_change
+            playlist_count_deltas[repost_playlist_id]["repost_count"] += count_change
         num_total_changes += len(playlist_repost_state_changes[repost_user_id])
 
     for follower_user_id in follow_state_changes:
         for followee_user_id in follow_state_changes[follower_user_id]:
-            invalidate_old_follow(session, follower_user_id, followee_user_id)
-            session.add(follow_state_changes[follower_user_id][followee_user_id])
+            was_following = invalidate_old_follow(session, follower_user_id, followee_user_id)
+            follow = follow_state_changes[follower_user_id][followee_user_id]
+            session.add(follow)
+            follow_changes[(follower_user_id, followee_user_id)] = follow.is_delete
+            count_change = get_count_change(was_following, follow.is_delete)
+            user_count_deltas[follower_user_id]["following_count"] += count_change
+            user_count_deltas[followee_user_id]["follower_count"] += count_change
         num_total_changes += len(follow_state_changes[follower_user_id])
 
-    return num_total_changes
+    update_aggregate_counts(session, AggregateUser, user_count_deltas)
+    update_aggregate_counts(session, AggregateTrack, track_count_deltas)
+    update_aggregate_counts(session, AggregatePlaylist, playlist_count_deltas)
+
+    reposted_item_ids["track"].update(track_count_deltas.keys())
+    reposted_item_ids["playlist"].update(playlist_count_deltas.keys())
+    return num_total_changes, follow_changes, reposted_item_ids
 
 
 ######## HELPERS ########
 
 
 def invalidate_old_repost(session, repost_user_id, repost_item_id, repost_type):
-    # update existing db entry to is_current = False
-    num_invalidated_repost_entries = (
-        session.query(Repost)
-        .filter(
-            Repost.user_id == repost_user_id,
-            Repost.repost_item_id == repost_item_id,
-            Repost.repost_type == repost_type,
-            Repost.is_current == True
-        )
-        .update({"is_current": False})
+    # update existing db entry to is_current = False, returning whether the user had reposted the item
+    return invalidate_current_row(
+        session,
+        Repost,
+        Repost.user_id == repost_user_id,
+        Repost.repost_item_id == repost_item_id,
+        Repost.repost_type == repost_type
     )
-    # TODO - after on-chain storage is implemented, assert num_invalidated_repost_entries > 0
-    return num_invalidated_repost_entries
 
 
 def invalidate_old_follow(session, follower_user_id, followee_user_id):
-    # update existing db entry to is_current = False
-    num_invalidated_follow_entries = (
-        session.query(Follow)
-        .filter(
-            Follow.follower_user_id == follower_user_id,
-            Follow.followee_user_id == followee_user_id,
-            Follow.is_current == True
-        )
-        .update({"is_current": False})
+    # update existing db entry to is_current = False, returning whether the follower was following the followee
+    return invalidate_current_row(
+        session,
+        Follow,
+        Follow.follower_user_id == follower_user_id,
+        Follow.followee_user_id == followee_user_id
     )
-    # TODO - after on-chain storage is implemented, assert num_invalidated_follow_entries > 0
-    return num_invalidated_follow_entries
 
 
 def add_track_repost(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -165,9 +174,7 @@ def add_track_repost(
         track_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_track_repost_events = social_feature_factory_contract.events.TrackRepostAdded().processReceipt(
-        tx_receipt
-    )
+    new_track_repost_events = tx_events.get("TrackRepostAdded", [])
     for event in new_track_repost_events:
         event_args = event["args"]
         repost_user_id = event_args._userId
@@ -196,7 +203,7 @@ def add_track_repost(
 
 def delete_track_repost(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -205,9 +212,7 @@ def delete_track_repost(
         track_repost_state_changes
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_repost_events = social_feature_factory_contract.events.TrackRepostDeleted().processReceipt(
-        tx_receipt
-    )
+    new_repost_events = tx_events.get("TrackRepostDeleted", [])
     for event in new_repost_events:
         event_args = event["args"]
         repost_user_id = event_args._userId
@@ -236,7 +241,7 @@ def delete_track_repost(
 
 def add_playlist_repost(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -245,9 +250,7 @@ def add_playlist_repost(
         playlist_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_playlist_repost_events = social_feature_factory_contract.events.PlaylistRepostAdded().processReceipt(
-        tx_receipt
-    )
+    new_playlist_repost_events = tx_events.get("PlaylistRepostAdded", [])
     for event in new_playlist_repost_events:
         event_args = event["args"]
         repost_user_id = event_args._userId
@@ -285,7 +288,7 @@ def add_playlist_repost(
 
 def delete_playlist_repost(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -294,9 +297,7 @@ def delete_playlist_repost(
         playlist_repost_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_playlist_repost_events = social_feature_factory_contract.events.PlaylistRepostDeleted().processReceipt(
-        tx_receipt
-    )
+    new_playlist_repost_events = tx_events.get("PlaylistRepostDeleted", [])
     for event in new_playlist_repost_events:
         event_args = event["args"]
         repost_user_id = event_args._userId
@@ -334,7 +335,7 @@ def delete_playlist_repost(
 
 def add_follow(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -343,7 +344,7 @@ def add_follow(
         follow_state_changes
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_follow_events = social_feature_factory_contract.events.UserFollowAdded().processReceipt(tx_receipt)
+    new_follow_events = tx_events.get("UserFollowAdded", [])
 
     for entry in new_follow_events:
         event_args = entry["args"]
@@ -371,7 +372,7 @@ def add_follow(
 
 def delete_follow(
         self,
-        social_feature_factory_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -380,7 +381,7 @@ def delete_follow(
         follow_state_changes
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_follow_events = social_feature_factory_contract.events.UserFollowDeleted().processReceipt(tx_receipt)
+    new_follow_events = tx_events.get("UserFollowDeleted", [])
 
     for entry in new_follow_events:
         event_args = entry["args"]
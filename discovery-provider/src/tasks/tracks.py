@@ -2,11 +2,11 @@ import logging
 from datetime import datetime
 from sqlalchemy.orm.session import make_transient
 from sqlalchemy.sql import null
-from src.app import contract_addresses
 from src.utils import multihash, helpers
 from src.models import Track, User, Stem, Remix
 from src.tasks.metadata import track_metadata_format
 from src.tasks.ipld_blacklist import is_blacklisted_ipld
+from src.tasks.aggregate_counts import AGGREGATE_TRACK, reconcile_aggregate_ids, update_user_content_counts
 
 logger = logging.getLogger(__name__)
 
@@ -32,25 +32,39 @@ def track_state_update(self, update_task, session, track_factory_txs, block_numb
     if not track_factory_txs:
         return num_total_changes, track_ids
 
-    track_abi = update_task.abi_values["TrackFactory"]["abi"]
-    track_contract = update_task.web3.eth.contract(
-        address=contract_addresses["track_factory"], abi=track_abi
+    # decode every log in each tx once, then load the current rows of all tracks touched
+    # in this block with a single query
+    decoded_track_factory_txs = [
+        (tx_receipt, update_task.event_decoder.decode_receipt("TrackFactory", tx_receipt))
+        for tx_receipt in track_factory_txs
+    ]
+    current_track_records = get_current_track_records(
+        session,
+        {
+            get_event_track_id(entry["args"])
+            for _, decoded_track_events in decoded_track_factory_txs
+            for event_type in track_event_types_arr
+            for entry in decoded_track_events.get(event_type, [])
+        }
     )
+    # parse_track_event updates the current records in place, so keep the owners from before this block
+    previous_owner_ids = {track_id: track.owner_id for track_id, track in current_track_records.items()}
+
     track_events = {}
-    for tx_receipt in track_factory_txs:
+    for tx_receipt, decoded_track_events in decoded_track_factory_txs:
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in track_event_types_arr:
-            track_events_tx = getattr(track_contract.events, event_type)().processReceipt(tx_receipt)
+            track_events_tx = decoded_track_events.get(event_type, [])
             processedEntries = 0 # if record does not get added, do not count towards num_total_changes
             for entry in track_events_tx:
                 event_args = entry["args"]
-                track_id = event_args._trackId if '_trackId' in event_args else event_args._id
+                track_id = get_event_track_id(event_args)
                 track_ids.add(track_id)
                 blockhash = update_task.web3.toHex(entry.blockHash)
 
                 if track_id not in track_events:
                     track_entry = lookup_track_record(
-                        update_task, session, entry, track_id, block_number, blockhash, txhash
+                        update_task, session, entry, track_id, block_number, blockhash, txhash, current_track_records
                     )
 
                     track_events[track_id] = {
@@ -77,34 +91,62 @@ def track_state_update(self, update_task, session, track_factory_txs, block_numb
 
     logger.info(f"index.py | tracks.py | [track indexing] There are {num_total_changes} events processed.")
 
+    changed_track_ids = []
+    changed_track_records = []
     for track_id, value_obj in track_events.items():
         if value_obj['events']:
             logger.info(f"index.py | tracks.py | Adding {value_obj['track']}")
-            invalidate_old_track(session, track_id)
-            session.add(value_obj["track"])
+            changed_track_ids.append(track_id)
+            changed_track_records.append(value_obj["track"])
+
+    invalidate_old_tracks(session, changed_track_ids, current_track_records)
+    session.add_all(changed_track_records)
+
+    # add and remove the aggregate rows of created and deleted tracks, and recount their owners' tracks
+    reconcile_aggregate_ids(session, AGGREGATE_TRACK, changed_track_ids)
+    update_user_content_counts(
+        session,
+        {track.owner_id for track in changed_track_records} |
+        {previous_owner_ids[track_id] for track_id in changed_track_ids if track_id in previous_owner_ids}
+    )
 
     return num_total_changes, track_ids
 
 
-def lookup_track_record(update_task, session, entry, event_track_id, block_number, block_hash, txhash):
-    # Check if track record exists
-    track_exists = (
-        session.query(Track).filter_by(track_id=event_track_id).count() > 0
-    )
+def get_event_track_id(event_args):
+    return event_args._trackId if '_trackId' in event_args else event_args._id
 
-    track_record = None
-    if track_exists:
-        track_record = (
-            session.query(Track)
-            .filter(Track.track_id == event_track_id, Track.is_current == True)
-            .first()
-        )
 
+def get_current_track_records(session, track_ids):
+    """Return {track_id: Track} for the current row of each track id, loaded with one query."""
+    if not track_ids:
+        return {}
+
+    track_records = (
+        session.query(Track)
+        .filter(Track.track_id.in_(track_ids), Track.is_current == True)
+        .all()
+    )
+
+    current_track_records = {}
+    for track_record in track_records:
         # expunge the result from sqlalchemy so we can modify it without UPDATE statements being made
         # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
         session.expunge(track_record)
         make_transient(track_record)
-    else:
+        current_track_records[track_record.track_id] = track_record
+    return current_track_records
+
+
+def lookup_track_record(
+        update_task, session, entry, event_track_id, block_number, block_hash, txhash, current_track_records=None
+    ):
+    # Check if track record exists
+    if current_track_records is None:
+        current_track_records = get_current_track_records(session, [event_track_id])
+
+    track_record = current_track_records.get(event_track_id)
+    if track_record is None:
         track_record = Track(
             track_id=event_track_id,
             is_current=True,
@@ -118,21 +160,18 @@ def lookup_track_record(update_task, session, entry, event_track_id, block_numbe
     return track_record
 
 
-def invalidate_old_track(session, track_id):
-    track_exists = (
-        session.query(Track).filter_by(track_id=track_id).count() > 0
-    )
-
-    if not track_exists:
+def invalidate_old_tracks(session, track_ids, current_track_records):
+    if not track_ids:
         return
 
     num_invalidated_tracks = (
         session.query(Track)
-        .filter(Track.track_id == track_id, Track.is_current == True)
-        .update({"is_current": False})
+        .filter(Track.track_id.in_(track_ids), Track.is_current == True)
+        .update({"is_current": False}, synchronize_session=False)
     )
+    num_existing_tracks = len([track_id for track_id in track_ids if track_id in current_track_records])
     assert (
-        num_invalidated_tracks > 0
+        num_invalidated_tracks >= num_existing_tracks
     ), "Update operation requires a current track to be invalidated"
 
 def update_stems_table(session, track_record, track_metadata):
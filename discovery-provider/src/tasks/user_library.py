@@ -1,7 +1,8 @@
 import logging
 from datetime import datetime
-from src.app import contract_addresses
-from src.models import Playlist, SaveType, Save
+from src.models import Playlist, SaveType, Save, AggregateUser, AggregateTrack, AggregatePlaylist
+from src.tasks.aggregate_counts import get_count_change, get_count_deltas, update_aggregate_counts, \
+    invalidate_current_row
 
 logger = logging.getLogger(__name__)
 
@@ -14,19 +15,17 @@ def user_library_state_update(
     if not user_library_factory_txs:
         return num_total_changes
 
-    user_library_abi = update_task.abi_values["UserLibraryFactory"]["abi"]
-    user_library_contract = update_task.web3.eth.contract(
-        address=contract_addresses["user_library_factory"], abi=user_library_abi
-    )
     block_datetime = datetime.utcfromtimestamp(block_timestamp)
 
     track_save_state_changes = {}
     playlist_save_state_changes = {}
 
     for tx_receipt in user_library_factory_txs:
+        # decode every log in the tx once and hand the decoded events to each handler
+        tx_events = update_task.event_decoder.decode_receipt("UserLibraryFactory", tx_receipt)
         add_track_save(
             self,
-            user_library_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -37,7 +36,7 @@ def user_library_state_update(
 
         add_playlist_save(
             self,
-            user_library_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -48,7 +47,7 @@ def user_library_state_update(
 
         delete_track_save(
             self,
-            user_library_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -59,7 +58,7 @@ def user_library_state_update(
 
         delete_playlist_save(
             self,
-            user_library_contract,
+            tx_events,
             update_task,
             session,
             tx_receipt,
@@ -68,42 +67,50 @@ def user_library_state_update(
             playlist_save_state_changes,
         )
 
+    # apply the save changes and the resulting changes to the aggregate counts
+    user_count_deltas = get_count_deltas()
+    track_count_deltas = get_count_deltas()
+    playlist_count_deltas = get_count_deltas()
+
     for user_id in track_save_state_changes:
         for track_id in track_save_state_changes[user_id]:
-            invalidate_old_save(session, user_id, track_id, SaveType.track)
-            session.add(track_save_state_changes[user_id][track_id])
+            save = track_save_state_changes[user_id][track_id]
+            was_saved = invalidate_old_save(session, user_id, track_id, SaveType.track)
+            session.add(save)
+            count_change = get_count_change(was_saved, save.is_delete)
+            user_count_deltas[user_id]["track_save_count"] += count_change
+            track_count_deltas[track_id]["save_count"] += count_change
         num_total_changes += len(track_save_state_changes[user_id])
 
     for user_id in playlist_save_state_changes:
         for playlist_id in playlist_save_state_changes[user_id]:
-            invalidate_old_save(
-                session,
-                user_id,
-                playlist_id,
-                playlist_save_state_changes[user_id][playlist_id].save_type)
-            session.add(playlist_save_state_changes[user_id][playlist_id])
+            save = playlist_save_state_changes[user_id][playlist_id]
+            was_saved = invalidate_old_save(session, user_id, playlist_id, save.save_type)
+            session.add(save)
+            playlist_count_deltas[playlist_id]["save_count"] += get_count_change(was_saved, save.is_delete)
         num_total_changes += len(playlist_save_state_changes[user_id])
 
+    update_aggregate_counts(session, AggregateUser, user_count_deltas)
+    update_aggregate_counts(session, AggregateTrack, track_count_deltas)
+    update_aggregate_counts(session, AggregatePlaylist, playlist_count_deltas)
+
     return num_total_changes
 
 
 def invalidate_old_save(session, user_id, playlist_id, save_type):
-    num_invalidated_save_entries = (
-        session.query(Save)
-        .filter(
-            Save.user_id == user_id,
-            Save.save_item_id == playlist_id,
-            Save.save_type == save_type,
-            Save.is_current == True,
-        )
-        .update({"is_current":False})
+    # update existing db entry to is_current = False, returning whether the user had saved the item
+    return invalidate_current_row(
+        session,
+        Save,
+        Save.user_id == user_id,
+        Save.save_item_id == playlist_id,
+        Save.save_type == save_type
     )
-    return num_invalidated_save_entries
 
 
 def add_track_save(
         self,
-        user_library_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -112,9 +119,7 @@ def add_track_save(
         track_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_track_events = user_library_contract.events.TrackSaveAdded().processReceipt(
-        tx_receipt
-    )
+    new_add_track_events = tx_events.get("TrackSaveAdded", [])
 
     for event in new_add_track_events:
         event_args = event["args"]
@@ -143,7 +148,7 @@ def add_track_save(
 
 def add_playlist_save(
         self,
-        user_library_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -152,9 +157,7 @@ def add_playlist_save(
         playlist_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_playlist_events = user_library_contract.events.PlaylistSaveAdded().processReceipt(
-        tx_receipt
-    )
+    new_add_playlist_events = tx_events.get("PlaylistSaveAdded", [])
 
     for event in new_add_playlist_events:
         event_args = event["args"]
@@ -192,7 +195,7 @@ def add_playlist_save(
 
 def delete_track_save(
         self,
-        user_library_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -201,9 +204,7 @@ def delete_track_save(
         track_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_delete_track_events = user_library_contract.events.TrackSaveDeleted().processReceipt(
-        tx_receipt
-    )
+    new_delete_track_events = tx_events.get("TrackSaveDeleted", [])
     for event in new_delete_track_events:
         event_args = event["args"]
         save_user_id = event_args._userId
@@ -231,7 +232,7 @@ def delete_track_save(
 
 def delete_playlist_save(
         self,
-        user_library_contract,
+        tx_events,
         update_task,
         session,
         tx_receipt,
@@ -240,9 +241,7 @@ def delete_playlist_save(
         playlist_state_changes,
 ):
     txhash = update_task.web3.toHex(tx_receipt.transactionHash)
-    new_add_playlist_events = user_library_contract.events.PlaylistSaveDeleted().processReceipt(
-        tx_receipt
-    )
+    new_add_playlist_events = tx_events.get("PlaylistSaveDeleted", [])
 
     for event in new_add_playlist_events:
         event_args = event["args"]
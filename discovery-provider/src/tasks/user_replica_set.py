@@ -1,9 +1,9 @@
 import logging
 from datetime import datetime
 from sqlalchemy.orm.session import make_transient
-from src.app import contract_addresses, eth_abi_values
+from src.app import eth_abi_values
 from src.models import URSMContentNode
-from src.tasks.users import lookup_user_record, invalidate_old_user
+from src.tasks.users import lookup_user_record, get_current_user_records, invalidate_old_users
 from src.tasks.index_network_peers import content_node_service_type, sp_factory_registry_key
 from src.utils.user_event_constants import (
     user_replica_set_manager_event_types_arr,
@@ -29,11 +29,6 @@ def user_replica_set_state_update(
     if not user_replica_set_mgr_txs:
         return num_user_replica_set_changes, user_ids
 
-    user_replica_set_manager_abi = update_task.abi_values["UserReplicaSetManager"]["abi"]
-    user_contract = update_task.web3.eth.contract(
-        address=contract_addresses["user_replica_set_manager"], abi=user_replica_set_manager_abi
-    )
-
     # This stores the state of the user object along with all the events applied to it
     # before it gets committed to the db
     # Data format is {"user_id": {"user", "events": []}}
@@ -44,10 +39,27 @@ def user_replica_set_state_update(
     # Data format is {"cnode_sp_id": {"cnode_record", "events":[]}}
     cnode_events_lookup = {}
 
-    for tx_receipt in user_replica_set_mgr_txs:
+    # decode every log in each tx once, then load the current rows of all users touched
+    # in this block with a single query
+    decoded_user_replica_set_mgr_txs = [
+        (tx_receipt, update_task.event_decoder.decode_receipt("UserReplicaSetManager", tx_receipt))
+        for tx_receipt in user_replica_set_mgr_txs
+    ]
+    current_user_records = get_current_user_records(
+        session,
+        {
+            entry["args"]._userId
+            for _, user_replica_set_events in decoded_user_replica_set_mgr_txs
+            for event_type in user_replica_set_manager_event_types_arr
+            for entry in user_replica_set_events.get(event_type, [])
+            if "_userId" in entry["args"]
+        }
+    )
+
+    for tx_receipt, user_replica_set_events in decoded_user_replica_set_mgr_txs:
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in user_replica_set_manager_event_types_arr:
-            user_events_tx = getattr(user_contract.events, event_type)().processReceipt(tx_receipt)
+            user_events_tx = user_replica_set_events.get(event_type, [])
             for entry in user_events_tx:
                 args = entry["args"]
                 # Check if _userId is present
@@ -64,7 +76,9 @@ def user_replica_set_state_update(
                 # first, get the user object from the db(if exists or create a new one)
                 # then set the lookup object for user_id with the appropriate props
                 if user_id and (user_id not in user_replica_set_events_lookup):
-                    ret_user = lookup_user_record(update_task, session, entry, block_number, block_timestamp, txhash)
+                    ret_user = lookup_user_record(
+                        update_task, session, entry, block_number, block_timestamp, txhash, current_user_records
+                    )
                     user_replica_set_events_lookup[user_id] = {"user": ret_user, "events": []}
 
                 if cnode_sp_id and (cnode_sp_id not in cnode_events_lookup):
@@ -117,8 +131,8 @@ def user_replica_set_state_update(
     # we do this after all processing has completed so the user record is atomic by block, not tx
     for user_id, value_obj in user_replica_set_events_lookup.items():
         logger.info(f"index.py | user_replica_set.py | Replica Set Processing Adding {value_obj['user']}")
-        invalidate_old_user(session, user_id)
-        session.add(value_obj["user"])
+    invalidate_old_users(session, list(user_replica_set_events_lookup.keys()), current_user_records)
+    session.add_all([value_obj["user"] for value_obj in user_replica_set_events_lookup.values()])
 
     for content_node_id, value_obj in cnode_events_lookup.items():
         logger.info(f"index.py | user_replica_set.py | Content Node Processing Adding {value_obj['content_node']}")
@@ -2,11 +2,11 @@ import logging
 from datetime import datetime
 from eth_account.messages import defunct_hash_message
 from sqlalchemy.orm.session import make_transient
-from src.app import contract_addresses
 from src.utils import helpers
 from src.models import User, AssociatedWallet
 from src.tasks.ipld_blacklist import is_blacklisted_ipld
 from src.tasks.metadata import user_metadata_format
+from src.tasks.aggregate_counts import AGGREGATE_USER, reconcile_aggregate_ids
 from src.utils.user_event_constants import user_event_types_arr, user_event_types_lookup
 from src.queries.get_balances import enqueue_balance_refresh
 
@@ -21,24 +21,35 @@ def user_state_update(self, update_task, session, user_factory_txs, block_number
     if not user_factory_txs:
         return num_total_changes, user_ids
 
-    user_abi = update_task.abi_values["UserFactory"]["abi"]
-    user_contract = update_task.web3.eth.contract(
-        address=contract_addresses["user_factory"], abi=user_abi
-    )
-
     # This stores the state of the user object along with all the events applied to it
     # before it gets committed to the db
     # Data format is {"user_id": {"user", "events": []}}
     # NOTE - events are stored only for debugging purposes and not used or persisted anywhere
     user_events_lookup = {}
 
+    # decode every log in each tx once, then load the current rows of all users touched
+    # in this block with a single query
+    decoded_user_factory_txs = [
+        (tx_receipt, update_task.event_decoder.decode_receipt("UserFactory", tx_receipt))
+        for tx_receipt in user_factory_txs
+    ]
+    current_user_records = get_current_user_records(
+        session,
+        {
+            entry["args"]._userId
+            for _, user_events in decoded_user_factory_txs
+            for event_type in user_event_types_arr
+            for entry in user_events.get(event_type, [])
+        }
+    )
+
     # for each user factory transaction, loop through every tx
-    # loop through all audius event types within that tx and get all event logs
+    # loop through all audius event types within that tx in order
     # for each event, apply changes to the user in user_events_lookup
-    for tx_receipt in user_factory_txs:
+    for tx_receipt, user_events in decoded_user_factory_txs:
         txhash = update_task.web3.toHex(tx_receipt.transactionHash)
         for event_type in user_event_types_arr:
-            user_events_tx = getattr(user_contract.events, event_type)().processReceipt(tx_receipt)
+            user_events_tx = user_events.get(event_type, [])
             processedEntries = 0 # if record does not get added, do not count towards num_total_changes
             for entry in user_events_tx:
                 user_id = entry["args"]._userId
@@ -48,7 +59,9 @@ def user_state_update(self, update_task, session, user_factory_txs, block_number
                 # first, get the user object from the db(if exists or create a new one)
                 # then set the lookup object for user_id with the appropriate props
                 if user_id not in user_events_lookup:
-                    ret_user = lookup_user_record(update_task, session, entry, block_number, block_timestamp, txhash)
+                    ret_user = lookup_user_record(
+                        update_task, session, entry, block_number, block_timestamp, txhash, current_user_records
+                    )
                     user_events_lookup[user_id] = {"user": ret_user, "events": []}
 
                 # Add or update the value of the user record for this block in user_events_lookup,
@@ -56,7 +69,6 @@ def user_state_update(self, update_task, session, user_factory_txs, block_number
                 # (even if multiple operations are present)
                 user_record = parse_user_event(
                     self,
-                    user_contract,
                     update_task,
                     session,
                     tx_receipt,
@@ -77,36 +89,60 @@ def user_state_update(self, update_task, session, user_factory_txs, block_number
 
     # for each record in user_events_lookup, invalidate the old record and add the new record
     # we do this after all processing has completed so the user record is atomic by block, not tx
+    changed_user_ids = []
+    changed_user_records = []
     for user_id, value_obj in user_events_lookup.items():
         logger.info(f"index.py | users.py | Adding {value_obj['user']}")
         if value_obj["events"]:
-            invalidate_old_user(session, user_id)
-            session.add(value_obj["user"])
+            changed_user_ids.append(user_id)
+            changed_user_records.append(value_obj["user"])
+
+    invalidate_old_users(session, changed_user_ids, current_user_records)
+    session.add_all(changed_user_records)
+
+    # add the aggregate rows of new users
+    reconcile_aggregate_ids(
+        session,
+        AGGREGATE_USER,
+        [user_id for user_id in changed_user_ids if user_id not in current_user_records],
+        missing_only=True
+    )
 
     return num_total_changes, user_ids
 
 
-def lookup_user_record(update_task, session, entry, block_number, block_timestamp, txhash):
-    event_blockhash = update_task.web3.toHex(entry.blockHash)
-    event_args = entry["args"]
-    user_id = event_args._userId
+def get_current_user_records(session, user_ids):
+    """Return {user_id: User} for the current row of each user id, loaded with one query."""
+    if not user_ids:
+        return {}
 
-    # Check if the userId is in the db
-    user_exists = session.query(User).filter_by(user_id=event_args._userId).count() > 0
-
-    user_record = None # will be set in this if/else
-    if user_exists:
-        user_record = (
-            session.query(User)
-            .filter(User.user_id == user_id, User.is_current == True)
-            .first()
-        )
+    user_records = (
+        session.query(User)
+        .filter(User.user_id.in_(user_ids), User.is_current == True)
+        .all()
+    )
 
+    current_user_records = {}
+    for user_record in user_records:
         # expunge the result from sqlalchemy so we can modify it without UPDATE statements being made
         # https://stackoverflow.com/questions/28871406/how-to-clone-a-sqlalchemy-db-object-with-new-primary-key
         session.expunge(user_record)
         make_transient(user_record)
-    else:
+        current_user_records[user_record.user_id] = user_record
+    return current_user_records
+
+
+def lookup_user_record(update_task, session, entry, block_number, block_timestamp, txhash, current_user_records=None):
+    event_blockhash = update_task.web3.toHex(entry.blockHash)
+    event_args = entry["args"]
+    user_id = event_args._userId
+
+    # Check if the userId is in the db
+    if current_user_records is None:
+        current_user_records = get_current_user_records(session, [user_id])
+
+    user_record = current_user_records.get(user_id)
+    if user_record is None:
         user_record = User(
             is_current=True,
             user_id=user_id,
@@ -121,24 +157,24 @@ def lookup_user_record(update_task, session, entry, block_number, block_timestam
     return user_record
 
 
-def invalidate_old_user(session, user_id):
-    # Check if the userId is in the db
-    user_exists = session.query(User).filter_by(user_id=user_id).count() > 0
-
-    if user_exists:
-        # Update existing record in db to is_current = False
-        num_invalidated_users = (
-            session.query(User)
-            .filter(User.user_id == user_id, User.is_current == True)
-            .update({"is_current": False})
-        )
-        assert (
-            num_invalidated_users > 0
-        ), "Update operation requires a current user to be invalidated"
+def invalidate_old_users(session, user_ids, current_user_records):
+    if not user_ids:
+        return
+
+    # Update all existing records in db to is_current = False in one statement
+    num_invalidated_users = (
+        session.query(User)
+        .filter(User.user_id.in_(user_ids), User.is_current == True)
+        .update({"is_current": False}, synchronize_session=False)
+    )
+    num_existing_users = len([user_id for user_id in user_ids if user_id in current_user_records])
+    assert (
+        num_invalidated_users >= num_existing_users
+    ), "Update operation requires a current user to be invalidated"
 
 
 def parse_user_event(
-        self, user_contract, update_task, session, tx_receipt, block_number, entry, event_type, user_record,
+        self, update_task, session, tx_receipt, block_number, entry, event_type, user_record,
         block_timestamp):
     event_args = entry["args"]
 
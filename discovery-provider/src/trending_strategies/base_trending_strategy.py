@@ -1,7 +1,33 @@
 from abc import ABC, abstractmethod
+import numpy as np
+from dateutil.parser import parse
 from src.trending_strategies.trending_type_and_version import TrendingType, TrendingVersion
 
+def get_track_columns(tracks, fields):
+    """Returns { field: NumPy array of each track's value }, with created_at as datetime64[us]"""
+    columns = {}
+    for field in fields:
+        values = [track[field] for track in tracks]
+        if field == 'created_at':
+            try:
+                columns[field] = np.array(values, dtype='datetime64[us]')
+            except ValueError:
+                # Not ISO 8601, so parse as get_track_score does
+                columns[field] = np.array([parse(value) for value in values], dtype='datetime64[us]')
+        else:
+            columns[field] = np.array(values)
+    return columns
+
+def map_unique(func, values):
+    """Returns an array of the scalar func applied to each of values, calling func once per distinct value.
+       Used for math like pow, which NumPy's vectorized routines can round differently from Python's."""
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    return np.array([func(value) for value in unique_values.tolist()], dtype=float)[inverse]
+
 class BaseTrendingStrategy(ABC):
+    # Fields of the tracks that get_track_scores scores, set by each strategy
+    track_score_fields = None
+
     def __init__(self, trending_type, version):
         self.trending_type = trending_type
         self.version = version
@@ -10,6 +36,22 @@ class BaseTrendingStrategy(ABC):
     def get_track_score(self, time, track):
         pass
 
+    @abstractmethod
+    def get_track_scores(self, time, track_columns):
+        """Batch version of get_track_score.
+           track_columns is the output of get_track_columns for track_score_fields.
+           Returns a NumPy array of the score of each track."""
+
     @abstractmethod
     def get_score_params(self):
         pass
+
+    def rank_tracks(self, time, tracks, limit=None):
+        """Scores tracks and returns (scores, indices of the top `limit` tracks by score).
+           Tracks with equal scores keep their order, as when sorting the scored tracks."""
+        if tracks:
+            scores = self.get_track_scores(time, get_track_columns(tracks, self.track_score_fields))
+        else:
+            scores = np.array([], dtype=float)
+        top_indices = np.argsort(-scores, kind='stable')[:limit]
+        return scores, top_indices
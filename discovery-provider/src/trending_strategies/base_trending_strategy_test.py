@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timedelta
+from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory
+from src.trending_strategies.trending_type_and_version import TrendingType
+
+def make_tracks(count):
+    rand = random.Random(1)
+    # Noon offsets keep each track's age in days the same while the test runs
+    now = datetime.now()
+    return [{
+        "track_id": track_id,
+        "listens": rand.randint(0, 5000),
+        "windowed_repost_count": rand.randint(0, 50),
+        "repost_count": rand.randint(0, 500),
+        "windowed_save_count": rand.randint(0, 50),
+        "save_count": rand.randint(0, 500),
+        "created_at": (now - timedelta(days=rand.randint(0, 400), hours=12)).isoformat(timespec='seconds'),
+        # Spans the minimum follower count and the underground follower count penalty
+        "owner_follower_count": rand.choice([0, 2, 3, 100, 749, 750, 2000]),
+        "owner_verified": rand.choice([True, False, None]),
+        # Zero karma ties tracks at a score of 0
+        "karma": rand.choice([0, 1, 10, 1000])
+    } for track_id in range(count)]
+
+def test_rank_tracks():
+    """Test that batch scoring ranks tracks the same as sorting the tracks scored one at a time"""
+    tracks = make_tracks(1000)
+    strategy_factory = TrendingStrategyFactory()
+    for trending_type in TrendingType:
+        for strategy in strategy_factory.get_versions_for_type(trending_type).values():
+            assert strategy.track_score_fields
+            for time in ["week", "month", "year"]:
+                scored_tracks = [strategy.get_track_score(time, track) for track in tracks]
+                sorted_tracks = sorted(scored_tracks, key=lambda k: k['score'], reverse=True)
+
+                scores, top_indices = strategy.rank_tracks(time, tracks)
+                assert [tracks[index]["track_id"] for index in top_indices] == \
+                    [track["track_id"] for track in sorted_tracks]
+                assert list(scores) == [track['score'] for track in scored_tracks]
+
+                _, top_indices = strategy.rank_tracks(time, tracks, 100)
+                assert [tracks[index]["track_id"] for index in top_indices] == \
+                    [track["track_id"] for track in sorted_tracks[:100]]
+
+def test_rank_tracks_empty():
+    """Test ranking no tracks"""
+    strategy = TrendingStrategyFactory().get_strategy(TrendingType.TRACKS)
+    scores, top_indices = strategy.rank_tracks("week", [])
+    assert len(scores) == 0
+    assert len(top_indices) == 0
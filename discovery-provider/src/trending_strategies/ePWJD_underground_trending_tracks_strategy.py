@@ -1,6 +1,7 @@
 from datetime import datetime
 from dateutil.parser import parse
-from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
+import numpy as np
+from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy, map_unique
 from src.trending_strategies.trending_type_and_version import TrendingType, TrendingVersion
 
 b = 5
@@ -14,6 +15,9 @@ oi = 20
 nb = 750
 
 class UndergroundTrendingTracksStrategyePWJD(BaseTrendingStrategy):
+    track_score_fields = ['listens', 'windowed_repost_count', 'repost_count', 'windowed_save_count', 'save_count',
+                          'created_at', 'owner_follower_count', 'owner_verified', 'karma']
+
     def __init__(self):
         super().__init__(TrendingType.UNDERGROUND_TRACKS, TrendingVersion.ePWJD)
 
@@ -46,5 +50,27 @@ class UndergroundTrendingTracksStrategyePWJD(BaseTrendingStrategy):
             rq = xy((1.0 / u),(uk(u,(1 - ul/te))))
         return{'score':vb * rq, **track}
 
+    def get_track_scores(self, time, track_columns):
+        # pylint: disable=W,C,R
+        mn = track_columns['listens']
+        c =track_columns['windowed_repost_count']
+        x = track_columns['repost_count']
+        v =track_columns['windowed_save_count']
+        ut =track_columns['save_count']
+        ll=track_columns['created_at']
+        bq=track_columns['owner_follower_count']
+        ty = track_columns['owner_verified'].astype(bool)
+        kz = track_columns['karma']
+        xy=max
+        uk=pow
+        oj = np.where(ty,qq,1)
+        zu = map_unique(lambda bq:xy(uk(oi,1-((1/nb)*(bq-nb)+1)),1/oi) if bq >= nb else 1,bq)
+        vb = ((b*mn+qw*c+hg*v+ie*x+pn*ut+zu*bq)*kz*zu*oj)
+        te = 7
+        fd = np.datetime64(datetime.now(),'us')
+        ul = (fd-ll)//np.timedelta64(1,'D')
+        rq = map_unique(lambda ul:xy((1.0 / u),(uk(u,(1 - ul/te)))) if ul > te else 1,ul)
+        return np.where(bq<3,0,vb * rq)
+
     def get_score_params(self):
         return {'S': 1500, 'r': 1500, 'q': 50, 'o': 21, 'f': 7, 'qr': 10, 'xf': True, 'pt': 0}
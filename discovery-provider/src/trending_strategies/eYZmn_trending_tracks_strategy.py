@@ -1,6 +1,7 @@
 from datetime import datetime
 from dateutil.parser import parse
-from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy
+import numpy as np
+from src.trending_strategies.base_trending_strategy import BaseTrendingStrategy, map_unique
 from src.trending_strategies.trending_type_and_version import TrendingType, TrendingVersion
 
 N = 1
@@ -35,12 +36,38 @@ def z(time, track):
         Q=a((1.0/q),(M(q,(1-k/L))))
     return{'score':H*Q,**track}
 
+# Fields scored by z_columns, the batch version of z
+z_fields = ['listens', 'windowed_repost_count', 'repost_count', 'windowed_save_count', 'save_count', 'created_at',
+            'owner_follower_count', 'karma']
+
+def z_columns(time, columns):
+    # pylint: disable=W,C,R
+    E=columns['listens']
+    e=columns['windowed_repost_count']
+    t=columns['repost_count']
+    x=columns['windowed_save_count']
+    A=columns['save_count']
+    o=columns['created_at']
+    l=columns['owner_follower_count']
+    j=columns['karma']
+    H=(N*E+F*e+O*x+R*t+i*A)*j
+    L=T[time]
+    K=np.datetime64(datetime.now(),'us')
+    k=(K-o)//np.timedelta64(1,'D')
+    Q=map_unique(lambda k:a((1.0/q),(M(q,(1-k/L)))) if k>L else 1,k)
+    return np.where(l<3,0,H*Q)
+
 class TrendingTracksStrategyeYZmn(BaseTrendingStrategy):
+    track_score_fields = z_fields
+
     def __init__(self):
         super().__init__(TrendingType.TRACKS, TrendingVersion.eYZmn)
 
     def get_track_score(self, time, track):
         return z(time, track)
 
+    def get_track_scores(self, time, track_columns):
+        return z_columns(time, track_columns)
+
     def get_score_params(self):
         return {'xf': False, 'pt': 0}
@@ -0,0 +1,43 @@
+"""
+Serialization codecs for cached values
+"""
+
+import pickle
+import zlib
+
+
+class PickleCodec:
+    """ Pickles values with the highest protocol, which is more compact and faster than the default """
+
+    def dumps(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, serialized):
+        return pickle.loads(serialized)
+
+
+class CompressedPickleCodec:
+    """ Pickles values and zlib compresses those of at least min_compress_bytes, such as rows with
+        large JSON columns. A one byte header records whether the payload is compressed.
+    """
+
+    raw_header = b"p"
+    compressed_header = b"z"
+
+    def __init__(self, min_compress_bytes=1024, compress_level=1):
+        self._min_compress_bytes = min_compress_bytes
+        self._compress_level = compress_level
+
+    def dumps(self, value):
+        serialized = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(serialized) < self._min_compress_bytes:
+            return self.raw_header + serialized
+        return self.compressed_header + zlib.compress(serialized, self._compress_level)
+
+    def loads(self, serialized):
+        header, payload = serialized[:1], serialized[1:]
+        if header == self.compressed_header:
+            return pickle.loads(zlib.decompress(payload))
+        if header == self.raw_header:
+            return pickle.loads(payload)
+        raise ValueError(f"Unknown cached value header {header}")
@@ -0,0 +1,22 @@
+from datetime import datetime
+from src.utils.cache_codecs import PickleCodec, CompressedPickleCodec
+
+
+def test_cache_codecs():
+    """Test that codecs round trip entity rows and only compress large values"""
+    track = {
+        "track_id": 1,
+        "created_at": datetime(2021, 1, 1),
+        "track_segments": [{"duration": 6.0, "multihash": "QmSegment{}".format(i)} for i in range(100)]
+    }
+    assert PickleCodec().loads(PickleCodec().dumps(track)) == track
+
+    codec = CompressedPickleCodec(min_compress_bytes=1024)
+    serialized = codec.dumps(track)
+    assert serialized[:1] == CompressedPickleCodec.compressed_header
+    assert codec.loads(serialized) == track
+
+    small_track = {"track_id": 2}
+    serialized = codec.dumps(small_track)
+    assert serialized[:1] == CompressedPickleCodec.raw_header
+    assert codec.loads(serialized) == small_track
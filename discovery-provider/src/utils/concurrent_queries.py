@@ -0,0 +1,69 @@
+"""
+Runs independent read queries concurrently, each on its own pooled connection
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from src.utils.config import shared_config
+
+_executor = None
+# pid of the process that created the executor, since worker threads don't survive a fork
+_executor_pid = None
+_executor_lock = threading.Lock()
+# Marks executor threads, whose queries run sequentially so that workers never wait on each other
+_worker_state = threading.local()
+
+
+def get_query_executor():
+    """ Returns this process's query thread pool, or None if concurrent queries are disabled """
+    global _executor, _executor_pid
+    if _executor_pid == os.getpid():
+        return _executor
+
+    with _executor_lock:
+        if _executor_pid != os.getpid():
+            max_workers = int(shared_config["db"]["concurrent_query_workers"])
+            _executor = ThreadPoolExecutor(max_workers=max_workers) if max_workers > 0 else None
+            _executor_pid = os.getpid()
+    return _executor
+
+
+def has_idle_connections(engine, count):
+    pool = engine.pool
+    try:
+        return pool.size() - pool.checkedout() >= count
+    except AttributeError:
+        # Pools without a fixed size open connections on demand
+        return True
+
+
+def run_query(engine, query_func):
+    _worker_state.is_worker = True
+    session = Session(bind=engine)
+    try:
+        return query_func(session)
+    finally:
+        session.close()
+
+
+def run_queries(session, query_funcs):
+    """ Returns [query_func(session) for query_func in query_funcs], running the queries concurrently.
+
+        The first query runs on session in the calling thread and the others each run on a new session
+        from a worker thread, so the queries must be read only and must not depend on each other or on
+        uncommitted changes in session.
+        The queries run one after another on session when concurrent queries are disabled, when called
+        from a worker thread, or when the connection pool does not have an idle connection for each worker.
+    """
+    executor = get_query_executor()
+    engine = session.get_bind()
+    if executor is None or len(query_funcs) < 2 or getattr(_worker_state, "is_worker", False) \
+            or not has_idle_connections(engine, len(query_funcs) - 1):
+        return [query_func(session) for query_func in query_funcs]
+
+    futures = [executor.submit(run_query, engine, query_func) for query_func in query_funcs[1:]]
+    results = [query_funcs[0](session)]
+    results.extend(future.result() for future in futures)
+    return results
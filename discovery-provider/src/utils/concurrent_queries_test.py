@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import concurrent_queries
+from src.utils.concurrent_queries import run_queries
+
+
+class MockPool:
+    def __init__(self, size, checkedout):
+        self._size = size
+        self._checkedout = checkedout
+
+    def size(self):
+        return self._size
+
+    def checkedout(self):
+        return self._checkedout
+
+
+class MockEngine:
+    def __init__(self, pool):
+        self.pool = pool
+
+
+class MockSession:
+    def __init__(self, engine):
+        self._engine = engine
+
+    def get_bind(self):
+        return self._engine
+
+
+def query_thread(session):
+    return session, threading.current_thread()
+
+
+def test_run_queries(monkeypatch):
+    """Test that the first query runs on the given session and the others on new sessions in worker threads"""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(concurrent_queries, "get_query_executor", lambda: executor)
+    session = MockSession(MockEngine(MockPool(size=4, checkedout=1)))
+
+    results = run_queries(session, [query_thread, query_thread, query_thread])
+    assert results[0] == (session, threading.current_thread())
+    for query_session, thread in results[1:]:
+        assert query_session is not session
+        assert thread is not threading.current_thread()
+
+    # Queries run from a worker thread run on its session
+    nested_results = executor.submit(
+        concurrent_queries.run_query,
+        session.get_bind(),
+        lambda worker_session: (worker_session, run_queries(worker_session, [query_thread, query_thread]))
+    ).result()
+    worker_session, worker_results = nested_results
+    assert [query_session for query_session, _ in worker_results] == [worker_session, worker_session]
+    executor.shutdown()
+
+
+def test_run_queries_sequential(monkeypatch):
+    """Test that queries run on the given session when the pool is short of idle connections or it's disabled"""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(concurrent_queries, "get_query_executor", lambda: executor)
+    session = MockSession(MockEngine(MockPool(size=4, checkedout=3)))
+    results = run_queries(session, [query_thread, query_thread, query_thread])
+    assert results == [(session, threading.current_thread())] * 3
+
+    monkeypatch.setattr(concurrent_queries, "get_query_executor", lambda: None)
+    session = MockSession(MockEngine(MockPool(size=4, checkedout=0)))
+    results = run_queries(session, [query_thread, query_thread])
+    assert results == [(session, threading.current_thread())] * 2
+    executor.shutdown()
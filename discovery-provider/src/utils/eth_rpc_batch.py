@@ -0,0 +1,123 @@
+"""
+Batched JSON-RPC helpers for the data chain web3 provider
+"""
+
+import itertools
+import json
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from web3._utils.method_formatters import block_formatter, receipt_formatter
+from web3.datastructures import AttributeDict
+
+logger = logging.getLogger(__name__)
+
+# JSON-RPC error codes returned by nodes that do not accept batch payloads
+batch_rejected_error_codes = (-32600, -32601)
+
+
+class BatchRequestRejected(Exception):
+    """ Raised when the node does not accept JSON-RPC batch requests """
+
+
+class BatchReceiptFetcher:
+    """ Fetches transaction receipts and block headers with JSON-RPC batch requests over a
+        persistent connection pool. Results are formatted the same way web3.eth.getTransactionReceipt
+        and web3.eth.getBlock format them, so receipts can be passed directly to processReceipt.
+    """
+
+    def __init__(self, endpoint_uri, max_batch_size=500, pool_size=10, timeout=10):
+        self._endpoint_uri = endpoint_uri
+        self._max_batch_size = max_batch_size
+        self._timeout = timeout
+        self._request_counter = itertools.count()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update({"Content-Type": "application/json"})
+        # Flipped off the first time the node rejects a batch payload
+        self._batch_supported = True
+
+    @property
+    def batch_supported(self):
+        return self._batch_supported
+
+    def get_transaction_receipts(self, tx_hashes):
+        """ Returns a dict of tx_hash -> receipt for every hash in tx_hashes.
+            Raises BatchRequestRejected if the node does not support batches.
+        """
+        return self._fetch_batches("eth_getTransactionReceipt", tx_hashes, lambda tx_hash: [tx_hash], receipt_formatter)
+
+    def get_blocks(self, block_numbers):
+        """ Returns a dict of block number -> block header, without full transactions, for every
+            number in block_numbers. Raises BatchRequestRejected if the node does not support batches.
+        """
+        return self._fetch_batches(
+            "eth_getBlockByNumber", block_numbers, lambda block_number: [hex(block_number), False], block_formatter
+        )
+
+    def _fetch_batches(self, method, keys, get_params, formatter):
+        if not self._batch_supported:
+            raise BatchRequestRejected(f"Batch requests unsupported by {self._endpoint_uri}")
+
+        results = {}
+        for start in range(0, len(keys), self._max_batch_size):
+            results.update(self._fetch_batch(method, keys[start:start + self._max_batch_size], get_params, formatter))
+        return results
+
+    def _fetch_batch(self, method, keys, get_params, formatter):
+        request_keys = {}
+        payload = []
+        for key in keys:
+            request_id = next(self._request_counter)
+            request_keys[request_id] = key
+            payload.append({
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": get_params(key),
+                "id": request_id,
+            })
+
+        responses = self._post(payload)
+
+        results = {}
+        for response in responses:
+            key = request_keys.get(response.get("id"))
+            if key is None:
+                continue
+            if "error" in response:
+                raise Exception(f"eth_rpc_batch.py | {method} {key} generated {response['error']}")
+            if response.get("result") is None:
+                raise Exception(f"eth_rpc_batch.py | Missing {method} result for {key}")
+            results[key] = AttributeDict.recursive(formatter(response["result"]))
+
+        if len(results) != len(keys):
+            raise Exception(f"eth_rpc_batch.py | Expected {len(keys)} {method} results, received {len(results)}")
+        return results
+
+    def _post(self, payload):
+        response = self._session.post(
+            self._endpoint_uri, data=json.dumps(payload), timeout=self._timeout
+        )
+        if response.status_code in (400, 405, 413, 501):
+            self._reject_batches(f"status {response.status_code}")
+        response.raise_for_status()
+
+        responses = response.json()
+        # Nodes without batch support reply with a single error object instead of a list
+        if not isinstance(responses, list):
+            error = responses.get("error") if isinstance(responses, dict) else None
+            if error and error.get("code") in batch_rejected_error_codes:
+                self._reject_batches(error)
+            raise Exception(f"eth_rpc_batch.py | Unexpected batch response {responses}")
+        return responses
+
+    def _reject_batches(self, reason):
+        self._batch_supported = False
+        logger.warning(
+            f"eth_rpc_batch.py | {self._endpoint_uri} rejected batch request ({reason}), "
+            "falling back to individual requests"
+        )
+        raise BatchRequestRejected(reason)
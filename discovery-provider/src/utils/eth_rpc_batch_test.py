@@ -0,0 +1,127 @@
+import json
+import pytest
+from src.utils.eth_rpc_batch import BatchReceiptFetcher, BatchRequestRejected
+
+tx_hash_1 = "0x" + "01" * 32
+tx_hash_2 = "0x" + "02" * 32
+
+
+class MockResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"status {self.status_code}")
+
+    def json(self):
+        return self._body
+
+
+class MockSession:
+    """Replies to each posted batch with respond(payload), recording the payloads"""
+    def __init__(self, respond):
+        self._respond = respond
+        self.payloads = []
+
+    def post(self, endpoint_uri, data, timeout):
+        payload = json.loads(data)
+        self.payloads.append(payload)
+        return self._respond(payload)
+
+
+def get_fetcher(respond, max_batch_size=500):
+    fetcher = BatchReceiptFetcher("http://localhost:8545", max_batch_size=max_batch_size)
+    session = MockSession(respond)
+    fetcher._session = session
+    return fetcher, session
+
+
+def test_get_transaction_receipts():
+    """Test that receipts are matched to their tx hashes by request id and formatted like web3's"""
+    block_numbers = {tx_hash_1: 16, tx_hash_2: 17}
+
+    def get_receipt_result(tx_hash):
+        return {"transactionHash": tx_hash, "blockNumber": hex(block_numbers[tx_hash]), "status": "0x1", "logs": []}
+
+    def respond(payload):
+        # Nodes may reply to the requests of a batch in any order
+        return MockResponse(200, [
+            {"jsonrpc": "2.0", "id": request["id"], "result": get_receipt_result(request["params"][0])}
+            for request in reversed(payload)
+        ])
+
+    fetcher, session = get_fetcher(respond)
+    tx_receipts = fetcher.get_transaction_receipts([tx_hash_1, tx_hash_2])
+
+    assert [request["params"] for request in session.payloads[0]] == [[tx_hash_1], [tx_hash_2]]
+    assert tx_receipts[tx_hash_1].blockNumber == 16
+    assert tx_receipts[tx_hash_2].blockNumber == 17
+    # receipt_formatter converts hex strings, e.g. hashes to bytes
+    assert tx_receipts[tx_hash_1].transactionHash == bytes.fromhex("01" * 32)
+    assert tx_receipts[tx_hash_1].status == 1
+
+
+def test_get_transaction_receipts_max_batch_size():
+    """Test that hashes are sent in batches of up to max_batch_size requests"""
+    def respond(payload):
+        return MockResponse(200, [
+            {"jsonrpc": "2.0", "id": request["id"], "result": {"transactionHash": request["params"][0], "logs": []}}
+            for request in payload
+        ])
+
+    fetcher, session = get_fetcher(respond, max_batch_size=1)
+    assert set(fetcher.get_transaction_receipts([tx_hash_1, tx_hash_2])) == {tx_hash_1, tx_hash_2}
+    assert [len(payload) for payload in session.payloads] == [1, 1]
+
+
+def test_get_blocks():
+    """Test that block headers are fetched by number and formatted like web3's"""
+    def respond(payload):
+        return MockResponse(200, [
+            {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "result": {"number": request["params"][0], "hash": "0x" + "0a" * 32, "parentHash": "0x" + "0b" * 32}
+            }
+            for request in payload
+        ])
+
+    fetcher, session = get_fetcher(respond)
+    blocks = fetcher.get_blocks([5, 6])
+
+    assert [request["params"] for request in session.payloads[0]] == [["0x5", False], ["0x6", False]]
+    assert blocks[5].number == 5
+    assert blocks[6].number == 6
+    assert blocks[6].parentHash == bytes.fromhex("0b" * 32)
+
+
+@pytest.mark.parametrize("response", [
+    MockResponse(400, None),
+    MockResponse(413, None),
+    MockResponse(200, {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid request"}})
+])
+def test_batch_rejected(response):
+    """Test that a rejected batch switches the fetcher off batches for good"""
+    fetcher, session = get_fetcher(lambda payload: response)
+
+    with pytest.raises(BatchRequestRejected):
+        fetcher.get_transaction_receipts([tx_hash_1])
+    assert not fetcher.batch_supported
+
+    # Later calls are rejected without sending a batch, so callers fetch receipts per tx
+    with pytest.raises(BatchRequestRejected):
+        fetcher.get_transaction_receipts([tx_hash_1])
+    assert len(session.payloads) == 1
+
+
+def test_missing_receipt():
+    """Test that a batch missing a receipt raises instead of returning partial results"""
+    def respond(payload):
+        return MockResponse(200, [{"jsonrpc": "2.0", "id": payload[0]["id"], "result": None}])
+
+    fetcher, _ = get_fetcher(respond)
+    with pytest.raises(Exception, match="Missing"):
+        fetcher.get_transaction_receipts([tx_hash_1])
+    assert fetcher.batch_supported
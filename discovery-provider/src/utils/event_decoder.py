@@ -0,0 +1,60 @@
+"""
+Topic indexed decoder for contract event logs
+"""
+
+import logging
+
+from eth_utils import event_abi_to_log_topic
+from web3._utils.events import get_event_data
+from web3.exceptions import MismatchedABI, LogTopicError, InvalidEventABI
+
+logger = logging.getLogger(__name__)
+
+
+class EventDecoder:
+    """ Decodes transaction receipt logs against contract ABIs.
+
+        A topic0 -> event ABI table is built once per contract, so each log in a receipt
+        is matched with a single dict lookup and decoded exactly once, instead of once per
+        event type as with contract.events.<Event>().processReceipt.
+    """
+
+    def __init__(self, web3, abi_values):
+        self._codec = web3.codec
+        # {contract_name: {topic0: event_abi}}
+        self._event_abis = {}
+        for contract_name, contract_values in abi_values.items():
+            self._event_abis[contract_name] = build_topic_table(contract_values["abi"])
+
+    def decode_receipt(self, contract_name, tx_receipt):
+        """ Returns {event_name: [decoded events]} for every log in tx_receipt that matches
+            an event of contract_name. Decoded events have the same shape as processReceipt
+            entries, and keep the receipt's log order within each event name.
+        """
+        topic_table = self._event_abis[contract_name]
+        decoded_events = {}
+        for log in tx_receipt["logs"]:
+            if not log["topics"]:
+                continue
+            event_abi = topic_table.get(bytes(log["topics"][0]))
+            if event_abi is None:
+                continue
+            try:
+                event = get_event_data(self._codec, event_abi, log)
+            except (MismatchedABI, LogTopicError, InvalidEventABI, TypeError) as e:
+                logger.warning(
+                    f"event_decoder.py | Failed to decode {event_abi['name']} log "
+                    f"{log['logIndex']} in {log['transactionHash']}: {e}"
+                )
+                continue
+            decoded_events.setdefault(event["event"], []).append(event)
+        return decoded_events
+
+
+def build_topic_table(contract_abi):
+    topic_table = {}
+    for abi_entry in contract_abi:
+        if abi_entry.get("type") != "event" or abi_entry.get("anonymous"):
+            continue
+        topic_table[bytes(event_abi_to_log_topic(abi_entry))] = abi_entry
+    return topic_table
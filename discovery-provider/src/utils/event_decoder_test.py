@@ -0,0 +1,71 @@
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from src.utils.event_decoder import EventDecoder
+
+update_bio_abi = {
+    "anonymous": False,
+    "inputs": [
+        {"indexed": False, "name": "_userId", "type": "uint256"},
+        {"indexed": False, "name": "_bio", "type": "string"}
+    ],
+    "name": "UpdateBio",
+    "type": "event"
+}
+
+update_is_creator_abi = {
+    "anonymous": False,
+    "inputs": [
+        {"indexed": False, "name": "_userId", "type": "uint256"},
+        {"indexed": False, "name": "_isCreator", "type": "bool"}
+    ],
+    "name": "UpdateIsCreator",
+    "type": "event"
+}
+
+abi_values = {
+    "UserFactory": {"abi": [update_bio_abi, update_is_creator_abi]}
+}
+
+
+def make_log(event_abi, types, values, log_index):
+    return AttributeDict({
+        "address": "0x0000000000000000000000000000000000000001",
+        "topics": [HexBytes(event_abi_to_log_topic(event_abi))],
+        "data": "0x" + encode_abi(types, values).hex(),
+        "logIndex": log_index,
+        "transactionIndex": 0,
+        "transactionHash": HexBytes(b"\x01" * 32),
+        "blockHash": HexBytes(b"\x02" * 32),
+        "blockNumber": 1
+    })
+
+
+def test_decode_receipt():
+    """Test that every log in a receipt is decoded once and grouped by event name"""
+    decoder = EventDecoder(Web3(), abi_values)
+
+    unknown_log = AttributeDict({
+        "topics": [HexBytes(b"\x03" * 32)],
+        "data": "0x",
+        "logIndex": 3,
+        "transactionHash": HexBytes(b"\x01" * 32)
+    })
+    tx_receipt = AttributeDict({
+        "logs": [
+            make_log(update_bio_abi, ["uint256", "string"], [1, "first"], 0),
+            make_log(update_is_creator_abi, ["uint256", "bool"], [1, True], 1),
+            make_log(update_bio_abi, ["uint256", "string"], [2, "second"], 2),
+            unknown_log
+        ]
+    })
+
+    events = decoder.decode_receipt("UserFactory", tx_receipt)
+
+    assert set(events.keys()) == {"UpdateBio", "UpdateIsCreator"}
+    assert [event["args"]._bio for event in events["UpdateBio"]] == ["first", "second"]
+    assert [event["args"]._userId for event in events["UpdateBio"]] == [1, 2]
+    assert events["UpdateIsCreator"][0]["args"]._isCreator is True
+    assert events["UpdateIsCreator"][0].blockHash == HexBytes(b"\x02" * 32)
@@ -0,0 +1,66 @@
+"""
+Latency and error scoring for IPFS gateways
+"""
+
+import threading
+from collections import deque
+
+
+class GatewaySelector:
+    """ Tracks an EWMA latency and error rate per gateway to rank gateways for a request,
+        and derives the delay before hedging to another gateway from recent request latencies.
+
+        Gateways without samples rank first so that new content nodes get measured.
+    """
+
+    def __init__(
+            self, alpha=0.3, failure_penalty_sec=5, hedge_percentile=90,
+            default_hedge_delay_sec=0.5, min_hedge_delay_sec=0.05, max_hedge_delay_sec=5, latency_window=200):
+        self._alpha = alpha
+        self._failure_penalty_sec = failure_penalty_sec
+        self._hedge_percentile = hedge_percentile
+        self._default_hedge_delay_sec = default_hedge_delay_sec
+        self._min_hedge_delay_sec = min_hedge_delay_sec
+        self._max_hedge_delay_sec = max_hedge_delay_sec
+        # {gateway: {"latency": ewma seconds, "error_rate": ewma of failures}}
+        self._scores = {}
+        self._latencies = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def record_success(self, gateway, latency):
+        with self._lock:
+            self._update(gateway, latency, 0)
+            self._latencies.append(latency)
+
+    def record_failure(self, gateway, latency):
+        with self._lock:
+            self._update(gateway, latency, 1)
+
+    def score(self, gateway):
+        """ Expected seconds to retrieve content from gateway, lower is better """
+        with self._lock:
+            gateway_score = self._scores.get(gateway)
+        if gateway_score is None:
+            return 0
+        return gateway_score["latency"] + gateway_score["error_rate"] * self._failure_penalty_sec
+
+    def rank(self, items, get_gateway=lambda gateway: gateway):
+        """ Sorts items, gateways unless get_gateway maps them to one, from the best to the worst score """
+        return sorted(items, key=lambda item: self.score(get_gateway(item)))
+
+    def hedge_delay(self):
+        """ Seconds to wait on in-flight requests before sending one to the next ranked gateway """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return self._default_hedge_delay_sec
+        index = min(len(latencies) - 1, int(len(latencies) * self._hedge_percentile / 100))
+        return min(max(latencies[index], self._min_hedge_delay_sec), self._max_hedge_delay_sec)
+
+    def _update(self, gateway, latency, error):
+        gateway_score = self._scores.get(gateway)
+        if gateway_score is None:
+            self._scores[gateway] = {"latency": latency, "error_rate": error}
+            return
+        gateway_score["latency"] += self._alpha * (latency - gateway_score["latency"])
+        gateway_score["error_rate"] += self._alpha * (error - gateway_score["error_rate"])
@@ -0,0 +1,25 @@
+from src.utils.gateway_selector import GatewaySelector
+
+
+def test_gateway_selector():
+    """Test that gateways are ranked by latency and errors and that the hedge delay follows recent latencies"""
+    selector = GatewaySelector(alpha=0.5, failure_penalty_sec=5, hedge_percentile=50, default_hedge_delay_sec=0.5)
+    assert selector.hedge_delay() == 0.5
+
+    selector.record_success("https://fast.audius.co", 0.1)
+    selector.record_success("https://slow.audius.co", 1)
+    selector.record_success("https://flaky.audius.co", 0.1)
+    selector.record_failure("https://flaky.audius.co", 0.1)
+
+    # Unmeasured gateways are tried first, then by expected latency including the failure penalty
+    assert selector.rank([
+        "https://flaky.audius.co", "https://slow.audius.co", "https://fast.audius.co", "https://new.audius.co"
+    ]) == ["https://new.audius.co", "https://fast.audius.co", "https://slow.audius.co", "https://flaky.audius.co"]
+    # Content urls are ranked by the score of their gateway
+    assert selector.rank(
+        ["https://slow.audius.co/ipfs/Qm", "https://fast.audius.co/ipfs/Qm"],
+        lambda url: url.split("/ipfs/")[0]
+    ) == ["https://fast.audius.co/ipfs/Qm", "https://slow.audius.co/ipfs/Qm"]
+
+    assert selector.score("https://flaky.audius.co") == 0.1 + 0.5 * 5
+    assert selector.hedge_delay() == 0.1
@@ -2,6 +2,7 @@ import datetime
 import logging
 import os
 import json
+import operator
 from json.encoder import JSONEncoder
 import re
 import time
@@ -85,13 +86,49 @@ def is_fqdn(endpoint_str):
         return True
     return False
 
+# {model class: (column keys, column key set, getter of the column values as a tuple)}
+# computed once per model rather than for every converted row
+_model_columns = {}
+
+
+def get_model_columns(model):
+    """ Returns the column keys of the given SQLAlchemy model class, as a tuple and a set,
+        and a function returning a tuple of an instance's values for those columns
+    """
+    model_columns = _model_columns.get(model)
+    if model_columns is None:
+        column_keys = tuple(model.__table__.columns.keys())
+        if len(column_keys) == 1:
+            get_values = lambda obj: (getattr(obj, column_keys[0]),)
+        else:
+            get_values = operator.attrgetter(*column_keys)
+        model_columns = (column_keys, frozenset(column_keys), get_values)
+        _model_columns[model] = model_columns
+    return model_columns
+
+
 # relationships_to_include is a list of table names that have relationships to be added
 # and returned in the model_dict
 def query_result_to_list(query_result, relationships_to_include=None):
+    return [model_to_dictionary(row, None, relationships_to_include) for row in query_result]
+
+
+# Runs a query of a single model and returns the rows as dictionaries, the same as
+# query_result_to_list(query.all()) but without hydrating ORM objects.
+# The model's columns are selected directly, so the rows skip the session identity map.
+def model_query_to_list(query, model):
+    column_keys = get_model_columns(model)[0]
+    table = model.__table__
+    primary_key_indexes = [column_keys.index(column.key) for column in table.primary_key.columns]
     results = []
-    for row in query_result:
-        results.append(model_to_dictionary(
-            row, None, relationships_to_include))
+    # Like the ORM, only return the first row of each entity when joins repeat it
+    seen_primary_keys = set()
+    for row in query.with_entities(*table.columns):
+        primary_key = tuple(row[index] for index in primary_key_indexes)
+        if primary_key in seen_primary_keys:
+            continue
+        seen_primary_keys.add(primary_key)
+        results.append(dict(zip(column_keys, row)))
     return results
 
 
@@ -102,21 +139,17 @@ def query_result_to_list(query_result, relationships_to_include=None):
 # and returned in the model_dict
 def model_to_dictionary(db_model_obj, exclude_keys=None, relationships_to_include=None):
     """ Converts the given SQLAlchemy model object into a dictionary. """
-    model_dict = {}
-    if exclude_keys is None:
-        exclude_keys = []
+    column_keys, column_key_set, get_values = get_model_columns(type(db_model_obj))
+    if not exclude_keys:
+        return dict(zip(column_keys, get_values(db_model_obj)))
 
     # make sure exclude_keys are actual fields
-    possible_keys = db_model_obj.__table__.columns.keys()
-    assert set(exclude_keys).issubset(set(possible_keys))
-
-    for column_name in possible_keys:
-        if column_name in exclude_keys:
-            continue
-
-        model_dict[column_name] = getattr(db_model_obj, column_name)
+    assert column_key_set.issuperset(exclude_keys)
 
-    return model_dict
+    return {
+        column_name: getattr(db_model_obj, column_name)
+        for column_name in column_keys if column_name not in exclude_keys
+    }
 
 # Convert a tuple of model format into the proper model itself represented as a dictionary.
 # The number of entries in the tuple, must map the model.
@@ -126,12 +159,11 @@ def model_to_dictionary(db_model_obj, exclude_keys=None, relationships_to_includ
 # a dictionary with column keys.
 def tuple_to_model_dictionary(t, model):
     """Converts the given tuple into the proper SQLAlchemy model object in dictionary form."""
-    keys = model.__table__.columns.keys()
+    keys = get_model_columns(model)[0]
     assert len(t) == len(keys)
 
     return dict(zip(keys, t))
 
-
 log_format = {
     "levelno": "levelno",
     "level": "levelname",
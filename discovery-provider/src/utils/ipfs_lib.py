@@ -2,11 +2,14 @@ import concurrent.futures
 import json
 import logging
 import time
+from collections import deque
 from urllib.parse import urljoin, urlparse
 
 import ipfshttpclient
 import requests
+from requests.adapters import HTTPAdapter
 from src.utils.helpers import get_valid_multiaddr_from_id_json
+from src.utils.gateway_selector import GatewaySelector
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +17,18 @@ logger = logging.getLogger(__name__)
 class IPFSClient:
     """ Helper class for Audius Discovery Provider + IPFS interaction """
 
-    def __init__(self, ipfs_peer_host, ipfs_peer_port):
+    def __init__(self, ipfs_peer_host, ipfs_peer_port, metadata_cache=None, gateway_initial_fanout=2):
         self._api = ipfshttpclient.connect(f"/dns/{ipfs_peer_host}/tcp/{ipfs_peer_port}/http")
         self._cnode_endpoints = []
+        # Optional MetadataCache of raw CID content retrieved from the local node or gateways
+        self._metadata_cache = metadata_cache
+        self._prefetched_metadata = {}
+        self._gateway_selector = GatewaySelector()
+        self._gateway_initial_fanout = gateway_initial_fanout
+        self._gateway_session = requests.Session()
+        gateway_adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        self._gateway_session.mount("http://", gateway_adapter)
+        self._gateway_session.mount("https://", gateway_adapter)
         self._ipfsid = self._api.id()
         self._multiaddr = get_valid_multiaddr_from_id_json(self._ipfsid)
 
@@ -30,10 +42,47 @@ class IPFSClient:
         return metadata
 
     # pylint: disable=broad-except
+    def prefetch_metadata(self, metadata_requests, max_workers):
+        """ Resolve (multihash, metadata_format, user_replica_set) requests concurrently.
+            Retrieved metadata replaces any previously prefetched metadata and is served once by get_metadata.
+            Failed requests are not stored, so get_metadata retries and raises them as usual.
+        """
+        prefetched_metadata = {}
+        if not metadata_requests:
+            self._prefetched_metadata = prefetched_metadata
+            return prefetched_metadata
+
+        start_time = time.time()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_multihash = {
+                executor.submit(self.fetch_metadata, multihash, metadata_format, user_replica_set): multihash
+                for multihash, metadata_format, user_replica_set in metadata_requests
+            }
+            for future in concurrent.futures.as_completed(future_to_multihash):
+                multihash = future_to_multihash[future]
+                try:
+                    prefetched_metadata[multihash] = future.result()
+                except Exception as e:
+                    logger.error(f"IPFSCLIENT | prefetch_metadata failed for {multihash}: {e}")
+
+        self._prefetched_metadata = prefetched_metadata
+        logger.info(
+            f"IPFSCLIENT | prefetch_metadata retrieved {len(prefetched_metadata)}/{len(metadata_requests)} "
+            f"CIDs in {time.time() - start_time} seconds | metadata cache: {self.metadata_cache_stats()}"
+        )
+        return prefetched_metadata
+
     def get_metadata(self, multihash, metadata_format, user_replica_set=None):
         """ Retrieve file from IPFS, validating metadata requirements prior to
             returning an object with no missing entries
         """
+        prefetched_metadata = self._prefetched_metadata.pop(multihash, None)
+        if prefetched_metadata is not None:
+            logger.info(f"IPFSCLIENT | get_metadata - {multihash} from prefetch")
+            return prefetched_metadata
+        return self.fetch_metadata(multihash, metadata_format, user_replica_set)
+
+    def fetch_metadata(self, multihash, metadata_format, user_replica_set=None):
         logger.warning(f"IPFSCLIENT | get_metadata - {multihash}")
         api_metadata = metadata_format
         retrieved_from_local_node = False
@@ -83,30 +132,82 @@ class IPFSClient:
         validate_url = urlparse(url)
         if not validate_url.scheme:
             raise Exception(f"IPFSCLIENT | Invalid URL from provided gateway addr - {url}")
-        r = requests.get(url, timeout=max_timeout)
+        gateway = get_gateway_from_url(url)
+        start_time = time.time()
+        try:
+            r = self._gateway_session.get(url, timeout=max_timeout)
+        except Exception:
+            self._gateway_selector.record_failure(gateway, time.time() - start_time)
+            raise
+        if r.status_code == 200:
+            self._gateway_selector.record_success(gateway, time.time() - start_time)
+        else:
+            self._gateway_selector.record_failure(gateway, time.time() - start_time)
         return r
 
-    def query_ipfs_metadata_json(self, gateway_ipfs_urls, metadata_format):
+    def query_ipfs_metadata_json(self, gateway_ipfs_urls, metadata_format, multihash=None):
+        """ Query gateways in order of their latency and error score. The best ranked gateways are
+            queried first, and the next ranked gateway is only added when a request fails or none
+            responds within the selector's hedge delay.
+        """
         formatted_json = None
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Start the load operations and mark each future with its URL
-            future_to_url = {executor.submit(self.load_metadata_url, url, 5): url for url in gateway_ipfs_urls}
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    r = future.result()
-                    if r.status_code != 200:
-                        logger.warning(f"IPFSCLIENT | {url} - {r.status_code}")
-                        raise Exception("Invalid status_code")
-                    # Override with retrieved JSON value
-                    formatted_json = self.get_metadata_from_json(
-                        metadata_format, r.json()
-                    )
-                    # Exit loop if dict is successfully retrieved
-                    logger.warning(f"IPFSCLIENT | Retrieved from {url}")
-                    break
-                except Exception as exc:
-                    logger.error(f"IPFSClient | {url} generated an exception: {exc}")
+        pending_urls = deque(self._gateway_selector.rank(gateway_ipfs_urls, get_gateway_from_url))
+        if not pending_urls:
+            return formatted_json
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(pending_urls))
+        future_to_url = {}
+        in_flight = set()
+
+        def query_next_gateway():
+            url = pending_urls.popleft()
+            future = executor.submit(self.load_metadata_url, url, 5)
+            future_to_url[future] = url
+            in_flight.add(future)
+
+        try:
+            for _ in range(min(self._gateway_initial_fanout, len(pending_urls))):
+                query_next_gateway()
+
+            while in_flight:
+                done, not_done = concurrent.futures.wait(
+                    in_flight,
+                    timeout=self._gateway_selector.hedge_delay(),
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                in_flight.clear()
+                in_flight.update(not_done)
+                if not done:
+                    # Hedge to the next best gateway
+                    if pending_urls:
+                        query_next_gateway()
+                    continue
+
+                for future in done:
+                    url = future_to_url[future]
+                    try:
+                        r = future.result()
+                        if r.status_code != 200:
+                            logger.warning(f"IPFSCLIENT | {url} - {r.status_code}")
+                            raise Exception("Invalid status_code")
+                        # Override with retrieved JSON value
+                        formatted_json = self.get_metadata_from_json(
+                            metadata_format, r.json()
+                        )
+                        if self._metadata_cache is not None and multihash:
+                            self._metadata_cache.put(multihash, r.content)
+                        # Exit loop if dict is successfully retrieved
+                        logger.warning(f"IPFSCLIENT | Retrieved from {url}")
+                        return formatted_json
+                    except Exception as exc:
+                        logger.error(f"IPFSClient | {url} generated an exception: {exc}")
+                        if pending_urls:
+                            query_next_gateway()
+        finally:
+            # Don't wait on slower gateways once metadata is retrieved
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
         return formatted_json
 
     def get_metadata_from_gateway(self, multihash, metadata_format, user_replica_set=None):
@@ -124,7 +225,7 @@ class IPFSClient:
             user_replicas = user_replica_set.split(",")
             try:
                 query_urls = ["%s/ipfs/%s" % (addr, multihash) for addr in user_replicas]
-                data = self.query_ipfs_metadata_json(query_urls, metadata_format)
+                data = self.query_ipfs_metadata_json(query_urls, metadata_format, multihash)
                 if data is None:
                     raise Exception()
                 return data
@@ -139,7 +240,7 @@ class IPFSClient:
                 \ncnode_endpoints: {self._cnode_endpoints}")
 
         query_urls = ["%s/ipfs/%s" % (addr, multihash) for addr in gateway_endpoints]
-        data = self.query_ipfs_metadata_json(query_urls, metadata_format)
+        data = self.query_ipfs_metadata_json(query_urls, metadata_format, multihash)
         if data is None:
             raise Exception(
                 f"IPFSCLIENT | Failed to retrieve CID {multihash} from gateway"
@@ -174,12 +275,18 @@ class IPFSClient:
         return self.get_metadata_from_json(metadata_format, resp_val)
 
     def cat(self, multihash):
+        if self._metadata_cache is not None:
+            cached_content = self._metadata_cache.get(multihash)
+            if cached_content is not None:
+                return cached_content
         try:
             res = self._api.cat(multihash, timeout=1)
-            return res
         except:
             logger.error(f"IPFSCLIENT | IPFS cat timed out after 1s for CID {multihash}")
             raise  # error is of type ipfshttpclient.exceptions.TimeoutError
+        if self._metadata_cache is not None:
+            self._metadata_cache.put(multihash, res)
+        return res
 
     def connect_peer(self, peer):
         try:
@@ -197,6 +304,15 @@ class IPFSClient:
     def ipfs_id_multiaddr(self):
         return self._multiaddr
 
+    def metadata_cache_stats(self):
+        if self._metadata_cache is None:
+            return None
+        return self._metadata_cache.stats()
+
+def get_gateway_from_url(url):
+    parsed_url = urlparse(url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}"
+
 def construct_image_dir_gateway_url(address, CID):
     """Construct the gateway url for an image directory.
 
@@ -0,0 +1,110 @@
+"""
+Process-local LRU cache tier in front of the redis entity caches
+"""
+
+import copy
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Redis pub/sub channel that the entity cache removals are published to,
+# as a comma-separated list of the removed keys
+entity_cache_invalidation_channel = "entity_cache_invalidations"
+
+# Entities are only kept for a few seconds, which bounds staleness if an invalidation is missed
+local_entity_cache_ttl_sec = 5
+local_entity_cache_max_size = 5000
+
+
+class LocalCache:
+    """ Thread safe LRU of deserialized values that expire ttl_sec after being set.
+        Values are deep copied in and out since callers populate and modify the nested metadata
+        of the dicts they are given, e.g. remix parents and playlist contents.
+    """
+
+    def __init__(self, max_size, ttl_sec):
+        self._max_size = max_size
+        self._ttl_sec = ttl_sec
+        # {key: (expires_at, value)}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None:
+                    values.append(None)
+                elif entry[0] <= now:
+                    del self._entries[key]
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    values.append(copy.deepcopy(entry[1]))
+        return values
+
+    def set_many(self, items):
+        expires_at = time.time() + self._ttl_sec
+        with self._lock:
+            for key, value in items:
+                self._entries[key] = (expires_at, copy.deepcopy(value))
+                self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_entity_cache = LocalCache(local_entity_cache_max_size, local_entity_cache_ttl_sec)
+
+# pid of the process whose invalidation listener is running, since listener threads don't survive a fork
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def handle_invalidation_message(message):
+    data = message["data"]
+    if isinstance(data, bytes):
+        data = data.decode()
+    local_entity_cache.delete_many(data.split(","))
+
+
+def get_local_entity_cache(redis):
+    """ Returns the process-local entity cache, subscribing this process to entity cache
+        invalidations on first use
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return local_entity_cache
+
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            # Entries inherited from a parent process may have missed invalidations
+            local_entity_cache.clear()
+            try:
+                pubsub = redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{entity_cache_invalidation_channel: handle_invalidation_message})
+                pubsub.run_in_thread(sleep_time=1, daemon=True)
+                _listener_pid = os.getpid()
+            except Exception as e:
+                logger.error(f"local_cache.py | Unable to subscribe to entity cache invalidations: {e}")
+                return None
+    return local_entity_cache
+
+
+def publish_invalidation(redis, keys):
+    if keys:
+        redis.publish(entity_cache_invalidation_channel, ",".join(keys))
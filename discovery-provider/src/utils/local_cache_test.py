@@ -0,0 +1,63 @@
+from time import sleep
+from src.utils.local_cache import LocalCache, handle_invalidation_message, local_entity_cache
+from src.utils.redis_cache import get_cached_entities, set_cached_entities, get_track_id_cache_key
+
+
+def test_local_cache():
+    """Test that the local cache evicts least recently used entries, expires entries and copies values"""
+    cache = LocalCache(max_size=2, ttl_sec=1)
+    cache.set_many([("track:id:1", {"track_id": 1}), ("track:id:2", {"track_id": 2})])
+    assert cache.get_many(["track:id:1"]) == [{"track_id": 1}]
+
+    # track:id:2 is now the least recently used entry
+    cache.set_many([("track:id:3", {"track_id": 3})])
+    assert cache.get_many(["track:id:1", "track:id:2", "track:id:3"]) == [{"track_id": 1}, None, {"track_id": 3}]
+
+    # Callers can modify returned values without changing the cache
+    track = cache.get_many(["track:id:1"])[0]
+    track["user"] = {"user_id": 1}
+    assert cache.get_many(["track:id:1"]) == [{"track_id": 1}]
+
+    cache.delete_many(["track:id:1"])
+    assert cache.get_many(["track:id:1"]) == [None]
+
+    sleep(1)
+    assert cache.get_many(["track:id:3"]) == [None]
+
+
+def test_local_cache_copies_nested_values():
+    """Test that changes to nested fields of set or returned values don't change the cached values"""
+    cache = LocalCache(max_size=2, ttl_sec=60)
+    playlist = {"playlist_id": 1, "playlist_contents": {"track_ids": [{"track": 1}, {"track": 2}]}}
+    cache.set_many([("playlist:id:1", playlist)])
+    playlist["playlist_contents"]["track_ids"] = playlist["playlist_contents"]["track_ids"][:1]
+    playlist["playlist_contents"]["track_ids"][0]["track"] = 3
+
+    cached_playlist = cache.get_many(["playlist:id:1"])[0]
+    assert cached_playlist["playlist_contents"]["track_ids"] == [{"track": 1}, {"track": 2}]
+    cached_playlist["playlist_contents"]["track_ids"].pop()
+    cached_playlist["playlist_contents"]["track_ids"][0]["track"] = 4
+    assert cache.get_many(["playlist:id:1"])[0]["playlist_contents"]["track_ids"] == [{"track": 1}, {"track": 2}]
+
+
+def test_get_cached_entities(redis_mock):
+    """Test that entities are read through the local cache and dropped by invalidation messages"""
+    track_key = get_track_id_cache_key(1)
+    set_cached_entities([(track_key, {"track_id": 1})], 60, "track")
+    assert get_cached_entities([track_key, get_track_id_cache_key(2)], "track") == [{"track_id": 1}, None]
+
+    # Changing the nested fields of an entity after setting or reading it doesn't change the cached entity
+    remix_key = get_track_id_cache_key(3)
+    remix = {"track_id": 3, "remix_of": {"tracks": [{"parent_track_id": 1}]}}
+    set_cached_entities([(remix_key, remix)], 60, "track")
+    remix["remix_of"]["tracks"][0]["parent_track_id"] = "encoded"
+    get_cached_entities([remix_key], "track")[0]["remix_of"]["tracks"][0].update({"parent_track_id": "encoded"})
+    assert get_cached_entities([remix_key], "track")[0]["remix_of"] == {"tracks": [{"parent_track_id": 1}]}
+
+    # Served from the local cache while redis is out of date
+    redis_mock.delete(track_key)
+    assert get_cached_entities([track_key], "track") == [{"track_id": 1}]
+
+    handle_invalidation_message({"data": track_key.encode()})
+    assert get_cached_entities([track_key], "track") == [None]
+    local_entity_cache.clear()
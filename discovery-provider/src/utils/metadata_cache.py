@@ -0,0 +1,120 @@
+"""
+Content addressed cache for IPFS metadata
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache:
+    """ Two tier cache of raw IPFS content keyed by CID.
+
+        CID content is immutable, so entries never need invalidation. Reads check an in-process
+        LRU of up to lru_size entries, then an on-disk SQLite store. The disk store is bounded to
+        max_disk_bytes by evicting its least recently read entries.
+    """
+
+    def __init__(self, path, lru_size=10000, max_disk_bytes=1024 * 1024 * 1024):
+        self._lru = OrderedDict()
+        self._lru_size = lru_size
+        self._max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._path = path
+        # SQLite connections must not be used across a fork, and the cache is created in the celery
+        # parent process before its workers are forked, so each process opens its own connection on first use
+        self._conn = None
+        self._conn_pid = None
+        self._disk_bytes = 0
+
+    def get(self, cid):
+        with self._lock:
+            content = self._lru.get(cid)
+            if content is not None:
+                self._lru.move_to_end(cid)
+                self._stats["memory_hits"] += 1
+                return content
+
+            row = self._get_conn().execute("SELECT content FROM ipfs_content WHERE cid = ?", (cid,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            content = bytes(row[0])
+            self._get_conn().execute("UPDATE ipfs_content SET accessed_at = ? WHERE cid = ?", (time.time(), cid))
+            self._put_lru(cid, content)
+            self._stats["disk_hits"] += 1
+            return content
+
+    def put(self, cid, content):
+        with self._lock:
+            self._put_lru(cid, content)
+            self._get_conn().execute(
+                "INSERT OR REPLACE INTO ipfs_content (cid, content, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (cid, sqlite3.Binary(content), len(content), time.time())
+            )
+            self._disk_bytes += len(content)
+            if self._disk_bytes > self._max_disk_bytes:
+                self._evict_disk()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+            return stats
+
+    def _get_conn(self):
+        """ Returns this process's connection to the disk store, opening it on first use.
+            Called with self._lock held.
+        """
+        if self._conn_pid == os.getpid():
+            return self._conn
+
+        # check_same_thread is disabled since metadata is fetched from worker threads;
+        # every connection access is serialized by self._lock
+        self._conn = sqlite3.connect(self._path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn_pid = os.getpid()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ipfs_content ("
+            "cid TEXT PRIMARY KEY, content BLOB NOT NULL, size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ipfs_content_accessed_at ON ipfs_content (accessed_at)")
+        # Running estimate of the disk store size, resynced before evicting since other processes share the store
+        self._disk_bytes = self._get_disk_bytes()
+        return self._conn
+
+    def _put_lru(self, cid, content):
+        self._lru[cid] = content
+        self._lru.move_to_end(cid)
+        while len(self._lru) > self._lru_size:
+            self._lru.popitem(last=False)
+
+    def _get_disk_bytes(self):
+        (disk_bytes,) = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ipfs_content").fetchone()
+        return disk_bytes
+
+    def _evict_disk(self):
+        self._disk_bytes = self._get_disk_bytes()
+        evicted = 0
+        while self._disk_bytes > self._max_disk_bytes:
+            rows = self._conn.execute(
+                "SELECT cid, size FROM ipfs_content ORDER BY accessed_at ASC LIMIT 100"
+            ).fetchall()
+            if not rows:
+                break
+            for cid, size in rows:
+                if self._disk_bytes <= self._max_disk_bytes:
+                    break
+                self._conn.execute("DELETE FROM ipfs_content WHERE cid = ?", (cid,))
+                self._disk_bytes -= size
+                evicted += 1
+        self._stats["evictions"] += evicted
+        logger.info(f"metadata_cache.py | Evicted {evicted} entries, {self._disk_bytes} bytes on disk")
@@ -0,0 +1,45 @@
+from src.utils.metadata_cache import MetadataCache
+
+
+def test_metadata_cache(tmp_path):
+    """Test that the metadata cache serves entries from memory and disk and evicts by size"""
+    path = str(tmp_path / "metadata_cache.db")
+    cache = MetadataCache(path, lru_size=1, max_disk_bytes=10)
+
+    assert cache.get("QmA") is None
+    cache.put("QmA", b"aaaa")
+    cache.put("QmB", b"bbbb")
+
+    # QmA was pushed out of the single entry LRU but is still on disk
+    assert cache.get("QmB") == b"bbbb"
+    assert cache.get("QmA") == b"aaaa"
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+
+    # Exceeding max_disk_bytes evicts the least recently read entry, QmB
+    cache.put("QmC", b"cccc")
+    assert cache.stats()["evictions"] == 1
+
+    # A new process reads the persisted entries
+    reopened_cache = MetadataCache(path, lru_size=1, max_disk_bytes=10)
+    assert reopened_cache.get("QmA") == b"aaaa"
+    assert reopened_cache.get("QmC") == b"cccc"
+    assert reopened_cache.get("QmB") is None
+
+
+def test_metadata_cache_connection_per_process(tmp_path, monkeypatch):
+    """Test that the disk store is opened on first use, and reopened by a forked process"""
+    path = tmp_path / "metadata_cache.db"
+    cache = MetadataCache(str(path), lru_size=1, max_disk_bytes=10)
+    assert not path.exists()
+
+    cache.put("QmA", b"aaaa")
+    parent_conn = cache._get_conn()
+    assert path.exists()
+
+    monkeypatch.setattr("src.utils.metadata_cache.os.getpid", lambda: -1)
+    cache.put("QmB", b"bbbb")
+    assert cache._get_conn() is not parent_conn
+    assert cache.get("QmA") == b"aaaa"
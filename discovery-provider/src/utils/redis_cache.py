@@ -1,9 +1,14 @@
 import logging  # pylint: disable=C0302
 import functools
 import pickle
+import time
+import uuid
 from flask.globals import request
+from redis.exceptions import WatchError
 from src.utils import redis_connection
 from src.utils.query_params import stringify_query_params
+from src.utils.local_cache import get_local_entity_cache, publish_invalidation
+from src.utils.cache_codecs import PickleCodec, CompressedPickleCodec
 logger = logging.getLogger(__name__)
 
 # Redis Key Convention:
@@ -36,15 +41,118 @@ def pickle_and_set(redis, key, obj, ttl=None):
     serialized = pickle.dumps(obj)
     redis.set(key, serialized, ttl)
 
+# Stale-while-revalidate: a value is fresh for its ttl and is then kept for stale_ttl_sec more,
+# so that while one worker recomputes it the other workers can serve the stale value.
+# Freshness is tracked in a sibling key so the stored value stays a plain pickle.
+stale_ttl_sec = 60
+# Only one worker holds a key's refresh lock, which expires in case that worker dies
+refresh_lock_ttl_sec = 30
+# Workers that miss without a stale value wait up to this long for the lock holder's value
+single_flight_wait_sec = 3
+single_flight_poll_interval_sec = 0.05
+
+def get_fresh_key(key):
+    return f"{key}:fresh"
+
+def get_cache_entry(redis, key, ttl_sec):
+    """Returns (value, is_fresh) for the cached key, or (None, False) on a miss
+
+    Values without a ttl never go stale.
+    """
+    cached_value, fresh = redis.mget([key, get_fresh_key(key)])
+    if cached_value is None:
+        logger.info(f"Redis Cache - miss {key}")
+        return None, False
+    try:
+        deserialized = pickle.loads(cached_value)
+    except Exception as e:
+        logger.warning(f"Unable to deserialize cached response: {e}")
+        return None, False
+    is_fresh = ttl_sec is None or fresh is not None
+    logger.info(f"Redis Cache - {'hit' if is_fresh else 'stale hit'} {key}")
+    return deserialized, is_fresh
+
+def set_cache_entry(redis, key, obj, ttl_sec):
+    """Sets the value with a hard expiry of ttl_sec + stale_ttl_sec, marking it fresh for ttl_sec"""
+    serialized = pickle.dumps(obj)
+    with redis.pipeline(transaction=False) as pipe:
+        if ttl_sec is None:
+            pipe.set(key, serialized)
+            pipe.delete(get_fresh_key(key))
+        else:
+            pipe.set(key, serialized, ttl_sec + stale_ttl_sec)
+            pipe.set(get_fresh_key(key), 1, ttl_sec)
+        pipe.execute()
+
+def get_refresh_lock_key(key):
+    return f"{key}:lock"
+
+def acquire_refresh_lock(redis, key):
+    """Returns a token for the key's refresh lock if this worker acquired it, otherwise None"""
+    token = uuid.uuid4().hex
+    try:
+        if redis.set(get_refresh_lock_key(key), token, ex=refresh_lock_ttl_sec, nx=True):
+            return token
+    except Exception as e:
+        logger.warning(f"Unable to acquire refresh lock for {key}: {e}")
+    return None
+
+def release_refresh_lock(redis, key, token):
+    # The lock may have expired while recomputing and been taken by another worker
+    lock_key = get_refresh_lock_key(key)
+    if redis.get(lock_key) == token.encode():
+        redis.delete(lock_key)
+
+def wait_for_cache_entry(redis, key, ttl_sec):
+    """Polls for the value being computed by the lock holder, returning None if it does not arrive in time"""
+    deadline = time.time() + single_flight_wait_sec
+    while time.time() < deadline:
+        time.sleep(single_flight_poll_interval_sec)
+        cached_value, _ = get_cache_entry(redis, key, ttl_sec)
+        if cached_value is not None:
+            return cached_value
+    logger.info(f"Redis Cache - timed out waiting for {key}")
+    return None
+
+def get_or_compute(redis, key, ttl_sec, work_func):
+    """Single-flight cache read
+
+    Returns (cached_value, None) when the cached value can be served, otherwise
+    (None, work_func()) with work_func run by at most one worker at a time unless the wait times out.
+    work_func is responsible for caching its result.
+    """
+    cached_value, is_fresh = get_cache_entry(redis, key, ttl_sec)
+    if cached_value is not None and is_fresh:
+        return cached_value, None
+
+    lock_token = acquire_refresh_lock(redis, key)
+    if lock_token is None:
+        # Another worker is recomputing the value
+        if cached_value is not None:
+            return cached_value, None
+        cached_value = wait_for_cache_entry(redis, key, ttl_sec)
+        if cached_value is not None:
+            return cached_value, None
+        return None, work_func()
+
+    try:
+        return None, work_func()
+    finally:
+        release_refresh_lock(redis, key, lock_token)
+
 def use_redis_cache(key, ttl_sec, work_func):
     """Attemps to return value by key, otherwise caches and returns `work_func`"""
     redis = redis_connection.get_redis()
-    cached_value = get_pickled_key(redis, key)
-    if cached_value:
+
+    def compute_and_set():
+        to_cache = work_func()
+        set_cache_entry(redis, key, to_cache, ttl_sec)
+        return to_cache
+
+    cached_value, computed = get_or_compute(redis, key, ttl_sec, compute_and_set)
+    if cached_value is not None:
         return cached_value
-    to_cache = work_func()
-    pickle_and_set(redis, key, to_cache, ttl_sec)
-    return to_cache
+    return computed
 
 def cache(**kwargs):
     """
@@ -56,6 +164,11 @@ def cache(**kwargs):
             status code < 400
         transform: optional,func The transform function of the wrapped function
             to convert the function response to request response
+        personalize: optional,object Lets requests with a `user_id` share the cache
+            entry of requests without one. `get_user_id(user_id)` decodes the query param,
+            `strip(response)` removes the user specific fields before caching, and
+            `overlay(response, user_id)` adds them back to a cached response.
+            Requests with a `user_id` are otherwise not served from the cache.
 
     Usage Notes:
         If the wrapped function returns a tuple, the transform function will not
@@ -78,60 +191,137 @@ def cache(**kwargs):
     """
     ttl_sec = kwargs["ttl_sec"] if "ttl_sec" in kwargs else default_ttl_sec
     transform = kwargs["transform"] if "transform" in kwargs else None
+    personalize = kwargs["personalize"] if "personalize" in kwargs else None
     redis = redis_connection.get_redis()
 
     def outer_wrap(func):
         @functools.wraps(func)
         def inner_wrap(*args, **kwargs):
             has_user_id = 'user_id' in request.args and request.args['user_id'] is not None
-            key = extract_key(request.path, request.args.items())
-            if not has_user_id:
-                cached_resp = redis.get(key)
-
-                if cached_resp:
-                    logger.info(f"Redis Cache - hit {key}")
-                    try:
-                        deserialized = pickle.loads(cached_resp)
-                        if transform is not None:
-                            return transform(deserialized)
-                        return deserialized, 200
-                    except Exception as e:
-                        logger.warning(f"Unable to deserialize cached response: {e}")
-
-                logger.info(f"Redis Cache - miss {key}")
-            response = func(*args, **kwargs)
-
-            if len(response) == 2:
-                resp, status_code = response
-                if status_code < 400:
-                    serialized = pickle.dumps(resp)
-                    redis.set(key, serialized, ttl_sec)
-                return resp, status_code
-            serialized = pickle.dumps(response)
-            redis.set(key, serialized, ttl_sec)
-            return transform(response)
+            user_id = None
+            if has_user_id and personalize is not None:
+                user_id = personalize.get_user_id(request.args['user_id'])
+            if user_id is not None:
+                # Logged in requests share the logged out entry and overlay the current user's fields
+                key = extract_key(request.path, filter(lambda x: x[0] != 'user_id', request.args.items()))
+            else:
+                key = extract_key(request.path, request.args.items())
+
+            def cache_response(resp):
+                if user_id is not None:
+                    resp = personalize.strip(resp)
+                set_cache_entry(redis, key, resp, ttl_sec)
+
+            def compute_and_set():
+                response = func(*args, **kwargs)
+                if len(response) == 2:
+                    resp, status_code = response
+                    if status_code < 400:
+                        cache_response(resp)
+                    return resp, status_code
+                cache_response(response)
+                return transform(response)
+
+            if has_user_id and user_id is None:
+                return compute_and_set()
+
+            cached_resp, response = get_or_compute(redis, key, ttl_sec, compute_and_set)
+            if cached_resp is None:
+                return response
+            if user_id is not None:
+                cached_resp = personalize.overlay(cached_resp, user_id)
+            if transform is not None:
+                return transform(cached_resp)
+            return cached_resp, 200
         return inner_wrap
     return outer_wrap
 
 
+# Entity cache key families as {entity_type: (format version, codec)}.
+# Bumping a family's version moves it to new keys, so processes running different formats
+# during a deploy never decode each other's values.
+entity_cache_families = {
+    "user": (2, PickleCodec()),
+    # tracks and playlists carry large JSON columns such as track_segments and playlist_contents
+    "track": (2, CompressedPickleCodec()),
+    "playlist": (2, CompressedPickleCodec()),
+}
+
+def get_entity_cache_key(entity_type, id, version=None):
+    if version is None:
+        version = entity_cache_families[entity_type][0]
+    # Version 1 is the original pickled format, which used unversioned keys
+    if version == 1:
+        return "{}:id:{}".format(entity_type, id)
+    return "{}:id:v{}:{}".format(entity_type, version, id)
+
+def get_entity_cache_keys_all_versions(entity_type, id):
+    current_version = entity_cache_families[entity_type][0]
+    return [get_entity_cache_key(entity_type, id, version) for version in range(1, current_version + 1)]
+
 def get_user_id_cache_key(id):
-    return "user:id:{}".format(id)
+    return get_entity_cache_key("user", id)
 
 
 def get_track_id_cache_key(id):
-    return "track:id:{}".format(id)
+    return get_entity_cache_key("track", id)
 
 
 def get_playlist_id_cache_key(id):
-    return "playlist:id:{}".format(id)
+    return get_entity_cache_key("playlist", id)
 
 def get_sp_id_key(id):
     return "sp:id:{}".format(id)
 
+def get_cached_entities(keys, entity_type):
+    """Returns the cached value or None for each key, checking the process-local cache before redis"""
+    redis = redis_connection.get_redis()
+    local_cache = get_local_entity_cache(redis)
+    values = local_cache.get_many(keys) if local_cache else [None] * len(keys)
+    missed_keys = [key for key, value in zip(keys, values) if value is None]
+    if not missed_keys:
+        return values
+
+    codec = entity_cache_families[entity_type][1]
+    cached_values = dict(zip(missed_keys, redis.mget(missed_keys)))
+    fetched_entities = []
+    for index, key in enumerate(keys):
+        val = cached_values.get(key) if values[index] is None else None
+        if val is None:
+            continue
+        try:
+            values[index] = codec.loads(val)
+            fetched_entities.append((key, values[index]))
+        except Exception as e:
+            logger.warning(f"Unable to deserialize cached {entity_type}: {e}")
+    if local_cache:
+        local_cache.set_many(fetched_entities)
+    return values
+
+def set_cached_entities(entities, ttl_sec, entity_type):
+    """Caches (key, value) entities in redis with a single pipelined round trip and in the process-local cache"""
+    if not entities:
+        return
+    redis = redis_connection.get_redis()
+    codec = entity_cache_families[entity_type][1]
+    with redis.pipeline(transaction=False) as pipe:
+        for key, value in entities:
+            pipe.set(key, codec.dumps(value), ttl_sec)
+        pipe.execute()
+    local_cache = get_local_entity_cache(redis)
+    if local_cache:
+        local_cache.set_many(entities)
+
+def remove_cached_entity_ids(redis, entity_type, ids):
+    # Every format version is removed, since processes on another version may still be reading it
+    keys = [key for id in ids for key in get_entity_cache_keys_all_versions(entity_type, id)]
+    redis.delete(*keys)
+    # Drop the keys from every process-local cache as well
+    publish_invalidation(redis, keys)
+
 def remove_cached_user_ids(redis, user_ids):
     try:
-        user_keys = list(map(get_user_id_cache_key, user_ids))
-        redis.delete(*user_keys)
+        remove_cached_entity_ids(redis, "user", user_ids)
     except Exception as e:
         logger.error(
             "Unable to remove cached users: %s", e, exc_info=True)
@@ -139,20 +329,87 @@ def remove_cached_user_ids(redis, user_ids):
 
 def remove_cached_track_ids(redis, track_ids):
     try:
-        track_keys = list(map(get_track_id_cache_key, track_ids))
-        redis.delete(*track_keys)
+        remove_cached_entity_ids(redis, "track", track_ids)
     except Exception as e:
         logger.error(
             "Unable to remove cached tracks: %s", e, exc_info=True)
 
 def remove_cached_playlist_ids(redis, playlist_ids):
     try:
-        playlist_keys = list(map(get_playlist_id_cache_key, playlist_ids))
-        redis.delete(*playlist_keys)
+        remove_cached_entity_ids(redis, "playlist", playlist_ids)
     except Exception as e:
         logger.error(
             "Unable to remove cached playlists: %s", e, exc_info=True)
 
+# Followee sets are maintained by the indexer as follows change, and expire to bound memory
+followee_ids_ttl_sec = 24 * 60 * 60
+# Member of every complete followee set. Indexer updates to an expired set create a set without it,
+# which readers treat as a miss.
+followee_ids_complete_marker = b"-"
+# Followee sets are fetched from the read replica, so they are not cached for this long after the
+# indexer changes a user's follows, giving the replica time to catch up with the change
+followee_ids_replica_lag_sec = 60
+
+def get_followee_ids_cache_key(user_id):
+    return "followee_ids:{}".format(user_id)
+
+def get_followee_ids_changed_key(user_id):
+    return "followee_ids_changed:{}".format(user_id)
+
+def get_or_set_cached_followee_ids(redis, user_id, fetch_followee_ids):
+    """Returns the sorted ids of the users user_id follows, caching the result of
+    `fetch_followee_ids` on a miss"""
+    key = get_followee_ids_cache_key(user_id)
+    members = redis.smembers(key)
+    if followee_ids_complete_marker in members:
+        return sorted(int(member) for member in members if member != followee_ids_complete_marker)
+
+    changed_key = get_followee_ids_changed_key(user_id)
+    with redis.pipeline() as pipe:
+        # The set is only written if the indexer did not change it while it was fetched
+        pipe.watch(key, changed_key)
+        if pipe.exists(changed_key):
+            # The fetch may not include the indexer's latest changes yet
+            return sorted(fetch_followee_ids())
+        followee_ids = sorted(fetch_followee_ids())
+        pipe.multi()
+        pipe.delete(key)
+        pipe.sadd(key, followee_ids_complete_marker, *followee_ids)
+        pipe.expire(key, followee_ids_ttl_sec)
+        try:
+            pipe.execute()
+        except WatchError:
+            logger.info(f"Redis Cache - followee set {key} changed while fetching")
+    return followee_ids
+
+def update_cached_followee_ids(redis, follow_changes):
+    """Applies {(follower_user_id, followee_user_id): is_delete} to the cached followee sets"""
+    try:
+        with redis.pipeline(transaction=False) as pipe:
+            for (follower_user_id, followee_user_id), is_delete in follow_changes.items():
+                key = get_followee_ids_cache_key(follower_user_id)
+                if is_delete:
+                    pipe.srem(key, followee_user_id)
+                else:
+                    pipe.sadd(key, followee_user_id)
+                pipe.expire(key, followee_ids_ttl_sec)
+                pipe.set(get_followee_ids_changed_key(follower_user_id), 1, followee_ids_replica_lag_sec)
+            pipe.execute()
+    except Exception as e:
+        logger.error(
+            "Unable to update cached followee ids: %s", e, exc_info=True)
+
+def remove_cached_followee_ids(redis, user_ids):
+    try:
+        with redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.delete(get_followee_ids_cache_key(user_id))
+                pipe.set(get_followee_ids_changed_key(user_id), 1, followee_ids_replica_lag_sec)
+            pipe.execute()
+    except Exception as e:
+        logger.error(
+            "Unable to remove cached followee ids: %s", e, exc_info=True)
+
 def get_trending_cache_key(request_items, request_path):
     request_items.pop('limit', None)
     request_items.pop('offset', None)
@@ -1,8 +1,13 @@
 import pickle
+import threading
 from time import sleep
 from unittest.mock import patch
 import flask
-from src.utils.redis_cache import cache
+from src.utils.redis_cache import (
+    cache, get_fresh_key, get_refresh_lock_key, stale_ttl_sec, use_redis_cache,
+    get_or_set_cached_followee_ids, update_cached_followee_ids, remove_cached_followee_ids,
+    get_followee_ids_changed_key
+)
 
 def test_cache(redis_mock):
     """Test that the redis cache decorator works"""
@@ -35,11 +40,11 @@ def test_cache(redis_mock):
             assert res[0] == {'name': 'joe'}
             assert res[1] == 200
 
-            # Sleep to wait for the cache to expire
+            # Sleep to wait for the cache to go stale
             sleep(1)
 
-            cached_resp = redis_mock.get(mock_key_1)
-            assert cached_resp is None
+            assert redis_mock.get(get_fresh_key(mock_key_1)) is None
+            assert 1 < redis_mock.ttl(mock_key_1) <= stale_ttl_sec
 
             # Test the single response
             def transform(input):
@@ -60,10 +65,145 @@ def test_cache(redis_mock):
             res = mock_func_transform()
             assert res == {'music': 'audius'}
 
-            # Sleep to wait for the cache to expire
+            # Sleep to wait for the cache to go stale
             sleep(1)
 
-            cached_resp = redis_mock.get(mock_key_1)
-            assert cached_resp is None
+            assert redis_mock.get(get_fresh_key(mock_key_1)) is None
+            assert 1 < redis_mock.ttl(mock_key_1) <= stale_ttl_sec
 
     get_mock_cache() # pylint: disable=no-value-for-parameter
+
+
+def test_use_redis_cache_stale_while_revalidate(redis_mock):
+    """Test that stale values are recomputed by the lock holder and served to everyone else"""
+    key = 'mock_swr_key'
+    calls = []
+
+    def work_func():
+        calls.append(1)
+        return len(calls)
+
+    assert use_redis_cache(key, 1, work_func) == 1
+    assert use_redis_cache(key, 1, work_func) == 1
+    assert len(calls) == 1
+
+    sleep(1.1)
+
+    # Another worker holds the refresh lock, so the stale value is served
+    redis_mock.set(get_refresh_lock_key(key), 'other worker', 5)
+    assert use_redis_cache(key, 1, work_func) == 1
+    assert len(calls) == 1
+    redis_mock.delete(get_refresh_lock_key(key))
+
+    # Without a lock holder the stale value is recomputed
+    assert use_redis_cache(key, 1, work_func) == 2
+    assert len(calls) == 2
+    assert pickle.loads(redis_mock.get(key)) == 2
+
+
+def test_use_redis_cache_waits_for_lock_holder(redis_mock):
+    """Test that a miss waits for the value being computed by the lock holder"""
+    key = 'mock_single_flight_key'
+    redis_mock.set(get_refresh_lock_key(key), 'other worker', 5)
+
+    def set_value():
+        sleep(0.2)
+        redis_mock.set(key, pickle.dumps('computed'))
+        redis_mock.set(get_fresh_key(key), 1, 5)
+
+    thread = threading.Thread(target=set_value)
+    thread.start()
+    assert use_redis_cache(key, 5, lambda: 'not coalesced') == 'computed'
+    thread.join()
+    redis_mock.delete(get_refresh_lock_key(key))
+
+
+class MockPersonalization:
+    def get_user_id(self, encoded_user_id):
+        return int(encoded_user_id)
+
+    def strip(self, payload):
+        return dict(payload, followed=False)
+
+    def overlay(self, payload, user_id):
+        return dict(payload, followed=user_id == 1)
+
+
+def test_cache_personalized(redis_mock):
+    """Test that requests with a user_id share the logged out cache entry and overlay their own fields"""
+    app = flask.Flask(__name__)
+    calls = []
+
+    @cache(ttl_sec=5, personalize=MockPersonalization())
+    def mock_func():
+        calls.append(1)
+        user_id = flask.request.args.get('user_id')
+        return {'name': 'joe', 'followed': user_id == '1'}, 200
+
+    with app.test_request_context('/mock', query_string={'user_id': '1'}):
+        assert mock_func() == ({'name': 'joe', 'followed': True}, 200)
+
+    with app.test_request_context('/mock'):
+        assert mock_func() == ({'name': 'joe', 'followed': False}, 200)
+
+    with app.test_request_context('/mock', query_string={'user_id': '2'}):
+        assert mock_func() == ({'name': 'joe', 'followed': False}, 200)
+
+    with app.test_request_context('/mock', query_string={'user_id': '1'}):
+        assert mock_func() == ({'name': 'joe', 'followed': True}, 200)
+
+    assert len(calls) == 1
+
+
+def test_cached_followee_ids(redis_mock):
+    """Test that followee sets are fetched once, updated incrementally and rebuilt after removal"""
+    fetches = []
+
+    def fetch_followee_ids():
+        fetches.append(1)
+        return [5, 3]
+
+    assert get_or_set_cached_followee_ids(redis_mock, 1, fetch_followee_ids) == [3, 5]
+    assert get_or_set_cached_followee_ids(redis_mock, 1, fetch_followee_ids) == [3, 5]
+    assert len(fetches) == 1
+
+    update_cached_followee_ids(redis_mock, {(1, 4): False, (1, 5): True, (2, 3): False})
+    assert get_or_set_cached_followee_ids(redis_mock, 1, fetch_followee_ids) == [3, 4]
+    assert len(fetches) == 1
+
+    # User 2's set was created by an update and is incomplete, so it is fetched, but only cached
+    # once the read replica has had time to catch up with the update
+    assert get_or_set_cached_followee_ids(redis_mock, 2, lambda: [7]) == [7]
+    assert get_or_set_cached_followee_ids(redis_mock, 2, lambda: [3, 7]) == [3, 7]
+    redis_mock.delete(get_followee_ids_changed_key(2))
+    assert get_or_set_cached_followee_ids(redis_mock, 2, lambda: [3, 7]) == [3, 7]
+    assert get_or_set_cached_followee_ids(redis_mock, 2, fetch_followee_ids) == [3, 7]
+
+    remove_cached_followee_ids(redis_mock, [1])
+    redis_mock.delete(get_followee_ids_changed_key(1))
+    assert get_or_set_cached_followee_ids(redis_mock, 1, fetch_followee_ids) == [3, 5]
+    assert len(fetches) == 2
+
+    # An empty followee set is cached as well
+    assert get_or_set_cached_followee_ids(redis_mock, 3, lambda: []) == []
+    assert get_or_set_cached_followee_ids(redis_mock, 3, fetch_followee_ids) == []
+
+
+def test_cached_followee_ids_changed_while_fetching(redis_mock):
+    """Test that a followee set changed by the indexer during a fetch is not overwritten"""
+    def fetch_followee_ids():
+        update_cached_followee_ids(redis_mock, {(1, 9): False})
+        return [5]
+
+    assert get_or_set_cached_followee_ids(redis_mock, 1, fetch_followee_ids) == [5]
+    redis_mock.delete(get_followee_ids_changed_key(1))
+    assert get_or_set_cached_followee_ids(redis_mock, 1, lambda: [5, 9]) == [5, 9]
+    assert get_or_set_cached_followee_ids(redis_mock, 1, lambda: []) == [5, 9]
+
+
+def test_cached_followee_ids_replica_lag(redis_mock):
+    """Test that a followee set is not filled from a read replica that may not have the indexer's changes"""
+    # The indexer adds a follow before a reader misses the set while the replica lags
+    update_cached_followee_ids(redis_mock, {(1, 9): False})
+    assert get_or_set_cached_followee_ids(redis_mock, 1, lambda: [5]) == [5]
+    assert get_or_set_cached_followee_ids(redis_mock, 1, lambda: [5, 9]) == [5, 9]
@@ -2,7 +2,16 @@ latest_block_redis_key = 'latest_block_from_chain'
 latest_block_hash_redis_key = 'latest_blockhash_from_chain'
 most_recent_indexed_block_redis_key = 'most_recently_indexed_block_from_db'
 most_recent_indexed_block_hash_redis_key = 'most_recently_indexed_block_hash_from_db'
+indexed_block_hashes_redis_key = 'indexed_block_hashes'
+next_update_task_id_redis_key = 'update_discovery_provider_next_task_id'
 most_recent_indexed_ipld_block_redis_key = 'most_recent_indexed_ipld_block_redis_key'
 most_recent_indexed_ipld_block_hash_redis_key = 'most_recent_indexed_ipld_block_hash_redis_key'
 trending_tracks_last_completion_redis_key = 'trending:tracks:last-completion'
 trending_playlists_last_completion_redis_key = 'trending-playlists:last-completion'
+ipld_blacklist_revert_count_redis_key = 'ipld_blacklist_revert_count'
+aggregate_reconcile_cursor_redis_key_prefix = 'aggregate_reconcile_cursor'
+aggregate_reconcile_skipped_ids_redis_key_prefix = 'aggregate_reconcile_skipped_ids'
+search_dirty_user_ids_redis_key = 'search_dirty_user_ids'
+search_dirty_track_ids_redis_key = 'search_dirty_track_ids'
+search_dirty_playlist_ids_redis_key = 'search_dirty_playlist_ids'
+search_dirty_follower_count_user_ids_redis_key = 'search_dirty_follower_count_user_ids'
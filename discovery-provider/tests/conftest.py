@@ -9,7 +9,9 @@ from pytest_postgresql import factories
 import alembic
 import alembic.config
 from src.app import create_app, create_celery
-from src.utils import helpers
+from src.utils import helpers, redis_connection
+from src.utils.redis_cache import get_followee_ids_cache_key
+from src.utils.redis_constants import indexed_block_hashes_redis_key
 from src.models import Base
 import src
 
@@ -39,6 +41,14 @@ def app():
     if database_exists(DB_URL):
         drop_database(DB_URL)
 
+    # Followee sets cached in redis describe the dropped db
+    redis = redis_connection.get_redis()
+    followee_ids_keys = redis.keys(get_followee_ids_cache_key("*"))
+    if followee_ids_keys:
+        redis.delete(*followee_ids_keys)
+    # As are the indexed block hashes
+    redis.delete(indexed_block_hashes_redis_key)
+
     # Create application for testing
     discovery_provider_app = create_app(TEST_CONFIG_OVERRIDE)
 
@@ -0,0 +1,114 @@
+from src.models import AggregateUser, AggregateTrack, Follow
+from src.utils.db_session import get_db
+from src.tasks.aggregate_counts import AGGREGATE_USER, AGGREGATE_TRACK, get_count_change, get_count_deltas, \
+    invalidate_current_row, reconcile_aggregate_ids, reconcile_aggregate_rows, update_aggregate_counts
+from tests.utils import populate_mock_db
+
+def get_aggregate_users(session):
+    return (
+        session.query(
+            AggregateUser.user_id,
+            AggregateUser.track_count,
+            AggregateUser.playlist_count,
+            AggregateUser.album_count,
+            AggregateUser.follower_count,
+            AggregateUser.following_count,
+            AggregateUser.repost_count,
+            AggregateUser.track_save_count
+        )
+        .order_by(AggregateUser.user_id)
+        .all()
+    )
+
+def test_aggregate_counts(postgres_mock_db):
+    """Test that the aggregate rows are reconciled with the entity tables, and updated by count deltas"""
+    populate_mock_db(postgres_mock_db, {
+        'users': [{'user_id': 1, 'handle': 'user1'}, {'user_id': 2, 'handle': 'user2'}],
+        'tracks': [
+            {"track_id": 1, "owner_id": 1},
+            {"track_id": 2, "owner_id": 1, "is_delete": True}
+        ],
+        'playlists': [{"playlist_id": 1, "playlist_owner_id": 2, "is_album": True}],
+        'follows': [{"follower_user_id": 1, "followee_user_id": 2}],
+        'reposts': [{"repost_item_id": 1, "repost_type": 'track', "user_id": 2}],
+        'saves': [
+            {"save_item_id": 1, "save_type": 'track', "user_id": 2},
+            {"save_item_id": 1, "save_type": 'album', "user_id": 1}
+        ]
+    })
+
+    with postgres_mock_db.scoped_session() as session:
+        assert reconcile_aggregate_rows(session, AGGREGATE_USER) == ([1, 2], [])
+        assert reconcile_aggregate_rows(session, AGGREGATE_TRACK) == ([1], [])
+        # nothing is left to fix
+        assert reconcile_aggregate_rows(session, AGGREGATE_USER) == ([], [])
+
+        assert get_aggregate_users(session) == [
+            (1, 1, 0, 0, 0, 1, 0, 0),
+            (2, 0, 0, 1, 1, 0, 1, 1)
+        ]
+        # deleted tracks have no row
+        assert session.query(
+            AggregateTrack.track_id, AggregateTrack.repost_count, AggregateTrack.save_count
+        ).all() == [(1, 1, 1)]
+
+        # user 1 unfollows user 2, and a count change for a user without a row is ignored
+        deltas = get_count_deltas()
+        deltas[1]["following_count"] += get_count_change(True, True)
+        deltas[2]["follower_count"] += get_count_change(True, True)
+        deltas[3]["follower_count"] += get_count_change(False, False)
+        update_aggregate_counts(session, AggregateUser, deltas)
+        assert get_aggregate_users(session) == [
+            (1, 1, 0, 0, 0, 0, 0, 0),
+            (2, 0, 0, 1, 0, 0, 1, 1)
+        ]
+
+        # the follow wasn't deleted, so reconciling restores the counts
+        assert reconcile_aggregate_ids(session, AGGREGATE_USER, [1, 2]) == 2
+        assert get_aggregate_users(session)[0] == (1, 1, 0, 0, 0, 1, 0, 0)
+
+        # missing rows are added
+        session.query(AggregateUser).filter(AggregateUser.user_id == 2).delete()
+        assert reconcile_aggregate_ids(session, AGGREGATE_USER, [1, 2], missing_only=True) == 1
+        assert get_aggregate_users(session)[1] == (2, 0, 0, 1, 1, 0, 1, 1)
+
+def test_invalidate_current_row(postgres_mock_db):
+    """Test that invalidating the current row returns whether it was active"""
+    populate_mock_db(postgres_mock_db, {
+        'follows': [
+            {"follower_user_id": 1, "followee_user_id": 2},
+            {"follower_user_id": 1, "followee_user_id": 3, "is_delete": True}
+        ]
+    })
+
+    with postgres_mock_db.scoped_session() as session:
+        assert invalidate_current_row(session, Follow, Follow.follower_user_id == 1, Follow.followee_user_id == 2)
+        assert not invalidate_current_row(session, Follow, Follow.follower_user_id == 1, Follow.followee_user_id == 3)
+        # the follow is no longer current
+        assert not invalidate_current_row(session, Follow, Follow.follower_user_id == 1, Follow.followee_user_id == 2)
+        assert session.query(Follow).filter(Follow.is_current == True).count() == 0
+
+def test_reconcile_skips_locked_rows(app):
+    """Test that reconciling with skip_locked leaves out the rows locked by another transaction"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, {
+        'users': [{'user_id': 1, 'handle': 'user1'}, {'user_id': 2, 'handle': 'user2'}],
+        'follows': [{"follower_user_id": 1, "followee_user_id": 2}]
+    })
+    with db.scoped_session() as session:
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
+        session.execute("UPDATE aggregate_user SET follower_count = 5")
+
+    with db.scoped_session() as indexer_session:
+        indexer_session.execute("SELECT user_id FROM aggregate_user WHERE user_id = 1 FOR UPDATE")
+        with db.scoped_session() as session:
+            assert reconcile_aggregate_rows(session, AGGREGATE_USER, skip_locked=True) == ([2], [1])
+
+    with db.scoped_session() as session:
+        assert [row[4] for row in get_aggregate_users(session)] == [5, 1]
+        # the skipped row is fixed once it is no longer locked
+        assert reconcile_aggregate_rows(
+            session, AGGREGATE_USER, "{id} = ANY(:ids)", {"ids": [1]}, skip_locked=True
+        ) == ([1], [])
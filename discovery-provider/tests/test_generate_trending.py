@@ -1,7 +1,11 @@
 from datetime import datetime, timedelta
 
-from src.tasks.generate_trending import get_listen_counts
-from src.models import AggregatePlays, Track, Block, Play
+from src.tasks.generate_trending import get_listen_counts, generate_trending, generate_trending_features, \
+    get_trending_from_features
+from src.trending_strategies.trending_strategy_factory import TrendingStrategyFactory
+from src.trending_strategies.trending_type_and_version import TrendingType
+from src.models import Track, Block, Play
+from src.tasks.play_counts import update_play_counts
 
 # Setup trending from simplified metadata
 def setup_trending(db, date):
@@ -76,25 +80,16 @@ def setup_trending(db, date):
             session.add(track)
 
         # seed plays
-        aggregate_plays = {}
+        plays = []
         for i, play_meta in enumerate(test_plays):
-            item_id = play_meta.get("item_id")
-            if item_id in aggregate_plays:
-                aggregate_plays[item_id] += 1
-            else:
-                aggregate_plays[item_id] = 1
-
             play = Play(
                 id=i,
-                play_item_id=item_id,
+                play_item_id=play_meta.get("item_id"),
                 created_at=play_meta.get("created_at", date)
             )
             session.add(play)
-        for i, count in aggregate_plays.items():
-            session.add(AggregatePlays(
-                play_item_id=i,
-                count=count
-            ))
+            plays.append(play)
+        update_play_counts(session, plays)
 
 
 # Helper to sort results before validating
@@ -171,3 +166,26 @@ def test_get_listen_counts_all_time(postgres_mock_db):
         {"track_id": 2, "listens": 3, "created_at": date}
     ]
     validate_results(res, expected)
+
+def test_get_trending_from_features(postgres_mock_db):
+    """Test that trending derived from the features snapshot matches generate_trending"""
+    # setup
+    date = datetime.now()
+    setup_trending(postgres_mock_db, date)
+    strategy_factory = TrendingStrategyFactory()
+    strategies = strategy_factory.get_versions_for_type(TrendingType.TRACKS).values()
+    time_ranges = ["week", "year"]
+
+    # run
+    with postgres_mock_db.scoped_session() as session:
+        features = generate_trending_features(
+            session, time_ranges, 10, {strategy.get_score_params()['xf'] for strategy in strategies}
+        )
+        for strategy in strategies:
+            for time_range in time_ranges:
+                for genre in [None, "Pop", "Electronic"]:
+                    expected = generate_trending(session, time_range, genre, 10, 0, strategy)
+                    actual = get_trending_from_features(features[time_range], genre, 10, strategy)
+
+                    # validate
+                    validate_results(actual['listen_counts'], expected['listen_counts'])
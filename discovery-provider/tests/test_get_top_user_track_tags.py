@@ -1,6 +1,7 @@
 from src.queries.get_top_user_track_tags import _get_top_user_track_tags
 from src.utils.db_session import get_db
 from tests.utils import populate_mock_db
+from src.tasks.search_dicts import rebuild_search_dicts
 
 def test_get_top_user_track_tags(app):
     """Tests that top tags for users can be queried"""
@@ -20,7 +21,7 @@ def test_get_top_user_track_tags(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW tag_track_user")
+        rebuild_search_dicts(session)
         user_1_tags = _get_top_user_track_tags(session, {'user_id': 1})
         user_2_tags = _get_top_user_track_tags(session, {'user_id': 2})
 
@@ -1,6 +1,8 @@
 from datetime import datetime
 
+from src.models import Save, Track
 from src.queries.get_tracks import _get_tracks
+from src.utils import helpers
 from src.utils.db_session import get_db
 from tests.utils import populate_mock_db
 
@@ -60,3 +62,36 @@ def test_get_tracks_by_date(app):
         assert tracks[2]["track_id"] == 5
         assert tracks[3]["track_id"] == 4
         assert tracks[4]["track_id"] == 2
+
+
+def test_model_query_to_list(app):
+    """Test that model rows selected as columns convert to the same dicts as ORM rows"""
+    with app.app_context():
+        db = get_db()
+
+    test_entities = {
+        'tracks': [
+            {"track_id": 1, "owner_id": 1, "created_at": datetime(2018, 5, 17)},
+            {"track_id": 2, "owner_id": 1, "created_at": datetime(2018, 5, 18)},
+        ],
+        'saves': [
+            {"user_id": 2, "save_item_id": 1},
+            {"user_id": 3, "save_item_id": 1},
+        ]
+    }
+
+    populate_mock_db(db, test_entities)
+
+    with db.scoped_session() as session:
+        tracks_query = session.query(Track).order_by(Track.track_id)
+        tracks = helpers.query_result_to_list(tracks_query.all())
+        assert len(tracks) == 2
+        assert helpers.model_query_to_list(tracks_query, Track) == tracks
+
+        # Joined rows repeating a track are returned once, as with ORM rows
+        saved_tracks_query = session.query(Track).join(Save, Save.save_item_id == Track.track_id)
+        assert helpers.model_query_to_list(saved_tracks_query, Track) == tracks[:1]
+
+        track = helpers.model_to_dictionary(tracks_query.first(), exclude_keys=["metadata_multihash"])
+        assert "metadata_multihash" not in track
+        assert track == {key: value for key, value in tracks[0].items() if key != "metadata_multihash"}
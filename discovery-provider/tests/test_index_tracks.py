@@ -1,10 +1,12 @@
 import random
 from datetime import datetime
 from src.models import Block, User
-from src.tasks.tracks import parse_track_event, lookup_track_record, track_event_types_lookup
+from src.tasks.aggregate_counts import AGGREGATE_USER, reconcile_aggregate_rows
+from src.tasks.tracks import parse_track_event, lookup_track_record, track_event_types_lookup, track_state_update
 from src.utils import helpers
 from src.utils.db_session import get_db
 from tests.index_helpers import AttrDict, IPFSClient, Web3, UpdateTask
+from tests.utils import populate_mock_db
 
 def get_new_track_event():
     event_type = track_event_types_lookup['new_track']
@@ -217,3 +219,45 @@ def test_index_tracks(app):
 
         # updated_at should be updated every parse_track_event
         assert track_record.is_delete == True
+
+class EventDecoder:
+    def __init__(self, decoded_events):
+        self.decoded_events = decoded_events
+
+    def decode_receipt(self, contract_name, tx_receipt):
+        return self.decoded_events
+
+
+def test_track_state_update_owner_change(app):
+    """Tests that moving a track to another owner recounts the tracks of both the old and new owner"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, {
+        'users': [
+            {'user_id': 1, 'handle': 'user1'},
+            {'user_id': 2, 'handle': 'user2'}
+        ],
+        'tracks': [
+            {"track_id": 1, "owner_id": 1}
+        ]
+    })
+
+    event_type, entry = get_update_track_event()
+    entry.args._trackOwnerId = 2
+    update_multihash = helpers.multihash_digest_to_cid(entry.args._multihashDigest)
+    update_task = UpdateTask(IPFSClient({update_multihash: ipfs_client.metadata_dict[multihash]}), web3)
+    update_task.event_decoder = EventDecoder({event_type: [entry]})
+
+    with db.scoped_session() as session:
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
+        # web3.toHex returns '0x' as the hash of the block the update is indexed in
+        session.add(Block(blockhash='0x', number=100, is_current=False))
+        session.flush()
+
+        track_state_update(None, update_task, session, [AttrDict({"transactionHash": "0x"})], 100, 1585336422)
+
+        track_counts = session.execute(
+            "SELECT user_id, track_count FROM aggregate_user ORDER BY user_id"
+        ).fetchall()
+        assert track_counts == [(1, 0), (2, 1)]
@@ -160,7 +160,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -187,7 +186,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -209,7 +207,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -231,7 +228,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -253,7 +249,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -280,7 +275,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -305,7 +299,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -328,7 +321,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -352,7 +344,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -372,7 +363,6 @@ def test_index_users(app):
 
         parse_user_event(
             None, # self - not used
-            None, # user_contract - not used
             update_task, # only need the ipfs client for get_metadata
             session,
             None, # tx_receipt - not used
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+from src.models import AggregatePlays, HourlyPlayCounts, Play
+from src.tasks.play_counts import update_play_counts
+
+def test_update_play_counts(postgres_mock_db):
+    """Test that plays are added to the existing hourly and total play counts"""
+    hour = datetime(2021, 5, 20, 18)
+
+    with postgres_mock_db.scoped_session() as session:
+        update_play_counts(session, [
+            Play(play_item_id=1, created_at=hour + timedelta(minutes=5)),
+            Play(play_item_id=1, created_at=hour + timedelta(minutes=59)),
+            Play(play_item_id=2, created_at=hour),
+        ])
+
+    with postgres_mock_db.scoped_session() as session:
+        update_play_counts(session, [
+            Play(play_item_id=1, created_at="2021-05-20T18:30:00.000Z"),
+            Play(play_item_id=1, created_at=hour + timedelta(hours=1)),
+        ])
+
+    with postgres_mock_db.scoped_session() as session:
+        hourly_play_counts = (
+            session.query(HourlyPlayCounts.play_item_id, HourlyPlayCounts.hour_timestamp, HourlyPlayCounts.play_count)
+            .order_by(HourlyPlayCounts.play_item_id, HourlyPlayCounts.hour_timestamp)
+            .all()
+        )
+        assert hourly_play_counts == [
+            (1, hour, 3),
+            (1, hour + timedelta(hours=1), 1),
+            (2, hour, 1)
+        ]
+
+        play_counts = (
+            session.query(AggregatePlays.play_item_id, AggregatePlays.count)
+            .order_by(AggregatePlays.play_item_id)
+            .all()
+        )
+        assert play_counts == [(1, 4), (2, 1)]
@@ -3,11 +3,12 @@ from src.queries import response_name_constants
 from src.models import RepostType, SaveType
 from src.queries.query_helpers import populate_playlist_metadata
 from src.utils.db_session import get_db
+from src.tasks.aggregate_counts import AGGREGATE_PLAYLIST, reconcile_aggregate_rows
 from tests.utils import populate_mock_db
 logger = logging.getLogger(__name__)
 
 def test_populate_playlist_metadata(app):
-    """Tests that populate_playlist_metadata works after aggregate_user refresh"""
+    """Tests that populate_playlist_metadata works after aggregate_user reconcile"""
     with app.app_context():
         db = get_db()
 
@@ -44,7 +45,7 @@ def test_populate_playlist_metadata(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_playlist")
+        reconcile_aggregate_rows(session, AGGREGATE_PLAYLIST)
         playlist_ids = [1, 2, 3, 4]
         playlists = [
             {"playlist_id": 1, "playlist_contents": {"track_ids": []}},
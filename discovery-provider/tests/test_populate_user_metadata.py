@@ -2,11 +2,12 @@ import logging
 from src.queries import response_name_constants
 from src.queries.query_helpers import populate_user_metadata
 from src.utils.db_session import get_db
+from src.tasks.aggregate_counts import AGGREGATE_USER, reconcile_aggregate_rows
 from tests.utils import populate_mock_db
 logger = logging.getLogger(__name__)
 
 def test_populate_user_metadata(app):
-    """Tests that populate_user_metadata works after aggregate_user refresh"""
+    """Tests that populate_user_metadata works after aggregate_user reconcile"""
     with app.app_context():
         db = get_db()
 
@@ -66,7 +67,7 @@ def test_populate_user_metadata(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_user")
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
         user_ids = [1, 2, 3, 4, 5]
         users = [
             {"user_id": 1, "is_verified": False},
@@ -2,6 +2,8 @@ from datetime import datetime
 from src.models import Track, Block, User
 from src.queries.search_queries import track_search_query
 from src.utils.db_session import get_db
+from src.tasks.aggregate_counts import AGGREGATE_TRACK, reconcile_aggregate_rows
+from src.tasks.search_dicts import rebuild_search_dicts
 
 def setup_search(db):
     # Import app so that it'll run migrations against the db
@@ -121,9 +123,9 @@ def setup_search(db):
             session.add(user)
             session.flush()
 
-        # Refresh the lexeme matview
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_track;")
-        session.execute("REFRESH MATERIALIZED VIEW track_lexeme_dict;")
+        # Rebuild the search dictionaries
+        reconcile_aggregate_rows(session, AGGREGATE_TRACK)
+        rebuild_search_dicts(session)
 
 def test_gets_all_results(app):
     """Tests we get all results, including downloaded"""
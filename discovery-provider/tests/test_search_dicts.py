@@ -0,0 +1,86 @@
+from src.models import Track, User
+from src.utils.db_session import get_db
+from src.tasks.aggregate_counts import AGGREGATE_USER, AGGREGATE_TRACK, reconcile_aggregate_rows
+from src.tasks.search_dicts import rebuild_search_dicts, refresh_search_dicts
+from tests.utils import populate_mock_db
+
+def get_track_words(session):
+    return session.execute(
+        "SELECT DISTINCT track_id, handle FROM track_lexeme_dict ORDER BY track_id"
+    ).fetchall()
+
+def get_track_tags(session):
+    return session.execute(
+        "SELECT tag, track_id FROM tag_track_user ORDER BY track_id, tag"
+    ).fetchall()
+
+def test_refresh_search_dicts(app):
+    """Tests that refreshing the search dictionaries only rebuilds the rows of the given ids"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, {
+        'users': [
+            {'user_id': 1, 'handle': 'user1'},
+            {'user_id': 2, 'handle': 'user2'}
+        ],
+        'tracks': [
+            {"track_id": 1, "owner_id": 1, "tags": "pop"},
+            {"track_id": 2, "owner_id": 2, "tags": "funk"}
+        ]
+    })
+
+    with db.scoped_session() as session:
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
+        reconcile_aggregate_rows(session, AGGREGATE_TRACK)
+        rebuild_search_dicts(session)
+        assert get_track_words(session) == [(1, "user1"), (2, "user2")]
+        assert get_track_tags(session) == [("pop", 1), ("funk", 2)]
+
+        session.query(User).filter(User.user_id.in_([1, 2])).update(
+            {User.handle: User.handle + "_new"}, synchronize_session=False
+        )
+        session.query(Track).filter(Track.track_id.in_([1, 2])).update(
+            {Track.tags: "rock"}, synchronize_session=False
+        )
+
+        # the tracks of user 1 pick up the new handle, and only track 2 gets its new tags
+        refresh_search_dicts(session, [1], [2], [])
+        assert get_track_words(session) == [(1, "user1_new"), (2, "user2")]
+        assert get_track_tags(session) == [("pop", 1), ("rock", 2)]
+        assert session.execute(
+            "SELECT DISTINCT handle FROM user_lexeme_dict WHERE user_id = 1"
+        ).fetchall() == [("user1_new",)]
+
+def test_refresh_search_dicts_follower_count(app):
+    """Tests that refreshing the follower count of a user leaves the rows of the user's tracks untouched"""
+    with app.app_context():
+        db = get_db()
+
+    populate_mock_db(db, {
+        'users': [
+            {'user_id': 1, 'handle': 'user1'},
+            {'user_id': 2, 'handle': 'user2'}
+        ],
+        'tracks': [
+            {"track_id": 1, "owner_id": 1, "tags": "pop"}
+        ],
+        'follows': [{"follower_user_id": 2, "followee_user_id": 1}]
+    })
+
+    with db.scoped_session() as session:
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
+        reconcile_aggregate_rows(session, AGGREGATE_TRACK)
+        rebuild_search_dicts(session)
+
+        # a new follower for user 1, while the new handle is left for the refresh of user 1's content
+        session.execute("UPDATE aggregate_user SET follower_count = follower_count + 1 WHERE user_id = 1")
+        session.query(User).filter(User.user_id == 1).update(
+            {User.handle: User.handle + "_new"}, synchronize_session=False
+        )
+
+        refresh_search_dicts(session, [], [], [], [1])
+        assert session.execute(
+            "SELECT DISTINCT handle, follower_count FROM user_lexeme_dict WHERE user_id = 1"
+        ).fetchall() == [("user1_new", 2)]
+        assert get_track_words(session) == [(1, "user1")]
@@ -1,6 +1,7 @@
 from src.queries.search_track_tags import search_track_tags
 from src.utils.db_session import get_db
 from tests.utils import populate_mock_db
+from src.tasks.search_dicts import rebuild_search_dicts
 
 def test_search_track_tags(app):
     """Tests that search by tags works fopr tracks"""
@@ -31,8 +32,7 @@ def test_search_track_tags(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW tag_track_user")
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_plays")
+        rebuild_search_dicts(session)
         args = {
             'search_str': 'pop',
             'current_user_id': None,
@@ -1,6 +1,8 @@
 from src.queries.search_user_tags import search_user_tags
 from src.utils.db_session import get_db
 from tests.utils import populate_mock_db
+from src.tasks.aggregate_counts import AGGREGATE_USER, reconcile_aggregate_rows
+from src.tasks.search_dicts import rebuild_search_dicts
 
 def test_search_user_tags(app):
     """Tests that search by tags works for users"""
@@ -33,9 +35,8 @@ def test_search_user_tags(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW tag_track_user")
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_plays")
-        session.execute("REFRESH MATERIALIZED VIEW aggregate_user")
+        rebuild_search_dicts(session)
+        reconcile_aggregate_rows(session, AGGREGATE_USER)
         args = {
             'search_str': 'pop',
             'current_user_id': None,
@@ -3,6 +3,7 @@ from sqlalchemy import asc
 from src.models import TagTrackUserMatview
 from src.utils.db_session import get_db
 from tests.utils import populate_mock_db
+from src.tasks.search_dicts import rebuild_search_dicts
 
 def test_track_tag_mat_view(app):
     """Tests that genre metrics can be queried"""
@@ -23,7 +24,7 @@ def test_track_tag_mat_view(app):
     populate_mock_db(db, test_entities)
 
     with db.scoped_session() as session:
-        session.execute("REFRESH MATERIALIZED VIEW tag_track_user")
+        rebuild_search_dicts(session)
         user_1_tags = (
             session.query(TagTrackUserMatview)
             .filter(TagTrackUserMatview.owner_id == 1)
@@ -2,6 +2,7 @@ from datetime import datetime
 from src import models
 from src.utils import helpers
 from src.utils.db_session import get_db
+from src.tasks.play_counts import update_play_counts
 
 
 def query_creator_by_name(app, creator_name=None):
@@ -114,6 +115,7 @@ def populate_mock_db(db, entities):
             )
             session.add(user)
 
+        plays = []
         for i, play_meta in enumerate(entities.get('plays', [])):
             play = models.Play(
                 id=play_meta.get("id", i),
@@ -121,6 +123,8 @@ def populate_mock_db(db, entities):
                 created_at=play_meta.get("created_at", datetime.now())
             )
             session.add(play)
+            plays.append(play)
+        update_play_counts(session, plays)
 
         for i, follow_meta in enumerate(follows):
             follow = models.Follow(